@@ -24,11 +24,13 @@ import MLC.Log.log as lg
 
 from MLC.Common.PreevaluationManager import PreevaluationManager
 from MLC.Common.Operations import Operations
+from MLC.Common.LispTreeExpr.SubtreeCache import SubtreeCache
 from MLC.db.mlc_repository import MLCRepository
 from MLC.Log.log import set_logger
 from MLC.mlc_parameters.mlc_parameters import Config
 from MLC.Population.Creation.CreationFactory import CreationFactory
 from MLC.Population.Evaluation.EvaluatorFactory import EvaluatorFactory
+from MLC.Population.SteadyStateEvolution import SteadyStateEvolution
 from MLC.Simulation import Simulation
 
 
@@ -39,12 +41,20 @@ class MLC_CALLBACKS:
     ON_FINISH = 3
 
 
+class EvolutionMode:
+    GENERATIONAL = "generational"
+    STEADY_STATE = "steady_state"
+    ALL = [GENERATIONAL, STEADY_STATE]
+
+
 class Application(object):
 
     def __init__(self, simulation, callbacks={}, gen_creator=None):
         self._config = Config.get_instance()
         # Reload the Operations supported
         Operations.get_instance(reload_operations=True)
+        # Reload the subtree cache, it could have been enabled/disabled
+        self._subtree_cache = SubtreeCache.get_instance(reload_cache=True)
 
         self._simulation = simulation
         self._mlc_repository = MLCRepository.get_instance()
@@ -75,6 +85,13 @@ class Application(object):
 
         self._look_for_duplicates = self._config.getboolean('OPTIMIZATION', 'lookforduplicates')
 
+        self._evolution_mode = EvolutionMode.GENERATIONAL
+        if self._config.has_option('OPTIMIZATION', 'evolution_mode'):
+            self._evolution_mode = self._config.get('OPTIMIZATION', 'evolution_mode')
+        if self._evolution_mode not in EvolutionMode.ALL:
+            raise ValueError("Invalid evolution_mode '%s', valid values: %s"
+                             % (self._evolution_mode, ", ".join(EvolutionMode.ALL)))
+
         # callbacks for the MLC application
         if MLC_CALLBACKS.ON_START in callbacks:
             self.__callbacks_manager.subscribe(MLC_CALLBACKS.ON_START,
@@ -123,6 +140,9 @@ class Application(object):
         self._set_numpy_parameters()
         self.__display_best = display_best
 
+        # Parameters used while the population evolves, read once
+        self._config.reload_parameters()
+
         if from_generation is None:
             from_generation = self._mlc_repository.count_population()
 
@@ -135,42 +155,51 @@ class Application(object):
         # emit app start event
         self.__callbacks_manager.on_event(MLC_CALLBACKS.ON_START)
 
-        # First generation must be generated from scratch
-        if self._mlc_repository.count_population() == 0:
-            lg.logger_.info("Creating and filling first generation")
+        try:
+            # First generation must be generated from scratch
+            if self._mlc_repository.count_population() == 0:
+                lg.logger_.info("Creating and filling first generation")
 
-            last_population = Simulation.create_empty_population_for(1)
-            last_population.fill(self._gen_creator)
-            self.evaluate_population(last_population, 1)
-            self._mlc_repository.add_population(last_population)
+                last_population = Simulation.create_empty_population_for(1)
+                last_population.fill(self._gen_creator)
+                self.evaluate_population(last_population, 1)
+                self._mlc_repository.add_population(last_population)
 
-            # emit new generation event
-            self.__callbacks_manager.on_event(MLC_CALLBACKS.ON_NEW_GENERATION, 1)
-            lg.logger_.info("Population created. Number: %s - Size: %s" % (1, last_population.get_size()))
+                # emit new generation event
+                self.__callbacks_manager.on_event(MLC_CALLBACKS.ON_NEW_GENERATION, 1)
+                lg.logger_.info("Population created. Number: %s - Size: %s" % (1, last_population.get_size()))
 
-        while self._mlc_repository.count_population() < to_generation:
-            last_generation = self._mlc_repository.count_population()
-            last_population = self._mlc_repository.get_population(last_generation)
+            if self._evolution_mode == EvolutionMode.STEADY_STATE:
+                SteadyStateEvolution(self._evaluator, self.__callbacks_manager,
+                                     self._look_for_duplicates).run(to_generation)
 
-            # obtain the next generation by evolving the lastone
-            lg.logger_.info("Evolving to Population %s using population %s" % (last_generation + 1, last_generation))
+            while self._mlc_repository.count_population() < to_generation:
+                last_generation = self._mlc_repository.count_population()
+                last_population = self._mlc_repository.get_population(last_generation)
 
-            next_population = Simulation.create_empty_population_for(last_generation + 1)
-            next_population = last_population.evolve(next_population)
+                # obtain the next generation by evolving the lastone
+                lg.logger_.info("Evolving to Population %s using population %s" % (last_generation + 1, last_generation))
 
-            # continue with evolve if there are duplicated individuals
-            if self._look_for_duplicates:
-                while next_population.remove_duplicates() > 0:
-                    next_population = last_population.evolve(next_population)
+                next_population = Simulation.create_empty_population_for(last_generation + 1)
+                next_population = last_population.evolve(next_population)
 
-            # evaluate population
-            self.evaluate_population(next_population, last_generation)
+                # continue with evolve if there are duplicated individuals
+                if self._look_for_duplicates:
+                    while next_population.remove_duplicates() > 0:
+                        next_population = last_population.evolve(next_population)
 
-            lg.logger_.info("Population created. Number: %s - Size: %s" % (last_generation + 1, next_population.get_size()))
-            self._mlc_repository.add_population(next_population)
+                # evaluate population
+                self.evaluate_population(next_population, last_generation)
 
-            # emit new generation event
-            self.__callbacks_manager.on_event(MLC_CALLBACKS.ON_NEW_GENERATION, last_generation + 1)
+                lg.logger_.info("Population created. Number: %s - Size: %s" % (last_generation + 1, next_population.get_size()))
+                self._mlc_repository.add_population(next_population)
+
+                # emit new generation event
+                self.__callbacks_manager.on_event(MLC_CALLBACKS.ON_NEW_GENERATION, last_generation + 1)
+        finally:
+            # Release the resources of the evaluator, like worker processes, even if the
+            # evolution fails
+            self._evaluator.close()
 
         lg.logger_.info("MLC Simulation Finished")
 
@@ -199,13 +228,15 @@ class Application(object):
 
         population.sort()
 
-        # Enforce reevaluation
+        # Enforce reevaluation of the individuals around the ev_again_nb best ones
         if self._config.getboolean('EVALUATOR', 'ev_again_best'):
             ev_again_times = self._config.getint('EVALUATOR', 'ev_again_times')
-            for i in range(1, ev_again_times):
-                ev_again_nb = self._config.getint('EVALUATOR', 'ev_again_nb')
-                population.evaluate(self._evaluator)
-                population.sort()
+            ev_again_nb = self._config.getint('EVALUATOR', 'ev_again_nb')
+            population.race(self._evaluator, ev_again_nb, ev_again_times)
+            population.sort()
+
+        if self._subtree_cache.is_enabled():
+            self._subtree_cache.log_statistics()
 
     def _duplicates_must_be_removed(self, generation_number):
         if self.__badvalues_elim == "all":
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import MLC.Log.log as lg
+import imp
+import importlib
+import os
+import sys
+
+
+class CallbackRegistry(object):
+    """
+    Singleton class that keeps the evaluation and preevaluation modules of the experiments,
+    so they are imported once instead of every time a callback is requested. A module is
+    imported again when its file is modified or when the module found in the path is a
+    different one, like when another experiment is opened.
+    """
+    _instance = None
+
+    def __init__(self):
+        # (package, module name) -> (module, path of the module file, modification time)
+        self._modules = {}
+        # (package, sys.path) -> directory of the package
+        self._package_dirs = {}
+
+    @staticmethod
+    def get_instance():
+        if CallbackRegistry._instance is None:
+            CallbackRegistry._instance = CallbackRegistry()
+
+        return CallbackRegistry._instance
+
+    def get_module(self, package, module_name):
+        """
+        Return the module package.module_name found in the path. Raises ImportError if the
+        module does not exist
+        """
+        module_path = self._find_module_path(package, module_name)
+        modification_time = os.path.getmtime(module_path)
+
+        entry = self._modules.get((package, module_name))
+        if entry is not None and entry[1] == module_path and entry[2] == modification_time:
+            return entry[0]
+
+        module = self._import_module(package, module_name)
+        self._modules[(package, module_name)] = (module, module_path, modification_time)
+        return module
+
+    def clear(self):
+        self._modules.clear()
+        self._package_dirs.clear()
+
+    def _find_module_path(self, package, module_name):
+        key = (package, tuple(sys.path))
+        package_dir = self._package_dirs.get(key)
+        if package_dir is not None:
+            try:
+                return self._find_module_in(module_name, package_dir)
+            except ImportError:
+                # The package was moved or removed, look for it again
+                del self._package_dirs[key]
+
+        package_dir = self._find_module_in(package, None)
+        self._package_dirs[key] = package_dir
+        return self._find_module_in(module_name, package_dir)
+
+    def _find_module_in(self, module_name, directory):
+        module_file, module_path, _ = imp.find_module(module_name, None if directory is None else [directory])
+        if module_file is not None:
+            module_file.close()
+        return module_path
+
+    def _import_module(self, package, module_name):
+        try:
+            # WARNING: I am unloading manually the package of the module. I need to do this
+            # because Python does not support module unloading and my evaluation functions are
+            # all the same, so when one experiment loads his module, other project with the same
+            # name of module won't be able to load yours
+            del sys.modules[package]
+            lg.logger_.debug("[CALLBACK_REGISTRY] Module {0} was removed".format(package))
+        except KeyError:
+            # If the module cannot be unload because it does not exists, continue
+            pass
+
+        full_name = "{0}.{1}".format(package, module_name)
+        lg.logger_.debug('[CALLBACK_REGISTRY] Importing module {0}'.format(full_name))
+        module = importlib.import_module(full_name)
+        reload(module)
+        return module
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import re
+
+from array import array
+from MLC.Common.LispTreeExpr.TreeNodes import LeafNode
+from MLC.Common.LispTreeExpr.OperationNodes import OpNodeFactory
+
+
+class CompactTree(object):
+    """
+    Compact representation of the controls of a tree, used to keep in memory the trees of
+    the individuals without their nodes. The controls are stored in prefix order in an array
+    with one opcode per node. The arguments of the leaves are stored in a second array: the
+    sensor index for the sensors and the position in the pool of constants for the constants.
+    Constants are kept as strings, so the tree obtained from the compact form is the same
+    one obtained parsing the expression.
+    """
+    __slots__ = ('_opcodes', '_arguments', '_constants')
+
+    SENSOR = 0
+    CONSTANT = 1
+
+    SENSOR_REGEX = re.compile(r"^S(0|[1-9][0-9]*)$")
+
+    # Opcode of the operations, assigned the first time an operation is found
+    _op_codes = {}
+    # Operation and amount of arguments of every opcode, starting from opcode 2
+    _op_table = []
+
+    def __init__(self, opcodes, arguments, constants):
+        self._opcodes = opcodes
+        self._arguments = arguments
+        self._constants = constants
+
+    @staticmethod
+    def from_tree(tree):
+        opcodes = array('B')
+        arguments = array('I')
+        constants = []
+        constant_indexes = {}
+
+        nodes = list(reversed(tree.get_root_node().get_children()))
+        while nodes:
+            node = nodes.pop()
+            if node.is_leaf():
+                string = node.to_string()
+                if CompactTree.SENSOR_REGEX.match(string):
+                    opcodes.append(CompactTree.SENSOR)
+                    arguments.append(int(string[1:]))
+                else:
+                    if string not in constant_indexes:
+                        constant_indexes[string] = len(constants)
+                        constants.append(string)
+                    opcodes.append(CompactTree.CONSTANT)
+                    arguments.append(constant_indexes[string])
+                continue
+
+            opcodes.append(CompactTree._get_op_code(node.get_op(), len(node.get_children())))
+            nodes.extend(reversed(node.get_children()))
+
+        return CompactTree(opcodes, arguments, tuple(constants))
+
+    @staticmethod
+    def _get_op_code(op, nargs):
+        op_code = CompactTree._op_codes.get(op)
+        if op_code is None:
+            CompactTree._op_table.append((op, nargs))
+            op_code = len(CompactTree._op_table) + CompactTree.CONSTANT
+            CompactTree._op_codes[op] = op_code
+        return op_code
+
+    def to_root_node(self):
+        """
+        Build the nodes of the tree. The nodes are not indexed, see LispTreeExpr(root_node=...)
+        """
+        root = OpNodeFactory.make('root', 0)
+        # Internal nodes waiting for their arguments, with the amount of arguments missing
+        pending = [[root, -1]]
+        arguments = iter(self._arguments)
+
+        for opcode in self._opcodes:
+            if opcode == CompactTree.SENSOR:
+                node = LeafNode(0, "S%d" % next(arguments))
+            elif opcode == CompactTree.CONSTANT:
+                node = LeafNode(0, self._constants[next(arguments)])
+            else:
+                op, nargs = CompactTree._op_table[opcode - CompactTree.CONSTANT - 1]
+                node = OpNodeFactory.make(op, 0)
+
+            pending[-1][0].add_child(node)
+            pending[-1][1] -= 1
+            if opcode > CompactTree.CONSTANT:
+                pending.append([node, nargs])
+
+            while pending[-1][1] == 0:
+                pending.pop()
+
+        return root
+
+    def __len__(self):
+        return len(self._opcodes)
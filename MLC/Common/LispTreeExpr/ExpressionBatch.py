@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import hashlib
+import numpy as np
+
+from collections import OrderedDict
+from MLC.Common.LispTreeExpr.LispTreeExpr import ExpressionCompiler
+
+
+class ExpressionBatch(object):
+    """
+    Computes together the expressions of a group of individuals, usually the ones of a
+    population being evaluated. All the trees are compiled in one function where every
+    different subexpression is computed once, so subtrees shared because of replication,
+    crossover or elitism are not computed again for every individual.
+
+    While the batch is bound, the trees of the individuals request their values to it. The
+    values of all the individuals are computed when a sensor input is requested by a second
+    individual, so cost functions using a different input for every individual do not pay
+    for the batch. The values of the least recently used inputs are discarded when their
+    memory exceeds the size of the batch, and an input whose values do not fit is computed
+    by every individual on its own.
+
+    Batches are disabled by default, they are enabled with the parameters expression_batch
+    and expression_batch_size (in MB) of the OPTIMIZATION section.
+    """
+    DEFAULT_SIZE_MB = 64
+
+    def __init__(self, individuals, size_mb=DEFAULT_SIZE_MB):
+        self._individuals = individuals
+        self._compiled_batch = None
+        self._max_size = int(size_mb * 1024 * 1024)
+        # Values of all the expressions, by sensor input fingerprint
+        self._values = OrderedDict()
+        self._size = 0
+        # Position of the first individual that requested every sensor input
+        self._requests = OrderedDict()
+        # Inputs whose values are bigger than the batch
+        self._oversized = set()
+
+    def bind(self):
+        for position, individual in enumerate(self._individuals):
+            individual.set_expression_batch(self, position)
+
+    def release(self):
+        for individual in self._individuals:
+            individual.set_expression_batch(None)
+        self._compiled_batch = None
+        self._values.clear()
+        self._size = 0
+        self._requests.clear()
+        self._oversized.clear()
+
+    def calculate_expressions(self, sensor_replacement_list):
+        """
+        Return the list with the values of the expressions of all the individuals
+        """
+        if self._compiled_batch is None:
+            compiler = ExpressionCompiler()
+            for individual in self._individuals:
+                compiler.add_tree(individual.get_tree().get_root_node())
+            self._compiled_batch = compiler.compile_batch()
+
+        return ExpressionCompiler.execute(self._compiled_batch, sensor_replacement_list)
+
+    def calculate_expression(self, position, tree, sensor_replacement_list):
+        fingerprint = ExpressionBatch.sensors_fingerprint(sensor_replacement_list)
+        if fingerprint is None:
+            return ExpressionCompiler.execute(tree.compile_expression(), sensor_replacement_list)
+
+        values = self._values.pop(fingerprint, None)
+        if values is None:
+            first_position = self._requests.get(fingerprint)
+            if first_position is None or first_position == position or fingerprint in self._oversized:
+                # This input could be used only by this individual
+                self._requests[fingerprint] = position
+                return ExpressionCompiler.execute(tree.compile_expression(), sensor_replacement_list)
+
+            values = self.calculate_expressions(sensor_replacement_list)
+            if not self._store(fingerprint, values):
+                self._oversized.add(fingerprint)
+                return values[position]
+        else:
+            # Move the values to the end of the LRU order
+            self._values[fingerprint] = values
+
+        # The values are shared, return a copy in case the cost function modifies them
+        return ExpressionBatch._copy(values[position])
+
+    def _store(self, fingerprint, values):
+        size = ExpressionBatch._size_of(values)
+        if size > self._max_size:
+            return False
+
+        self._values[fingerprint] = values
+        self._size += size
+        while self._size > self._max_size:
+            _, old_values = self._values.popitem(last=False)
+            self._size -= ExpressionBatch._size_of(old_values)
+        return True
+
+    @staticmethod
+    def _size_of(value):
+        if isinstance(value, list):
+            return sum(ExpressionBatch._size_of(v) for v in value)
+        return np.asarray(value).nbytes
+
+    @staticmethod
+    def _copy(value):
+        if isinstance(value, list):
+            return [ExpressionBatch._copy(v) for v in value]
+        if isinstance(value, np.ndarray):
+            return np.copy(value)
+        return value
+
+    @staticmethod
+    def sensors_fingerprint(sensor_replacement_list):
+        """
+        Return a string identifying the values of the sensors, or None if the sensors
+        cannot be identified by their values
+        """
+        digest = hashlib.md5()
+        for sensor in sensor_replacement_list:
+            sensor = np.asarray(sensor)
+            if sensor.dtype == object:
+                return None
+
+            digest.update(str(sensor.dtype))
+            digest.update(str(sensor.shape))
+            digest.update(sensor.tobytes())
+
+        return digest.hexdigest()
@@ -21,12 +21,17 @@
 
 import MLC.Log.log as lg
 import networkx as nx
+import heapq
+import numpy as np
 import re
 
 from MLC.mlc_parameters.mlc_parameters import Config
 from MLC.Common.Operations import Operations
 from MLC.Common.LispTreeExpr.TreeNodes import LeafNode, InternalNode
+from MLC.Common.LispTreeExpr.CompactTree import CompactTree
 from MLC.Common.LispTreeExpr.OperationNodes import OpNodeFactory
+from MLC.Common.LispTreeExpr.OperationNodes import DivisionNode
+from MLC.Common.LispTreeExpr.OperationNodes import LogarithmNode
 from PyQt5.QtCore import Qt
 
 
@@ -78,6 +83,11 @@ class OperationArgumentsAmountException(ExprException):
 
 
 class LispTreeExpr(object):
+    # Tokens of an expression: brackets, operations and arguments
+    TOKEN_REGEX = re.compile(r"[()]|[^\s()]+")
+    # Samples of the sensors computed at once by calculate_expression_blocks
+    DEFAULT_BLOCK_SIZE = 65536
+
     class NodeIdGenerator(object):
         def __init__(self):
             self._node_id_counter = 0
@@ -87,24 +97,193 @@ class LispTreeExpr(object):
             self._node_id_counter += 1
             return node_id
 
-    def __init__(self, expr):
-        self._node_id_generator = LispTreeExpr.NodeIdGenerator()
-        self._nodes = []
-        self._expanded_tree = expr
+    class TreeBuilder(object):
+        """
+        Creates or walks the nodes of a tree, numbering them and setting the depth, subtree depth
+        and expression index of every node. Leaves have the depth of their parent and internal
+        nodes the depth of their parent plus one. The root node is not stored in the list of nodes
+        """
+
+        def __init__(self):
+            self._node_id_generator = LispTreeExpr.NodeIdGenerator()
+            self._nodes = []
+
+        def nodes(self):
+            return self._nodes
+
+        def generate_tree(self, expr, is_root_expression=True):
+            """
+            Build the tree of the expression in one pass over its tokens. The expression must be
+            well-formed
+            """
+            tokens = LispTreeExpr._tokenize(expr)
+
+            token, index = tokens[0]
+            if token != '(':
+                return self._generate_leaf_node(token, 0, index)
+
+            stack = []
+            position = 0
+            while position < len(tokens):
+                token, index = tokens[position]
+
+                if token == '(':
+                    if stack:
+                        op = tokens[position + 1][0]
+                        depth = stack[-1].get_depth() + 1
+                    elif is_root_expression:
+                        op = 'root'
+                        depth = 1
+                    else:
+                        op = tokens[position + 1][0]
+                        depth = 1
+
+                    stack.append(self._generate_internal_node(op, depth, index))
+                    # Jump over the operation
+                    position += 2
+                    continue
+
+                if token == ')':
+                    node = stack.pop()
+                    child_subtreedepth = 0
+                    for child_node in node.get_children():
+                        child_subtreedepth = max(child_subtreedepth, child_node.get_subtreedepth())
+                    node.set_subtreedepth(1 + child_subtreedepth)
+
+                    if not stack:
+                        if not is_root_expression:
+                            self._nodes.append(node)
+                        return node
+
+                    stack[-1].add_child(node)
+                    self._nodes.append(node)
+                else:
+                    stack[-1].add_child(self._generate_leaf_node(token, stack[-1].get_depth(), index))
+
+                position += 1
+
+            raise NotBalancedParanthesisException(expr)
+
+        def index_tree(self, root):
+            """
+            Walk an already built tree, giving its nodes the same numbers and indexes they would
+            have if the tree were parsed from its expression
+            """
+            if isinstance(root, LeafNode):
+                self._index_node(root, 0, 0)
+            else:
+                self._index_node(root, 1, 0, is_root_expression=True)
+            return root
+
+        def _index_node(self, node, depth, expr_index, is_root_expression=False):
+            """
+            Return the length of the node in the expression
+            """
+            node.set_node_id(self._node_id_generator.next_node_id())
+            node.set_depth(depth)
+            node.set_expr_index(expr_index)
+
+            if isinstance(node, LeafNode):
+                node.set_subtreedepth(0)
+                self._nodes.append(node)
+                return len(node.to_string())
+
+            # 1 colon + op len
+            length = 1 + len('root' if is_root_expression else node.get_op())
+            child_subtreedepth = 0
+            for child_node in node.get_children():
+                child_depth = depth if isinstance(child_node, LeafNode) else depth + 1
+                # 1 space + child length
+                length += 1 + self._index_node(child_node, child_depth, expr_index + length + 1)
+                child_subtreedepth = max(child_subtreedepth, child_node.get_subtreedepth())
+
+            node.set_subtreedepth(1 + child_subtreedepth)
+            if not is_root_expression:
+                self._nodes.append(node)
+            return length + 1
+
+        def _generate_leaf_node(self, arg, depth, expr_index):
+            leaf = LeafNode(self._node_id_generator.next_node_id(), arg)
+            leaf.set_depth(depth)
+            leaf.set_expr_index(expr_index)
+            leaf.set_subtreedepth(0)
+            self._nodes.append(leaf)
+            return leaf
+
+        def _generate_internal_node(self, op, depth, expr_index):
+            # If the operation doesn not exists, an exception is thrown. This
+            # shouldn't happen if the expression is valid
+            try:
+                node = OpNodeFactory.make(op, self._node_id_generator.next_node_id())
+            except KeyError:
+                lg.logger_.error('[LISP_TREE_EXPR] Invalid operation found. Op: {0}'.format(op))
+                raise
 
-        # Remove the root part of the node
-        nonroot_expr = expr[expr.find('root') + 5:-1]
-        # lg.logger_.debug("[LISP_TREE_EXPR] NonRoot Expression: " + nonroot_expr)
-        self._root, _ = self._generate_node(expr, is_root_expression=True)
+            node.set_depth(depth)
+            node.set_expr_index(expr_index)
+            return node
+
+    def __init__(self, expr=None, root_node=None):
+        """
+        Build the tree parsing the expression or, if root_node is given, over the nodes of
+        an already built tree. The nodes are not copied
+        """
+        builder = LispTreeExpr.TreeBuilder()
+        if root_node is None:
+            self._root = builder.generate_tree(expr)
+        else:
+            self._root = builder.index_tree(root_node)
+        self._nodes = builder.nodes()
+        self._compiled_expression = None
+        self._subtree_strings = None
+        self._depth_index = None
+        self._candidates = {}
+        self._expression_batch = None
+        self._batch_position = None
 
         # Get the complexity of the tree before simplifying
         self._complexity = self._root.complexity()
         self._formal = self._root.formal()
 
         # Now, simplify the tree
-        if Config.get_instance().getboolean('OPTIMIZATION', 'simplify'):
+        if Config.get_instance().parameters().simplify:
             self.simplify_tree()
 
+    @staticmethod
+    def parse_subtree(expr):
+        """
+        Return the node of a subtree expression, like '(+ S0 2.0000)' or 'S0', without
+        building a tree
+        """
+        return LispTreeExpr.TreeBuilder().generate_tree(expr, is_root_expression=False)
+
+    @staticmethod
+    def from_controls(controls):
+        """
+        Build a tree using a copy of every node of the list as a control
+        """
+        root = OpNodeFactory.make('root', 0)
+        for control in controls:
+            root.add_child(control.clone())
+        return LispTreeExpr(root_node=root)
+
+    @staticmethod
+    def from_compact(compact_tree):
+        """
+        Build the tree of a CompactTree, avoiding to parse its expression
+        """
+        return LispTreeExpr(root_node=compact_tree.to_root_node())
+
+    def to_compact(self):
+        return CompactTree.from_tree(self)
+
+    def replace_subtree(self, node, new_node):
+        """
+        Return a new tree where the subtree of the node is replaced by a copy of new_node.
+        The tree is not modified
+        """
+        return LispTreeExpr(root_node=self._root.clone({node: new_node}))
+
     @staticmethod
     def check_expression(expression):
         # Remove leading and trailing spaces
@@ -120,87 +299,77 @@ class LispTreeExpr(object):
         if expression.find("(root") != 0:
             raise RootNotFoundExprException(expression)
 
-        # Check that the expression is just a sensor
-        r = re.compile("\(root S[0-9]*\)$")
-        if r.match(expression) != None:
-            return True
-
-        # Check that the expression is just a number
-        r = re.compile("\(root [0-9,\-]*\.{0,1}[0-9]*\)$")
-        if r.match(expression) != None:
-            return True
-
-        # Check the amount of parenthesis to be balanced
-        open_parenthesis = "("
-        close_parenthesis = ")"
-        string_to_find = open_parenthesis
+        # Walk the tokens once. Errors in the operations are stored and raised after
+        # checking the parenthesis, so they are reported with the same priority as always
+        operation_error = None
+        root_closed = False
+        trailing_trash = False
         counter = 0
-        for index in xrange(len(expression)):
-            if expression[index] == open_parenthesis:
+        # Every element of the stack is [operation, expression index, amount of arguments]
+        stack = []
+        for token, index in LispTreeExpr._tokenize(expression):
+            if token == '(':
                 counter += 1
-            elif expression[index] == close_parenthesis:
+            elif token == ')':
                 counter -= 1
 
+            if root_closed:
+                trailing_trash = True
+                continue
+
+            if token == '(':
+                if stack:
+                    stack[-1][2] += 1
+                stack.append([None, index, 0])
+
+            elif token == ')':
+                op_string, op_index, nbarg = stack.pop()
+                if not stack:
+                    root_closed = True
+                elif operation_error is None:
+                    subexpression = expression[op_index:index + 1]
+                    if op_string is None:
+                        operation_error = OperationNotFoundException(op_string, subexpression)
+                    elif nbarg != Operations.get_instance().get_operation_from_op_string(op_string)["nbarg"]:
+                        operation_error = OperationArgumentsAmountException(subexpression)
+
+            elif stack[-1][0] is None:
+                stack[-1][0] = token
+                if len(stack) > 1 and operation_error is None:
+                    try:
+                        Operations.get_instance().get_operation_from_op_string(token)
+                    except KeyError:
+                        operation_error = OperationNotFoundException(token, expression[stack[-1][1]:])
+
+            else:
+                stack[-1][2] += 1
+
+        # Check the amount of parenthesis to be balanced
         if counter != 0:
             raise NotBalancedParanthesisException(expression)
 
         # Check the expression to finish with a )
-        if expression[-1] != ')':
+        if trailing_trash or expression[-1] != ')':
             raise TrailingTrashExprException(expression)
 
         # Now the expression is correct. Check the amount of arguments to be correct
-        def check_operands(expr):
-            op_string = expr[1:expr.find(' ')]
-            expr_op = None
-            try:
-                expr_op = Operations.get_instance().get_operation_from_op_string(op_string)
-            except KeyError:
-                raise OperationNotFoundException(op_string, expr)
-
-            # Jump directly to the first argument
-            pos = 1 + len(op_string) + 1
-            arg_counter = 0
-            argument_len = None
-            while True:
-                arg_counter += 1
-
-                if expr[pos] == '(':
-                    # The argument is another operator. Process it recursively
-                    argument_len = check_operands(expr[pos:])
-                    pos += argument_len
-                    if expr[pos] == ' ':
-                        pos += 1
-                else:
-                    # The argument is a number or a sensor
-                    next_space = expr[pos:].find(' ')
-                    next_close = expr[pos:].find(')')
-                    if next_space < next_close:
-                        # There are more arguments. Jump to them
-                        argument_len = next_space
-                        pos += argument_len + 1
-                    else:
-                        argument_len = next_close
-                        pos += argument_len
+        if operation_error is not None:
+            raise operation_error
 
-                # Check if this is the last argument
-                if expr[pos] == ')':
-                    break
-
-            if arg_counter != expr_op["nbarg"]:
-                raise OperationArgumentsAmountException(expr)
-
-            # The position always finished in the last bracket.
-            # This is the same as the length of the operator
-            return pos + 1
-
-        # Add an empty space at the end of the check_operands algorithm, to create a
-        # single cut condition in the recursive algorithm
-        expression = expression[6:-1]
-        expression += " "
-        check_operands(expression)
+        return True
 
     def simplify_tree(self):
         self._root = self._root.simplify()
+        self._compiled_expression = None
+        self._subtree_strings = None
+        self._depth_index = None
+        self._candidates = {}
+
+        # Simplification replaces nodes, number them again
+        builder = LispTreeExpr.TreeBuilder()
+        self._root = builder.index_tree(self._root)
+        self._nodes = builder.nodes()
+
         self._simplified_tree = '(root ' + self._root.to_string() + ')'
         lg.logger_.debug("[LISP_TREE_EXPR] Simplified Expression: " + self._simplified_tree)
 
@@ -209,29 +378,104 @@ class LispTreeExpr(object):
         self._root.construct_tree(tree)
         return tree
 
+    def compile_expression(self):
+        """
+        Return the tree compiled as a python function that receives the list of sensors
+        and returns the value of the controls. The function is generated once and reused
+        in every evaluation of the expression
+        """
+        if self._compiled_expression is None:
+            self._compiled_expression = ExpressionCompiler().compile(self._root)
+        return self._compiled_expression
+
+    def set_expression_batch(self, expression_batch, position=None):
+        """
+        While an expression batch is set, the values of the expression are requested to it
+        """
+        self._expression_batch = expression_batch
+        self._batch_position = position
+
+    def subtree_strings(self):
+        """
+        Return a dictionary with the string of the subtree of every internal node of the tree
+        """
+        if self._subtree_strings is None:
+            self._subtree_strings = {}
+            self._subtree_string(self._root)
+        return self._subtree_strings
+
+    def _subtree_string(self, node):
+        if node.is_leaf():
+            return node.to_string()
+
+        children = [self._subtree_string(child) for child in node.get_children()]
+        string = '(' + node.get_op() + ' ' + ' '.join(children) + ')'
+        self._subtree_strings[node] = string
+        return string
+
     def calculate_expression(self, sensor_replacement_list):
-        class Replace_Sensors_Visitor(TreeVisitor):
+        # Imported here, the subtree cache depends on this module
+        from MLC.Common.LispTreeExpr.SubtreeCache import SubtreeCache
 
-            def __init__(self, sensor_replacement_list):
-                self._sensor_list = sensor_replacement_list
+        subtree_cache = SubtreeCache.get_instance()
+        if subtree_cache.is_enabled():
+            value = subtree_cache.calculate_expression(self, sensor_replacement_list)
+            if value is not None:
+                return value
 
-            def visit_internal_node(self, node):
-                pass
+        if self._expression_batch is not None:
+            return self._expression_batch.calculate_expression(self._batch_position,
+                                                               self,
+                                                               sensor_replacement_list)
 
-            def visit_leaf_node(self, node):
-                # FIXME: Don't like it. They should be private arguments
-                if node.is_sensor():
-                    # Get the number of the sensor
-                    node._value = self._sensor_list[int(node._arg[1:])]
-                else:
-                    node._value = float(node._arg)
+        return ExpressionCompiler.execute(self.compile_expression(), sensor_replacement_list)
 
-        # First, replace the sensors
-        visitor = Replace_Sensors_Visitor(sensor_replacement_list)
-        self._root.accept(visitor)
+    def calculate_expression_blocks(self, sensor_replacement_list, block_size=None):
+        """
+        Compute the expression over long sensor series, one block of samples at a time, so
+        the intermediate values of the tree never hold the whole series. Yields tuples
+        (sensor blocks, values of the expression for those blocks).
+
+        sensor_replacement_list can be a list with the series of every sensor (arrays or
+        memory mapped arrays), a 2-D array with the series of one sensor in every row (both
+        split in blocks of block_size samples) or an iterator that generates the list of
+        sensor blocks, like a generator reading a recorded trace.
+        """
+        compiled_expression = self.compile_expression()
+        for sensor_blocks in LispTreeExpr._sensor_blocks(sensor_replacement_list, block_size):
+            yield sensor_blocks, ExpressionCompiler.execute(compiled_expression, sensor_blocks)
 
-        # Transform printed warnings to real warnings
-        return self._root.compute()
+    def accumulate_expression(self, sensor_replacement_list, block_cost, block_size=None):
+        """
+        Return the sum of block_cost(sensor blocks, values) over the blocks of the sensor
+        series. See calculate_expression_blocks
+        """
+        cost = 0.
+        for sensor_blocks, values in self.calculate_expression_blocks(sensor_replacement_list,
+                                                                      block_size):
+            cost += block_cost(sensor_blocks, values)
+        return cost
+
+    @staticmethod
+    def _sensor_blocks(sensor_replacement_list, block_size):
+        if not isinstance(sensor_replacement_list, (list, tuple, np.ndarray)):
+            # The blocks are generated by the caller
+            for sensor_blocks in sensor_replacement_list:
+                yield sensor_blocks
+            return
+
+        if block_size is None:
+            block_size = LispTreeExpr.DEFAULT_BLOCK_SIZE
+
+        if isinstance(sensor_replacement_list, np.ndarray):
+            # One sensor by row, the blocks are split along the samples axis
+            for start in range(0, sensor_replacement_list.shape[1], block_size):
+                yield sensor_replacement_list[:, start:start + block_size]
+            return
+
+        samples = min(len(sensor) for sensor in sensor_replacement_list)
+        for start in range(0, samples, block_size):
+            yield [sensor[start:start + block_size] for sensor in sensor_replacement_list]
 
     def get_root_node(self):
         return self._root
@@ -258,105 +502,54 @@ class LispTreeExpr(object):
         """
         return self._formal
 
-    def _number_of_subexpressions(self, expr):
-        level = 0
-        nbarg = 1
-        for i in range(len(expr)):
-            if expr[i] == '(':
-                level += 1
-            if expr[i] == ')':
-                level -= 1
-            if expr[i] == ' ' and level == 0:
-                nbarg += 1
-        return nbarg
-
-    def _get_operation(self, expr, is_root_expression=False):
-
-        if is_root_expression:
-            root_prefix_len = len("(root ")
-            return {"op": "root",
-                    "nbarg": self._number_of_subexpressions(expr[root_prefix_len:len(expr) - 1]),
-                    "complexity": 0}
-        pos = -1
-        expr_op = None
-        # Get operation string
-        str_op = expr[1:expr.find(' ')]
-
-        # If the operation doesn not exists, an exception is thrown. This
-        # shouldn't happen if the expression is valid
-        try:
-            expr_op = Operations.get_instance().get_operation_from_op_string(str_op)
-        except KeyError:
-            lg.logger_.error('[LISP_TREE_EXPR] Invalid operation found. Op: ', str_op)
-            raise
+    @staticmethod
+    def _tokenize(expr):
+        """
+        Split the expression in a list of tuples (token, index of the token in the expression)
+        """
+        return [(match.group(), match.start()) for match in LispTreeExpr.TOKEN_REGEX.finditer(expr)]
 
-        return expr_op
+    def subtree_candidates(self, mindepth, maxdepth, subtreedepthmax, control=None):
+        """
+        Return the internal nodes with depth between mindepth and maxdepth and subtree depth
+        up to subtreedepthmax, sorted by their position in the expression. If a control is
+        given, only the nodes of that control are returned. The list returned must not be
+        modified, it is reused when the same nodes are requested again
+        """
+        control_index = None if control is None else control.get_expr_index()
+        query = (mindepth, maxdepth, subtreedepthmax, control_index)
+        candidates = self._candidates.get(query)
+        if candidates is not None:
+            return candidates
 
-    def _generate_leaf_node(self, expr, parent_depth, expr_index):
-        # We found a Leaf Node
-        param_len = 0
+        if self._depth_index is None:
+            self._depth_index = self._build_depth_index()
 
-        find_space = expr.find(' ')
-        find_close_parenthesis = expr.find(')')
+        buckets = [nodes for (depth, subtreedepth), nodes in self._depth_index.iteritems()
+                   if mindepth <= depth <= maxdepth and subtreedepth <= subtreedepthmax]
+        candidates = [node for _, node in heapq.merge(*buckets)]
 
-        # Find the first space or colon
-        if find_space != -1 and find_space < find_close_parenthesis:
-            param_len = find_space
-        elif find_close_parenthesis != -1:
-            param_len = find_close_parenthesis
-        else:
-            param_len = len(expr)
-
-        leaf = LeafNode(self._node_id_generator.next_node_id(), expr[:param_len])
-        leaf.set_depth(parent_depth)
-        leaf.set_expr_index(expr_index)
-        leaf.set_subtreedepth(0)
-        self._nodes.append(leaf)
-        return leaf, param_len + 1
-
-    # As a precondition, the expression must be well-formed
-    def _generate_node(self, 
-                       expr, 
-                       is_root_expression=False, 
-                       parent_depth=0, 
-                       expr_index=0):
-        if expr[0] != '(':
-            return self._generate_leaf_node(expr, parent_depth, expr_index)
-
-        # We are in the presence of an internal node. Get the operation
-        op = self._get_operation(expr, is_root_expression)
-
-        # Generate the arguments of the internal node as Child Nodes
-        node = OpNodeFactory.make(op["op"], self._node_id_generator.next_node_id())
-        node.set_depth(parent_depth + 1)
-        node.set_expr_index(expr_index)
-        expr_offset = 0
-        offset = 0
-        child_node = None
-        child_subtreedepth = 0
-
-        for i in range(op["nbarg"]):
-            # 1 colon + op len + 1 space + (expr_offset)
-            next_arg_pos = 1 + len(op["op"]) + 1 + expr_offset
-
-            if expr[next_arg_pos] == '(':
-                child_node, offset = self._generate_node(expr[next_arg_pos:], 
-                                                         parent_depth=parent_depth + 1, 
-                                                         expr_index=expr_index + next_arg_pos)
-            else:
-                child_node, offset = self._generate_leaf_node(expr[next_arg_pos:],
-                                                              parent_depth=parent_depth + 1,
-                                                              expr_index=expr_index + next_arg_pos)
+        if control is not None:
+            control_end = control_index + len(control.to_string())
+            candidates = [node for node in candidates
+                          if control_index <= node.get_expr_index() < control_end]
+
+        self._candidates[query] = candidates
+        return candidates
 
-            node.add_child(child_node)
-            child_subtreedepth = max(child_subtreedepth, child_node.get_subtreedepth())
-            expr_offset += offset
+    def _build_depth_index(self):
+        """
+        Index the internal nodes by (depth, subtree depth). Every bucket holds tuples
+        (expression index, node) sorted by expression index
+        """
+        depth_index = {}
+        for node in self.internal_nodes():
+            bucket = depth_index.setdefault((node.get_depth(), node.get_subtreedepth()), [])
+            bucket.append((node.get_expr_index(), node))
 
-        node.set_subtreedepth(1 + child_subtreedepth)
-        if not is_root_expression:
-            self._nodes.append(node)
-        next_arg_pos = 1 + len(op["op"]) + 1 + expr_offset + 1
-        return node, next_arg_pos
+        for bucket in depth_index.itervalues():
+            bucket.sort(key=lambda entry: entry[0])
+        return depth_index
 
     def leaf_nodes(self):
         for leaf in filter(lambda n: n.is_leaf(), self._nodes):
@@ -378,3 +571,118 @@ class TreeVisitor:
 
     def visit_leaf_node(self, ndoe):
         pass
+
+
+class ExpressionCompiler(TreeVisitor):
+    """
+    Translates trees into a python function. Every internal node is transformed in one NumPy
+    statement, sensors are read from the argument S and constants from the pool C. Equal
+    subexpressions are computed once, even if they belong to different trees
+    """
+
+    TEMPORARY = re.compile(r"\bt\d+\b")
+
+    def __init__(self):
+        self._operands = []
+        self._statements = []
+        self._constants = []
+        # Variable of every subexpression already compiled, by its source code
+        self._variables = {}
+        # Index in the pool of every constant, by its string value
+        self._constant_indexes = {}
+        self._results = []
+
+    def visit_internal_node(self, node):
+        nbarg = len(node.get_children())
+        args = self._operands[len(self._operands) - nbarg:]
+        del self._operands[len(self._operands) - nbarg:]
+
+        source = node.op_source(args)
+        variable = self._variables.get(source)
+        if variable is None:
+            variable = "t%d" % len(self._statements)
+            self._statements.append("%s = %s" % (variable, source))
+            self._variables[source] = variable
+        self._operands.append(variable)
+
+    def visit_leaf_node(self, node):
+        if node.is_sensor():
+            self._operands.append("S[%d]" % int(node.to_string()[1:]))
+            return
+
+        constant = node.to_string()
+        if constant not in self._constant_indexes:
+            self._constant_indexes[constant] = len(self._constants)
+            self._constants.append(float(constant))
+        self._operands.append("C[%d]" % self._constant_indexes[constant])
+
+    def add_tree(self, root):
+        """
+        Add a tree to the function being compiled. Return the position of its value in the
+        list returned by the function compiled with compile_batch
+        """
+        root.accept(self)
+
+        if len(self._operands) == 1:
+            result = self._operands[0]
+        else:
+            result = "[" + ", ".join(self._operands) + "]"
+
+        self._operands = []
+        self._results.append(result)
+        return len(self._results) - 1
+
+    def compile(self, root):
+        """
+        Return a function that receives the list of sensors and returns the value of the tree
+        """
+        position = self.add_tree(root)
+        return self._build_function(self._results[position])
+
+    def compile_batch(self):
+        """
+        Return a function that receives the list of sensors and returns the list with the
+        values of all the trees added
+        """
+        return self._build_function("[" + ", ".join(self._results) + "]")
+
+    def _build_function(self, result):
+        source = self._function_source(result)
+        namespace = {"np": np,
+                     "my_div": DivisionNode.protected_division,
+                     "my_log": LogarithmNode.protected_log,
+                     "C": tuple(self._constants)}
+        exec source in namespace
+        return namespace["compiled_expression"]
+
+    def _function_source(self, result):
+        # Every temporary is deleted after its last use, so the intermediate arrays are
+        # released while the function runs instead of when it returns
+        last_use = {}
+        for index, statement in enumerate(self._statements):
+            for variable in ExpressionCompiler.TEMPORARY.findall(statement):
+                last_use[variable] = index
+        returned = set(ExpressionCompiler.TEMPORARY.findall(result))
+
+        source = "def compiled_expression(S, C=C):\n"
+        for index, statement in enumerate(self._statements):
+            source += "    " + statement + "\n"
+            released = sorted(variable for variable, last in last_use.items()
+                              if last == index and variable not in returned)
+            if released:
+                source += "    del " + ", ".join(released) + "\n"
+        source += "    return " + result + "\n"
+        return source
+
+    @staticmethod
+    def execute(compiled_expression, sensor_replacement_list):
+        # Transform printed warnings to real warnings
+        np.seterr(all='raise')
+        try:
+            return compiled_expression(sensor_replacement_list)
+        except FloatingPointError, err:
+            lg.logger_.warn("[LISP_TREE_EXPR] Error: {0}".format(err))
+            np.seterr(all='ignore')
+            return compiled_expression(sensor_replacement_list)
+        finally:
+            np.seterr(all='warn')
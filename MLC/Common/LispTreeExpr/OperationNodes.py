@@ -35,7 +35,7 @@ from MLC.Common.Operations import Operations
 
 
 def process_float(arg):
-    str_arg = ("%." + Config.get_instance().get('POPULATION', 'precision') + "f") % (arg)
+    str_arg = "%.*f" % (Config.get_instance().parameters().precision, arg)
     return str_arg
 
 
@@ -52,6 +52,7 @@ def execute_op_without_warnings(op, log_prefix, exception_msg, arg1, arg2=None):
 
 
 class PlusNode(InternalNode):
+    __slots__ = ()
 
     def __init__(self, node_id):
         InternalNode.__init__(self, node_id, "+", 1)
@@ -73,6 +74,9 @@ class PlusNode(InternalNode):
         else:
             return self
 
+    def op_source(self, args):
+        return args[0] + " + " + args[1]
+
     def op_compute(self, arg_list):
         try:
             return arg_list[0] + arg_list[1]
@@ -85,6 +89,7 @@ class PlusNode(InternalNode):
 
 
 class MinusNode(InternalNode):
+    __slots__ = ()
 
     def __init__(self, node_id):
         InternalNode.__init__(self, node_id, "-", 1)
@@ -108,6 +113,9 @@ class MinusNode(InternalNode):
         else:
             return self
 
+    def op_source(self, args):
+        return args[0] + " - " + args[1]
+
     def op_compute(self, arg_list):
         try:
             return arg_list[0] - arg_list[1]
@@ -120,6 +128,7 @@ class MinusNode(InternalNode):
 
 
 class MultNode(InternalNode):
+    __slots__ = ()
 
     def __init__(self, node_id):
         InternalNode.__init__(self, node_id, "*", 1)
@@ -144,6 +153,9 @@ class MultNode(InternalNode):
         else:
             return self
 
+    def op_source(self, args):
+        return args[0] + " * " + args[1]
+
     def op_compute(self, arg_list):
         try:
             return arg_list[0] * arg_list[1]
@@ -156,6 +168,7 @@ class MultNode(InternalNode):
 
 
 class DivisionNode(InternalNode):
+    __slots__ = ()
     PROTECTION = 0.001
     SIMPLIFY_PROTECTION = 0.01
 
@@ -165,16 +178,20 @@ class DivisionNode(InternalNode):
     def formal(self):
         return "(my_div(" + self._nodes[0].formal() + "," + self._nodes[1].formal() + "))"
 
-    def _process_division(self, dividend, divisor):
+    @staticmethod
+    def protected_division(dividend, divisor):
         if type(divisor) == np.ndarray:
-            new_divisor = [DivisionNode.PROTECTION if np.abs(x) < DivisionNode.PROTECTION else np.abs(x) for x in divisor]
-            return np.sign(divisor) * dividend / np.asarray(new_divisor)
+            new_divisor = np.maximum(np.abs(divisor), DivisionNode.PROTECTION)
+            return np.sign(divisor) * dividend / new_divisor
         else:
             if abs(divisor) < DivisionNode.PROTECTION:
                 return np.sign(divisor) * dividend / DivisionNode.PROTECTION
 
         return dividend / divisor
 
+    def _process_division(self, dividend, divisor):
+        return DivisionNode.protected_division(dividend, divisor)
+
     def op_simplify(self):
         # If the first argument is zero, return zero
         if self._node_arg_x_is_y(0, 0):
@@ -194,6 +211,9 @@ class DivisionNode(InternalNode):
         else:
             return self
 
+    def op_source(self, args):
+        return "my_div(" + args[0] + ", " + args[1] + ")"
+
     def op_compute(self, arg_list):
         try:
             return self._process_division(arg_list[0], arg_list[1])
@@ -206,6 +226,7 @@ class DivisionNode(InternalNode):
 
 
 class SineNode(InternalNode):
+    __slots__ = ()
 
     def __init__(self, node_id):
         InternalNode.__init__(self, node_id, "sin", 3)
@@ -220,6 +241,9 @@ class SineNode(InternalNode):
         else:
             return self
 
+    def op_source(self, args):
+        return "np.sin(" + args[0] + ")"
+
     def op_compute(self, arg_list):
         try:
             return np.sin(arg_list[0])
@@ -231,6 +255,7 @@ class SineNode(InternalNode):
 
 
 class CosineNode(InternalNode):
+    __slots__ = ()
 
     def __init__(self, node_id):
         InternalNode.__init__(self, node_id, "cos", 3)
@@ -245,6 +270,9 @@ class CosineNode(InternalNode):
         else:
             return self
 
+    def op_source(self, args):
+        return "np.cos(" + args[0] + ")"
+
     def op_compute(self, arg_list):
         try:
             return np.cos(arg_list[0])
@@ -256,6 +284,7 @@ class CosineNode(InternalNode):
 
 
 class LogarithmNode(InternalNode):
+    __slots__ = ()
     PROTECTION = 0.00001
     SIMPLIFY_PROTECTION = 0.01
 
@@ -265,15 +294,23 @@ class LogarithmNode(InternalNode):
     def formal(self):
         return "my_log(" + self._nodes[0].formal() + ")"
 
-    def _process_arg(self, arg):
+    @staticmethod
+    def protected_arg(arg):
         if type(arg) == np.ndarray:
-            return [LogarithmNode.PROTECTION if np.abs(x) < LogarithmNode.PROTECTION else np.abs(x) for x in arg]
+            return np.maximum(np.abs(arg), LogarithmNode.PROTECTION)
         else:
             if abs(arg) < LogarithmNode.PROTECTION:
                 return LogarithmNode.PROTECTION
 
         return abs(arg)
 
+    @staticmethod
+    def protected_log(arg):
+        return np.log(LogarithmNode.protected_arg(arg))
+
+    def _process_arg(self, arg):
+        return LogarithmNode.protected_arg(arg)
+
     def op_simplify(self):
         if not self._nodes[0].is_sensor():
             if float(self._nodes[0].to_string()) < LogarithmNode.SIMPLIFY_PROTECTION:
@@ -285,6 +322,9 @@ class LogarithmNode(InternalNode):
         else:
             return self
 
+    def op_source(self, args):
+        return "my_log(" + args[0] + ")"
+
     def op_compute(self, arg_list):
         try:
             return np.log(self._process_arg(arg_list[0]))
@@ -296,6 +336,7 @@ class LogarithmNode(InternalNode):
 
 
 class ExponentialNode(InternalNode):
+    __slots__ = ()
 
     def __init__(self, node_id):
         InternalNode.__init__(self, node_id, "exp", 5)
@@ -317,6 +358,9 @@ class ExponentialNode(InternalNode):
         else:
             return self
 
+    def op_source(self, args):
+        return "np.exp(" + args[0] + ")"
+
     def op_compute(self, arg_list):
         try:
             return np.exp(arg_list[0])
@@ -328,6 +372,7 @@ class ExponentialNode(InternalNode):
 
 
 class TanhNode(InternalNode):
+    __slots__ = ()
 
     def __init__(self, node_id):
         InternalNode.__init__(self, node_id, "tanh", 5)
@@ -342,6 +387,9 @@ class TanhNode(InternalNode):
         else:
             return self
 
+    def op_source(self, args):
+        return "np.tanh(" + args[0] + ")"
+
     def op_compute(self, arg_list):
         try:
             return np.tanh(arg_list[0])
@@ -353,6 +401,7 @@ class TanhNode(InternalNode):
 
 
 class RootNode(InternalNode):
+    __slots__ = ()
 
     def __init__(self, node_id):
         InternalNode.__init__(self, node_id, "", 0)
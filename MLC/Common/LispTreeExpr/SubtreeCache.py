@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import MLC.Log.log as lg
+import numpy as np
+import threading
+
+from collections import OrderedDict
+from MLC.mlc_parameters.mlc_parameters import Config
+from MLC.Common.LispTreeExpr.ExpressionBatch import ExpressionBatch
+from MLC.Common.LispTreeExpr.OperationNodes import DivisionNode
+from MLC.Common.LispTreeExpr.OperationNodes import LogarithmNode
+
+
+class SubtreeCache(object):
+    """
+    Singleton class that keeps the values of the subtrees computed by the trees, so the
+    subtrees repeated in the individuals of the same or of later generations are not computed
+    again for the same sensor input.
+
+    Values are identified by the string of the subtree and a fingerprint of the values of the
+    sensors. The least recently used values are discarded when the memory used by the cache
+    exceeds its size. The cache is disabled by default, it is enabled with the parameters
+    subtree_cache and subtree_cache_size (in MB) of the OPTIMIZATION section.
+    """
+    _instance = None
+
+    DEFAULT_SIZE_MB = 256
+
+    def __init__(self, enabled=False, size_mb=DEFAULT_SIZE_MB):
+        self._enabled = enabled
+        self._max_size = int(size_mb * 1024 * 1024)
+        self._values = OrderedDict()
+        self._size = 0
+        # Function computing every type of operation node
+        self._operations = {}
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        # Trees can be evaluated by several threads (see ThreadPoolEvaluator)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_instance(reload_cache=False):
+        if SubtreeCache._instance is None or reload_cache:
+            config = Config.get_instance()
+            enabled = False
+            size_mb = SubtreeCache.DEFAULT_SIZE_MB
+
+            if config.has_option('OPTIMIZATION', 'subtree_cache'):
+                enabled = config.getboolean('OPTIMIZATION', 'subtree_cache')
+            if config.has_option('OPTIMIZATION', 'subtree_cache_size'):
+                size_mb = config.getfloat('OPTIMIZATION', 'subtree_cache_size')
+
+            SubtreeCache._instance = SubtreeCache(enabled, size_mb)
+
+        return SubtreeCache._instance
+
+    def is_enabled(self):
+        return self._enabled
+
+    def calculate_expression(self, tree, sensor_replacement_list):
+        """
+        Return the value of the tree, or None if the sensors cannot be identified by their
+        values and the tree must be computed without the cache
+        """
+        fingerprint = ExpressionBatch.sensors_fingerprint(sensor_replacement_list)
+        if fingerprint is None:
+            return None
+
+        subtree_strings = tree.subtree_strings()
+
+        with self._lock:
+            # Transform printed warnings to real warnings
+            np.seterr(all='raise')
+            try:
+                return self._calculate_controls(tree, subtree_strings, sensor_replacement_list, fingerprint)
+            except FloatingPointError, err:
+                lg.logger_.warn("[SUBTREE_CACHE] Error: {0}".format(err))
+                np.seterr(all='ignore')
+                return self._calculate_controls(tree, subtree_strings, sensor_replacement_list, fingerprint)
+            finally:
+                np.seterr(all='warn')
+
+    def _calculate_controls(self, tree, subtree_strings, sensor_replacement_list, fingerprint):
+        values = []
+        for control in tree.get_root_node().get_children():
+            value = self._calculate_node(control, subtree_strings, sensor_replacement_list, fingerprint)
+            # Cached values are shared, return a copy in case the cost function modifies them
+            if not control.is_leaf() and isinstance(value, np.ndarray):
+                value = np.copy(value)
+            values.append(value)
+
+        if len(values) == 1:
+            return values[0]
+        return values
+
+    def _calculate_node(self, node, subtree_strings, sensor_replacement_list, fingerprint):
+        if node.is_leaf():
+            if node.is_sensor():
+                return sensor_replacement_list[int(node.to_string()[1:])]
+            return float(node.to_string())
+
+        key = (subtree_strings[node], fingerprint)
+        value = self._values.pop(key, None)
+        if value is not None:
+            # Move the value to the end of the LRU order
+            self._values[key] = value
+            self._hits += 1
+            return value
+
+        self._misses += 1
+        args = [self._calculate_node(child, subtree_strings, sensor_replacement_list, fingerprint)
+                for child in node.get_children()]
+        value = self._get_operation(node)(*args)
+        self._store(key, value)
+        return value
+
+    def _get_operation(self, node):
+        operation = self._operations.get(type(node))
+        if operation is None:
+            args = ["arg%d" % i for i in range(len(node.get_children()))]
+            namespace = {"np": np,
+                         "my_div": DivisionNode.protected_division,
+                         "my_log": LogarithmNode.protected_log}
+            operation = eval("lambda " + ", ".join(args) + ": " + node.op_source(args), namespace)
+            self._operations[type(node)] = operation
+        return operation
+
+    def _store(self, key, value):
+        size = SubtreeCache._size_of(key, value)
+        if size > self._max_size:
+            return
+
+        self._values[key] = value
+        self._size += size
+        while self._size > self._max_size:
+            old_key, old_value = self._values.popitem(last=False)
+            self._size -= SubtreeCache._size_of(old_key, old_value)
+            self._evictions += 1
+
+    @staticmethod
+    def _size_of(key, value):
+        return len(key[0]) + len(key[1]) + np.asarray(value).nbytes
+
+    def clear(self):
+        self._values.clear()
+        self._size = 0
+
+    def statistics(self):
+        return {"hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(self._values),
+                "size": self._size}
+
+    def log_statistics(self):
+        requests = self._hits + self._misses
+        hit_ratio = 100. * self._hits / requests if requests else 0.
+        lg.logger_.info("[SUBTREE_CACHE] Hits: {0} - Misses: {1} ({2:.1f}% hits) - "
+                        "Evictions: {3} - Entries: {4} - Size: {5:.1f} MB"
+                        .format(self._hits, self._misses, hit_ratio, self._evictions,
+                                len(self._values), self._size / (1024. * 1024.)))
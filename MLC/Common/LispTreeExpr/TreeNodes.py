@@ -19,7 +19,14 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
+import copy
+
+
 class TreeNode(object):
+    # Nodes are created for every individual kept in memory, avoid the __dict__ of every
+    # instance. Subclasses must declare __slots__ too
+    __slots__ = ('_node_id', '_depth', '_subtreedepth', '_expr_index')
+
     def __init__(self, node_id):
         self._node_id = node_id
         self._depth = -1
@@ -29,6 +36,9 @@ class TreeNode(object):
     def get_node_id(self):
         return self._node_id
 
+    def set_node_id(self, node_id):
+        self._node_id = node_id
+
     def get_depth(self):
         return self._depth
 
@@ -47,6 +57,15 @@ class TreeNode(object):
     def set_expr_index(self, expr_index):
         self._expr_index = expr_index
 
+    def clone(self, replacements=None):
+        """
+        Return a copy of the subtree. If a node of the subtree is a key of the replacements
+        dictionary, a copy of its value is used instead
+        """
+        if replacements and self in replacements:
+            return replacements[self].clone()
+        return copy.copy(self)
+
     def to_string(self):
         raise NotImplementedError('TreeNode', 'to_string is an abstract method')
 
@@ -78,6 +97,7 @@ class TreeNode(object):
         raise NotImplementedError('TreeNode', 'accept is an abstract method')
 
 class LeafNode(TreeNode):
+    __slots__ = ('_arg', '_value')
 
     def __init__(self, node_id, arg):
         TreeNode.__init__(self, node_id)
@@ -125,6 +145,7 @@ class LeafNode(TreeNode):
         visitor.visit_leaf_node(self)
 
 class InternalNode(TreeNode):
+    __slots__ = ('_op', '_complexity', '_nodes')
 
     def __init__(self, node_id, op, complexity):
         TreeNode.__init__(self, node_id)
@@ -147,6 +168,20 @@ class InternalNode(TreeNode):
     def add_child(self, node):
         self._nodes.append(node)
 
+    def get_op(self):
+        return self._op
+
+    def get_children(self):
+        return self._nodes
+
+    def clone(self, replacements=None):
+        if replacements and self in replacements:
+            return replacements[self].clone()
+
+        node = copy.copy(self)
+        node._nodes = [child_node.clone(replacements) for child_node in self._nodes]
+        return node
+
     def to_string(self):
         string = '(' + self._op + ' '
 
@@ -199,6 +234,13 @@ class InternalNode(TreeNode):
     def op_compute(self):
         raise NotImplementedError('InternalNode', "op_compute shouldn't be called")
 
+    def op_source(self, args):
+        """
+        Returns the python source code of the operation, given the source code of its arguments.
+        Used by the expression compiler to translate the tree into a NumPy function
+        """
+        raise NotImplementedError('InternalNode', "op_source shouldn't be called")
+
     def compute(self):
         arg_list = []
         for node in self._nodes:
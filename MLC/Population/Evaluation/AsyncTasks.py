@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+
+import Queue
+
+
+def _run_task(function, ticket, argument):
+    try:
+        return ticket, function(argument), None
+    except Exception, err:
+        return ticket, None, err
+
+
+class AsyncTasks(object):
+    """
+    Evaluations submitted one by one to a process or thread pool, collected as soon as any
+    of them finishes. Used by the evaluators to implement submit and next_result
+    """
+
+    def __init__(self):
+        self._results = Queue.Queue()
+        # ticket -> index of the individual
+        self._indexes = {}
+        self._next_ticket = 1
+
+    def submit(self, pool, function, argument, index):
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        self._indexes[ticket] = index
+        pool.apply_async(_run_task, (function, ticket, argument), callback=self._results.put)
+        return ticket
+
+    def pending(self):
+        return len(self._indexes)
+
+    def next_result(self):
+        """
+        Wait for the next evaluation to finish and return (ticket, index of the individual,
+        cost). The exception raised by the cost function, if any, is raised again here
+        """
+        if not self._indexes:
+            raise ValueError("There are no evaluations in progress")
+
+        while True:
+            try:
+                # Wait with a timeout, so the process can be interrupted
+                ticket, cost, error = self._results.get(timeout=1)
+                break
+            except Queue.Empty:
+                pass
+
+        index = self._indexes.pop(ticket)
+        if error is not None:
+            raise error
+        return ticket, index, cost
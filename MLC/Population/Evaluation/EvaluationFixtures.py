@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+
+import multiprocessing.sharedctypes
+import numpy as np
+import MLC.Log.log as lg
+
+# Fixtures of the evaluation module in use: {name: value}. Numpy arrays are read only
+# views of shared memory
+_fixtures = {}
+# Shared memory of the arrays, given to the worker processes when they are created:
+# {name: (raw array, dtype, shape)}
+_shared_arrays = {}
+
+
+def fixtures():
+    """
+    Return the fixtures prepared by the setup(config) function of the evaluation module, as
+    a dictionary. Cost functions use them no matter the evaluation method, the numpy arrays
+    are read only views of memory shared by all the evaluation processes
+    """
+    return _fixtures
+
+
+def prepare_fixtures(callback, config):
+    """
+    Call the setup(config) function of the evaluation module, if it has one, and keep the
+    dictionary it returns as the fixtures of the evaluations. Its numpy arrays are copied
+    once to shared memory
+    """
+    global _fixtures, _shared_arrays
+
+    release_fixtures()
+    if not hasattr(callback, 'setup'):
+        return
+
+    values = callback.setup(config) or {}
+    if not isinstance(values, dict):
+        raise ValueError("setup of the evaluation module must return a dictionary, not {0}"
+                         .format(type(values).__name__))
+
+    shared_arrays = {}
+    prepared = {}
+    for name, value in values.iteritems():
+        if isinstance(value, np.ndarray) and value.dtype != object:
+            raw_array = multiprocessing.sharedctypes.RawArray('b', max(1, value.nbytes))
+            view = _array_view(raw_array, value.dtype.str, value.shape)
+            view.flags.writeable = True
+            view[...] = value
+            view.flags.writeable = False
+            shared_arrays[name] = (raw_array, value.dtype.str, value.shape)
+            prepared[name] = view
+        else:
+            prepared[name] = value
+
+    _fixtures = prepared
+    _shared_arrays = shared_arrays
+    lg.logger_.debug("[EVAL_FIXTURES] Fixtures prepared: {0} ({1} in shared memory)"
+                     .format(sorted(prepared.keys()), len(shared_arrays)))
+
+
+def fixtures_state():
+    """
+    State of the fixtures to be given to a worker process when it is created
+    """
+    return (dict((name, value) for name, value in _fixtures.iteritems() if name not in _shared_arrays),
+            _shared_arrays)
+
+
+def install_fixtures(state):
+    """
+    Use the fixtures of the process that created this one, see fixtures_state
+    """
+    global _fixtures, _shared_arrays
+
+    values, shared_arrays = state
+    installed = dict(values)
+    for name, (raw_array, dtype, shape) in shared_arrays.iteritems():
+        installed[name] = _array_view(raw_array, dtype, shape)
+
+    _fixtures = installed
+    _shared_arrays = dict(shared_arrays)
+
+
+def release_fixtures():
+    global _fixtures, _shared_arrays
+    _fixtures = {}
+    _shared_arrays = {}
+
+
+def _array_view(raw_array, dtype, shape):
+    dtype = np.dtype(dtype)
+    size = int(np.prod(shape)) if shape else 1
+    view = np.frombuffer(raw_array, dtype=dtype, count=size).reshape(shape)
+    view.flags.writeable = False
+    return view
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import multiprocessing
+import numpy as np
+import random
+import sys
+import MLC.Log.log as lg
+
+from MLC.Common.CallbackRegistry import CallbackRegistry
+from MLC.Population.Evaluation.AsyncTasks import AsyncTasks
+from MLC.Common.Operations import Operations
+from MLC.individual.Individual import Individual
+from MLC.Log.log import set_logger
+from MLC.Population.Evaluation.EvaluationFixtures import fixtures_state, install_fixtures
+from MLC.mlc_parameters.mlc_parameters import Config
+from MLC.db.mlc_repository import MLCRepository
+
+# Evaluation module of the worker process, imported once when the worker starts
+_worker_callback = None
+
+
+def _initialize_worker(config_dictionary, system_path, function_name, fixtures=None):
+    global _worker_callback
+
+    sys.path[:] = system_path
+    Config._instance = Config.from_dictionary(config_dictionary)
+    set_logger(Config.get_instance().get('LOGGING', 'logmode'))
+    Operations.get_instance(reload_operations=True)
+    if fixtures is not None:
+        install_fixtures(fixtures)
+
+    # Forked workers start with the random state of the parent, don't repeat the same noise
+    random.seed()
+    np.random.seed()
+
+    try:
+        _worker_callback = CallbackRegistry.get_instance().get_module("Evaluation", function_name)
+    except ImportError, err:
+        # An exception would make the pool create the worker again and again
+        lg.logger_.error("[MULTIPROCESS_EVAL] Evaluation function can't be imported: {0}".format(err))
+
+
+def _evaluate_individual(individual_data):
+    if _worker_callback is None:
+        raise ImportError("Evaluation function not available in the worker process")
+
+    value, formal, complexity = individual_data
+    return _worker_callback.cost(Individual(value, formal, complexity))
+
+
+class MultiprocessEvaluator(object):
+    """
+    Evaluates the individuals in a pool of worker processes. Every worker imports the
+    evaluation module once and receives the individuals in chunks. The costs are returned
+    in the order of the individuals, ON_EVALUATE is emitted as they arrive. Individuals
+    can also be submitted one by one, and collected as soon as any of them is evaluated.
+
+    The amount of workers is given by the parameter workers of the EVALUATOR section (the
+    amount of CPUs by default), and the amount of individuals sent at once to a worker by
+    the parameter chunksize (computed from the amount of individuals by default).
+    """
+
+    def __init__(self, callback, callback_manager):
+        self._config = Config.get_instance()
+        self._callback = callback
+        self._callback_manager = callback_manager
+        self._pool = None
+        self._tasks = AsyncTasks()
+
+        self._workers = multiprocessing.cpu_count()
+        if self._config.has_option('EVALUATOR', 'workers') and self._config.getint('EVALUATOR', 'workers') > 0:
+            self._workers = self._config.getint('EVALUATOR', 'workers')
+
+        self._chunksize = None
+        if self._config.has_option('EVALUATOR', 'chunksize') and self._config.getint('EVALUATOR', 'chunksize') > 0:
+            self._chunksize = self._config.getint('EVALUATOR', 'chunksize')
+
+    def evaluate(self, indivs):
+        jj = []
+
+        lg.logger_.info("Evaluating %s individuals in %s processes" % (len(indivs), self._workers))
+
+        individuals_data = []
+        for index in indivs:
+            py_indiv = MLCRepository.get_instance().get_individual(index)
+            individuals_data.append((py_indiv.get_value(), py_indiv.get_formal(), py_indiv.get_complexity()))
+
+        chunksize = self._chunksize
+        if chunksize is None:
+            chunksize = max(1, len(indivs) // (4 * self._workers))
+
+        try:
+            costs = self._get_pool().imap(_evaluate_individual, individuals_data, chunksize)
+            for index, cost in zip(indivs, costs):
+                lg.logger_.debug('[POP][MULTIPROCESS_EVAL] Individual N#' + str(index) + ' Cost: ' + str(cost))
+                jj.append(cost)
+
+                from MLC.Application import MLC_CALLBACKS
+                self._callback_manager.on_event(MLC_CALLBACKS.ON_EVALUATE, index, cost)
+
+        except (KeyError, ImportError):
+            lg.logger_.error("[POP][MULTIPROCESS_EVAL] Evaluation Function " +
+                             "doesn't exists. Aborting progam.")
+            self.close()
+            sys.exit(-1)
+
+        return jj
+
+    def slots(self):
+        return self._workers
+
+    def submit(self, index):
+        """
+        Start the evaluation of an individual in the first free worker, see next_result
+        """
+        py_indiv = MLCRepository.get_instance().get_individual(index)
+        individual_data = (py_indiv.get_value(), py_indiv.get_formal(), py_indiv.get_complexity())
+        return self._tasks.submit(self._get_pool(), _evaluate_individual, individual_data, index)
+
+    def next_result(self):
+        """
+        Wait for any of the submitted evaluations to finish and return (ticket, cost)
+        """
+        ticket, index, cost = self._tasks.next_result()
+        lg.logger_.debug('[POP][MULTIPROCESS_EVAL] Individual N#' + str(index) + ' Cost: ' + str(cost))
+
+        from MLC.Application import MLC_CALLBACKS
+        self._callback_manager.on_event(MLC_CALLBACKS.ON_EVALUATE, index, cost)
+        return ticket, cost
+
+    def _get_pool(self):
+        if self._pool is None:
+            # Workers are created with the configuration and the path of the experiment in use
+            function_name = self._config.get('EVALUATOR', 'evaluation_function')
+            self._pool = multiprocessing.Pool(self._workers,
+                                              initializer=_initialize_worker,
+                                              initargs=(Config.to_dictionary(self._config),
+                                                        list(sys.path),
+                                                        function_name,
+                                                        fixtures_state()))
+        return self._pool
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+
+import SocketServer
+import collections
+import hashlib
+import hmac
+import json
+import os
+import socket
+import threading
+import time
+import MLC.Log.log as lg
+
+from MLC.mlc_parameters.mlc_parameters import Config
+from MLC.db.mlc_repository import MLCRepository
+
+# Protocol version sent in the challenge message, workers refuse other versions
+PROTOCOL_VERSION = 2
+
+
+def send_message(connection, message):
+    """
+    Messages of the work queue protocol are JSON objects, one per line
+    """
+    connection.sendall(json.dumps(message) + "\n")
+
+
+def receive_message(connection_file):
+    """
+    Return the next message read from the file of a connection, None if it was closed
+    """
+    line = connection_file.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+def new_nonce():
+    return os.urandom(16).encode('hex')
+
+
+def authentication_code(token, *parts):
+    """
+    HMAC of the parts of a message with the token shared by the coordinator and the
+    workers. The token itself is never sent
+    """
+    return hmac.new(str(token), "\n".join(str(part) for part in parts), hashlib.sha256).hexdigest()
+
+
+def is_authentic(code, expected_code):
+    return isinstance(code, basestring) and hmac.compare_digest(str(code), expected_code)
+
+
+def welcome_code(token, worker_nonce, coordinator_nonce, welcome):
+    """
+    Code authenticating the welcome message of a connection, which carries the evaluation
+    module the worker imports
+    """
+    return authentication_code(token, "welcome", worker_nonce, coordinator_nonce,
+                               json.dumps(welcome, sort_keys=True))
+
+
+class _CoordinatorHandler(SocketServer.StreamRequestHandler):
+    def handle(self):
+        coordinator = self.server.coordinator
+        worker_id = None
+
+        try:
+            hello = receive_message(self.rfile)
+            if hello is None or hello.get("type") != "hello":
+                return
+
+            # Both ends prove that they know the token before the experiment is sent
+            coordinator_nonce = new_nonce()
+            send_message(self.connection, coordinator._challenge(hello, coordinator_nonce))
+            answer = receive_message(self.rfile)
+
+            worker_id = coordinator._register(self.client_address, self.connection, hello,
+                                              coordinator_nonce, answer)
+            if worker_id is None:
+                send_message(self.connection, {"type": "error", "message": "Authentication failed"})
+                return
+
+            send_message(self.connection, coordinator._signed_welcome(hello, coordinator_nonce))
+
+            while True:
+                message = receive_message(self.rfile)
+                if message is None:
+                    break
+
+                reply = coordinator._handle_message(worker_id, message)
+                if reply is not None:
+                    send_message(self.connection, reply)
+
+        except (socket.error, ValueError), err:
+            lg.logger_.warn("[REMOTE_EVAL] Connection with worker {0} lost: {1}".format(worker_id, err))
+        finally:
+            if worker_id is not None:
+                coordinator._unregister(worker_id)
+
+
+class _CoordinatorServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class WorkQueueCoordinator(object):
+    """
+    TCP server that hands out the individuals to evaluate to the remote workers (see
+    RemoteWorker) and collects their costs. Workers pull tasks in batches and send a
+    heartbeat every heartbeat seconds. The tasks of a worker are queued again when its
+    connection is closed or when nothing was heard from it for three heartbeats.
+
+    The coordinator and every worker prove that they know the token with a challenge-response
+    of HMACs of random nonces, and the welcome message is authenticated the same way, so the
+    workers only import evaluation modules sent by a coordinator of the experiment. The
+    messages are not encrypted.
+    """
+
+    def __init__(self, host, port, heartbeat, token, welcome):
+        if not token:
+            raise ValueError("A token is required to accept remote workers")
+
+        self._heartbeat = heartbeat
+        self._token = token
+        self._welcome = dict(welcome, type="welcome", version=PROTOCOL_VERSION, heartbeat=heartbeat)
+
+        self._condition = threading.Condition()
+        self._pending = collections.deque()
+        # task_id -> individual data sent to the workers
+        self._tasks = {}
+        # task_id -> worker_id
+        self._in_flight = {}
+        # task_id -> (cost, error message)
+        self._results = {}
+        # worker_id -> (connection, time of the last message)
+        self._workers = {}
+        self._next_task_id = 1
+        self._next_worker_id = 1
+
+        self._server = _CoordinatorServer((host, port), _CoordinatorHandler)
+        self._server.coordinator = self
+        self._server_thread = threading.Thread(target=self._server.serve_forever)
+        self._server_thread.daemon = True
+        self._server_thread.start()
+        lg.logger_.info("[REMOTE_EVAL] Coordinator listening on {0}:{1}".format(*self.address))
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def count_workers(self):
+        with self._condition:
+            return len(self._workers)
+
+    def submit(self, individuals_data):
+        """
+        Queue the individuals data to be evaluated and return the ids of their tasks
+        """
+        with self._condition:
+            task_ids = []
+            for individual_data in individuals_data:
+                task_id = self._next_task_id
+                self._next_task_id += 1
+                self._tasks[task_id] = individual_data
+                self._pending.append(task_id)
+                task_ids.append(task_id)
+
+            self._condition.notify_all()
+            return task_ids
+
+    def results(self, task_ids):
+        """
+        Generator of (task_id, cost, error message) for every task, in the order they are
+        completed. The tasks of the lost workers are queued again while waiting
+        """
+        waiting = set(task_ids)
+        while waiting:
+            result = self.next_completed(waiting)
+            waiting.remove(result[0])
+            yield result
+
+    def next_completed(self, task_ids):
+        """
+        Wait for any of the tasks to be completed and return (task_id, cost, error message)
+        """
+        last_report = time.time()
+
+        with self._condition:
+            while True:
+                self._requeue_lost_workers()
+                completed = [task_id for task_id in task_ids if task_id in self._results]
+                if completed:
+                    task_id = min(completed)
+                    cost, error = self._results.pop(task_id)
+                    del self._tasks[task_id]
+                    return task_id, cost, error
+
+                self._condition.wait(self._heartbeat)
+                if time.time() - last_report > 6 * self._heartbeat:
+                    lg.logger_.info("[REMOTE_EVAL] Waiting for {0} individuals. Workers connected: {1}"
+                                    .format(len(task_ids), len(self._workers)))
+                    last_report = time.time()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+        with self._condition:
+            # Close the connections, the workers see the end of the evaluation
+            for connection, _ in self._workers.values():
+                try:
+                    connection.shutdown(socket.SHUT_RDWR)
+                except socket.error:
+                    pass
+
+            # Wait for the handlers of the connections to finish
+            deadline = time.time() + 5
+            while self._workers and time.time() < deadline:
+                self._condition.wait(0.1)
+
+    def _challenge(self, hello, coordinator_nonce):
+        return {"type": "challenge",
+                "version": PROTOCOL_VERSION,
+                "nonce": coordinator_nonce,
+                "proof": authentication_code(self._token, "coordinator", hello.get("nonce"), coordinator_nonce)}
+
+    def _signed_welcome(self, hello, coordinator_nonce):
+        return dict(self._welcome, mac=welcome_code(self._token, hello.get("nonce"), coordinator_nonce,
+                                                    self._welcome))
+
+    def _register(self, client_address, connection, hello, coordinator_nonce, answer):
+        if answer is None or answer.get("type") != "answer" or \
+                not is_authentic(answer.get("proof"),
+                                 authentication_code(self._token, "worker", coordinator_nonce, hello.get("nonce"))):
+            lg.logger_.warn("[REMOTE_EVAL] Worker from {0} rejected: invalid token".format(client_address[0]))
+            return None
+
+        with self._condition:
+            worker_id = "{0}:{1}#{2}".format(client_address[0], hello.get("name", client_address[1]),
+                                             self._next_worker_id)
+            self._next_worker_id += 1
+            self._workers[worker_id] = (connection, time.time())
+
+        lg.logger_.info("[REMOTE_EVAL] Worker {0} connected".format(worker_id))
+        return worker_id
+
+    def _unregister(self, worker_id):
+        with self._condition:
+            self._workers.pop(worker_id, None)
+            self._requeue(worker_id)
+            self._condition.notify_all()
+
+        lg.logger_.info("[REMOTE_EVAL] Worker {0} disconnected".format(worker_id))
+
+    def _handle_message(self, worker_id, message):
+        message_type = message.get("type")
+
+        with self._condition:
+            if worker_id in self._workers:
+                self._workers[worker_id] = (self._workers[worker_id][0], time.time())
+
+            if message_type == "heartbeat":
+                return None
+
+            if message_type == "results":
+                for task_id, cost, error in message["results"]:
+                    # The first result of a task wins, the task may have been queued again
+                    if task_id in self._tasks and task_id not in self._results:
+                        self._results[task_id] = (cost, error)
+                        if self._in_flight.pop(task_id, None) is None and task_id in self._pending:
+                            self._pending.remove(task_id)
+                self._condition.notify_all()
+                return {"type": "ok"}
+
+            if message_type == "get":
+                if not self._pending:
+                    # Long poll: reply as soon as there are tasks or after a heartbeat
+                    self._condition.wait(self._heartbeat)
+
+                tasks = []
+                while self._pending and len(tasks) < max(1, int(message.get("batch", 1))):
+                    task_id = self._pending.popleft()
+                    self._in_flight[task_id] = worker_id
+                    tasks.append([task_id] + list(self._tasks[task_id]))
+
+                if worker_id in self._workers:
+                    self._workers[worker_id] = (self._workers[worker_id][0], time.time())
+                return {"type": "tasks", "tasks": tasks}
+
+        return {"type": "error", "message": "Unknown message type: {0}".format(message_type)}
+
+    def _requeue_lost_workers(self):
+        deadline = time.time() - 3 * self._heartbeat
+        for worker_id, (connection, last_seen) in self._workers.items():
+            if last_seen < deadline and worker_id in self._in_flight.values():
+                lg.logger_.warn("[REMOTE_EVAL] Worker {0} lost, nothing heard from it for {1:.1f} seconds"
+                                .format(worker_id, time.time() - last_seen))
+                self._requeue(worker_id)
+
+    def _requeue(self, worker_id):
+        tasks = sorted(task_id for task_id, owner in self._in_flight.items() if owner == worker_id)
+        for task_id in reversed(tasks):
+            del self._in_flight[task_id]
+            self._pending.appendleft(task_id)
+
+        if tasks:
+            lg.logger_.info("[REMOTE_EVAL] {0} tasks of worker {1} queued again".format(len(tasks), worker_id))
+            self._condition.notify_all()
+
+
+class RemoteEvaluator(object):
+    """
+    Evaluates the individuals in remote workers, started in any machine with:
+
+        tools/mlc_worker.sh --host <coordinator host> --port <remote_port> --token <remote_token>
+
+    The coordinator is started with the evaluator and listens in remote_host:remote_port
+    (EVALUATOR section). Workers receive the configuration and the evaluation module of
+    the experiment when they connect, unless they are started with --experiment-dir. The
+    remote_token is required, only the workers started with the same --token are accepted.
+    An individual whose cost function raised an exception gets the badvalue.
+    """
+
+    def __init__(self, callback, callback_manager):
+        self._config = Config.get_instance()
+        self._callback = callback
+        self._callback_manager = callback_manager
+        # task_id -> index of the individuals submitted one by one
+        self._submitted = {}
+
+        host = self._get_option('remote_host', '127.0.0.1')
+        port = int(self._get_option('remote_port', '0'))
+        heartbeat = float(self._get_option('remote_heartbeat', '5'))
+        token = self._get_option('remote_token', '')
+        if not token:
+            raise ValueError("Parameter remote_token of section EVALUATOR must be set to use "
+                             "the remote evaluation_method")
+
+        welcome = {"configuration": Config.to_dictionary(self._config),
+                   "evaluation_function": self._config.get('EVALUATOR', 'evaluation_function'),
+                   "module_source": self._module_source()}
+        self._coordinator = WorkQueueCoordinator(host, port, heartbeat, token, welcome)
+
+    def _get_option(self, option, default):
+        if self._config.has_option('EVALUATOR', option) and self._config.get('EVALUATOR', option).strip():
+            return self._config.get('EVALUATOR', option).strip()
+        return default
+
+    def _module_source(self):
+        module_file = getattr(self._callback, '__file__', None)
+        if module_file is None:
+            return None
+
+        if module_file.endswith('.pyc'):
+            module_file = module_file[:-1]
+        with open(module_file) as source:
+            return source.read()
+
+    @property
+    def address(self):
+        return self._coordinator.address
+
+    def evaluate(self, indivs):
+        lg.logger_.info("Evaluating %s individuals in remote workers" % len(indivs))
+
+        individuals_data = []
+        for index in indivs:
+            py_indiv = MLCRepository.get_instance().get_individual(index)
+            individuals_data.append((py_indiv.get_value(), py_indiv.get_formal(), py_indiv.get_complexity()))
+
+        task_ids = self._coordinator.submit(individuals_data)
+        indexes = dict(zip(task_ids, indivs))
+        costs = {}
+
+        for task_id, cost, error in self._coordinator.results(task_ids):
+            costs[task_id] = self._individual_cost(indexes[task_id], cost, error)
+
+        return [costs[task_id] for task_id in task_ids]
+
+    def slots(self):
+        return max(1, self._coordinator.count_workers())
+
+    def submit(self, index):
+        """
+        Queue the evaluation of an individual for the remote workers, see next_result
+        """
+        py_indiv = MLCRepository.get_instance().get_individual(index)
+        task_id = self._coordinator.submit([(py_indiv.get_value(), py_indiv.get_formal(),
+                                             py_indiv.get_complexity())])[0]
+        self._submitted[task_id] = index
+        return task_id
+
+    def next_result(self):
+        """
+        Wait for any of the submitted evaluations to finish and return (ticket, cost)
+        """
+        task_id, cost, error = self._coordinator.next_completed(self._submitted.keys())
+        index = self._submitted.pop(task_id)
+        return task_id, self._individual_cost(index, cost, error)
+
+    def _individual_cost(self, index, cost, error):
+        if error is not None:
+            lg.logger_.error("[POP][REMOTE_EVAL] Individual N#{0} could not be evaluated: {1}"
+                             .format(index, error))
+            cost = self._config.parameters().badvalue
+
+        lg.logger_.debug('[POP][REMOTE_EVAL] Individual N#' + str(index) + ' Cost: ' + str(cost))
+
+        from MLC.Application import MLC_CALLBACKS
+        self._callback_manager.on_event(MLC_CALLBACKS.ON_EVALUATE, index, cost)
+        return cost
+
+    def close(self):
+        self._coordinator.close()
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+
+import argparse
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import MLC.Log.log as lg
+
+from MLC.Common.CallbackRegistry import CallbackRegistry
+from MLC.Common.Operations import Operations
+from MLC.individual.Individual import Individual
+from MLC.Log.log import set_logger
+from MLC.mlc_parameters.mlc_parameters import Config
+from MLC.Population.Evaluation.EvaluationFixtures import prepare_fixtures
+from MLC.Population.Evaluation.RemoteEvaluator import PROTOCOL_VERSION, receive_message, send_message
+from MLC.Population.Evaluation.RemoteEvaluator import authentication_code, is_authentic, new_nonce, welcome_code
+
+
+class RemoteWorkerError(Exception):
+    pass
+
+
+class RemoteWorker(object):
+    """
+    Worker of the RemoteEvaluator. Connects to the coordinator, pulls the individuals in
+    batches, evaluates them with the cost function of the experiment and sends the costs
+    back, while a thread sends the heartbeats. The evaluation module is the one sent by the
+    coordinator, or the one of experiment_dir when it is given. The token of the experiment
+    is required, the worker refuses coordinators that cannot prove that they know it.
+    """
+
+    def __init__(self, host, port, batch=1, token=None, name=None, experiment_dir=None):
+        self._address = (host, port)
+        self._batch = batch
+        self._token = token
+        self._name = name or socket.gethostname()
+        self._experiment_dir = experiment_dir
+        self._module_dir = None
+        self._callback = None
+
+        self._socket = None
+        self._send_lock = threading.Lock()
+        self._connected = threading.Event()
+
+    def run(self):
+        """
+        Evaluate individuals until the coordinator closes the connection. Return the amount
+        of individuals evaluated
+        """
+        if not self._token:
+            raise RemoteWorkerError("The token of the experiment is required")
+
+        self._socket = socket.create_connection(self._address)
+        connection_file = self._socket.makefile('rb')
+        evaluated = 0
+
+        try:
+            welcome = self._authenticate(connection_file)
+            self._load_experiment(welcome)
+            self._connected.set()
+            heartbeat_thread = threading.Thread(target=self._send_heartbeats, args=(welcome["heartbeat"],))
+            heartbeat_thread.daemon = True
+            heartbeat_thread.start()
+
+            while True:
+                self._send({"type": "get", "batch": self._batch})
+                reply = receive_message(connection_file)
+                if reply is None:
+                    break
+
+                tasks = reply.get("tasks", [])
+                if not tasks:
+                    continue
+
+                self._send({"type": "results", "results": self._evaluate(tasks)})
+                if receive_message(connection_file) is None:
+                    break
+                evaluated += len(tasks)
+
+        except socket.error, err:
+            lg.logger_.info("[REMOTE_WORKER] Connection with the coordinator closed: {0}".format(err))
+        finally:
+            self._connected.clear()
+            connection_file.close()
+            self._socket.close()
+            self._unload_experiment()
+
+        return evaluated
+
+    def _authenticate(self, connection_file):
+        """
+        Challenge-response with the coordinator, both prove that they know the token without
+        sending it. Return the welcome message once its authentication code is verified
+        """
+        nonce = new_nonce()
+        self._send({"type": "hello", "name": self._name, "nonce": nonce})
+
+        challenge = self._receive(connection_file, "challenge")
+        if challenge.get("version") != PROTOCOL_VERSION:
+            raise RemoteWorkerError("Protocol version {0} is not supported".format(challenge.get("version")))
+        coordinator_nonce = challenge.get("nonce")
+        if not is_authentic(challenge.get("proof"),
+                            authentication_code(self._token, "coordinator", nonce, coordinator_nonce)):
+            raise RemoteWorkerError("The coordinator does not know the token")
+
+        self._send({"type": "answer",
+                    "proof": authentication_code(self._token, "worker", coordinator_nonce, nonce)})
+
+        welcome = self._receive(connection_file, "welcome")
+        code = welcome.pop("mac", None)
+        if not is_authentic(code, welcome_code(self._token, nonce, coordinator_nonce, welcome)):
+            raise RemoteWorkerError("The welcome message of the coordinator is not authentic")
+        return welcome
+
+    def _receive(self, connection_file, message_type):
+        message = receive_message(connection_file)
+        if message is None:
+            raise RemoteWorkerError("Connection closed by the coordinator")
+        if message.get("type") != message_type:
+            raise RemoteWorkerError("Rejected by the coordinator: {0}".format(message.get("message")))
+        return message
+
+    def _evaluate(self, tasks):
+        individuals = []
+        for task_id, value, formal, complexity in tasks:
+            if isinstance(formal, list):
+                formal = [str(control) for control in formal]
+            else:
+                formal = str(formal)
+            individuals.append(Individual(str(value), formal, complexity))
+
+        if hasattr(self._callback, 'cost_batch'):
+            try:
+                costs = list(self._callback.cost_batch(individuals))
+                if len(costs) != len(individuals):
+                    raise ValueError("cost_batch returned {0} costs for {1} individuals"
+                                     .format(len(costs), len(individuals)))
+                return [[task[0], float(cost), None] for task, cost in zip(tasks, costs)]
+            except Exception:
+                error = self._log_error()
+                return [[task[0], None, error] for task in tasks]
+
+        results = []
+        for task, individual in zip(tasks, individuals):
+            try:
+                results.append([task[0], float(self._callback.cost(individual)), None])
+            except Exception:
+                results.append([task[0], None, self._log_error()])
+
+        return results
+
+    def _log_error(self):
+        error = traceback.format_exc()
+        lg.logger_.error("[REMOTE_WORKER] Evaluation failed: {0}".format(error))
+        return error
+
+    def _send(self, message):
+        with self._send_lock:
+            send_message(self._socket, message)
+
+    def _send_heartbeats(self, heartbeat):
+        while self._connected.is_set():
+            time.sleep(heartbeat)
+            try:
+                self._send({"type": "heartbeat"})
+            except socket.error:
+                break
+
+    def _load_experiment(self, welcome):
+        Config._instance = Config.from_dictionary(welcome["configuration"])
+        set_logger(Config.get_instance().get('LOGGING', 'logmode'))
+        Operations.get_instance(reload_operations=True)
+
+        if self._experiment_dir is not None:
+            module_dir = self._experiment_dir
+        elif welcome.get("module_source") is not None:
+            # Keep the evaluation module sent by the coordinator in a temporary experiment
+            self._module_dir = tempfile.mkdtemp(prefix="mlc_worker_")
+            module_dir = self._module_dir
+            os.mkdir(os.path.join(module_dir, "Evaluation"))
+            open(os.path.join(module_dir, "Evaluation", "__init__.py"), "w").close()
+            module_path = os.path.join(module_dir, "Evaluation", welcome["evaluation_function"] + ".py")
+            with open(module_path, "w") as module_file:
+                module_file.write(welcome["module_source"].encode("utf-8"))
+        else:
+            raise RemoteWorkerError("The coordinator didn't send the evaluation module, use --experiment-dir")
+
+        sys.path.insert(0, module_dir)
+        self._callback = CallbackRegistry.get_instance().get_module("Evaluation", welcome["evaluation_function"])
+        prepare_fixtures(self._callback, Config.get_instance())
+
+    def _unload_experiment(self):
+        for module_dir in (self._experiment_dir, self._module_dir):
+            if module_dir is not None and module_dir in sys.path:
+                sys.path.remove(module_dir)
+
+        if self._module_dir is not None:
+            shutil.rmtree(self._module_dir, ignore_errors=True)
+            self._module_dir = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MLC remote evaluation worker")
+    parser.add_argument("--host", default="127.0.0.1", help="host of the coordinator")
+    parser.add_argument("--port", type=int, required=True, help="remote_port of the experiment")
+    parser.add_argument("--batch", type=int, default=1, help="individuals requested at once")
+    parser.add_argument("--token", required=True, help="remote_token of the experiment")
+    parser.add_argument("--name", default=None, help="name of the worker, the host name by default")
+    parser.add_argument("--experiment-dir", default=None,
+                        help="directory with the Evaluation package of the experiment")
+    parser.add_argument("--reconnect", action="store_true",
+                        help="wait for the next coordinator when the connection is closed")
+    args = parser.parse_args(argv)
+
+    set_logger("console")
+
+    while True:
+        worker = RemoteWorker(args.host, args.port, args.batch, args.token, args.name, args.experiment_dir)
+        try:
+            evaluated = worker.run()
+            lg.logger_.info("[REMOTE_WORKER] {0} individuals evaluated".format(evaluated))
+        except socket.error, err:
+            if not args.reconnect:
+                lg.logger_.error("[REMOTE_WORKER] Cannot connect to {0}:{1}: {2}".format(args.host, args.port, err))
+                return -1
+        except RemoteWorkerError, err:
+            lg.logger_.error("[REMOTE_WORKER] {0}".format(err))
+            return -1
+
+        if not args.reconnect:
+            return 0
+        time.sleep(5)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
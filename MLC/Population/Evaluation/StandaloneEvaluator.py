@@ -19,35 +19,91 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
+import collections
 import sys
 import MLC.Log.log as lg
 
+from MLC.Common.LispTreeExpr.ExpressionBatch import ExpressionBatch
 from MLC.mlc_parameters.mlc_parameters import Config
 from MLC.db.mlc_repository import MLCRepository
+from MLC.Population.Evaluation.SupervisedWorker import EvaluationTimeout, SupervisedWorker
 
 
 class StandaloneEvaluator(object):
+    class TimeoutAction:
+        BADVALUE = "badvalue"
+        RETRY = "retry"
+        ALL = [BADVALUE, RETRY]
 
     def __init__(self, callback, callback_manager):
         self._config = Config.get_instance()
         self._callback = callback
         self._callback_manager = callback_manager
+        self._submitted = collections.deque()
+        self._next_ticket = 1
 
-    def evaluate(self, indivs):
-        jj = []
+        # Individuals sent at once to cost_batch, all of them by default
+        self._chunksize = None
+        if self._config.has_option('EVALUATOR', 'chunksize') and self._config.getint('EVALUATOR', 'chunksize') > 0:
+            self._chunksize = self._config.getint('EVALUATOR', 'chunksize')
+
+        # Expressions of the individuals evaluated together are computed in a batch, disabled by default
+        self._expression_batch_size = None
+        if self._config.has_option('OPTIMIZATION', 'expression_batch') and \
+                self._config.getboolean('OPTIMIZATION', 'expression_batch'):
+            self._expression_batch_size = ExpressionBatch.DEFAULT_SIZE_MB
+            if self._config.has_option('OPTIMIZATION', 'expression_batch_size'):
+                self._expression_batch_size = self._config.getfloat('OPTIMIZATION', 'expression_batch_size')
+
+        # Seconds allowed to evaluate one individual, no limit by default. Evaluations
+        # with a timeout are done one by one in a supervised worker process
+        self._worker = None
+        self._timeout_action = StandaloneEvaluator.TimeoutAction.BADVALUE
+        self._timeout_retries = 1
+        if self._config.has_option('EVALUATOR', 'timeout') and self._config.getfloat('EVALUATOR', 'timeout') > 0:
+            self._worker = SupervisedWorker(self._config.getfloat('EVALUATOR', 'timeout'))
+
+            if self._config.has_option('EVALUATOR', 'timeout_action'):
+                self._timeout_action = self._config.get('EVALUATOR', 'timeout_action')
+            if self._timeout_action not in StandaloneEvaluator.TimeoutAction.ALL:
+                raise ValueError("Parameter timeout_action of section EVALUATOR is not valid: '%s'. "
+                                 "Valid actions: %s" % (self._timeout_action,
+                                                        ", ".join(StandaloneEvaluator.TimeoutAction.ALL)))
 
+            if self._config.has_option('EVALUATOR', 'timeout_retries'):
+                self._timeout_retries = self._config.getint('EVALUATOR', 'timeout_retries')
+
+    def evaluate(self, indivs):
         lg.logger_.info("Evaluating %s individuals" % len(indivs))
 
-        for index in indivs:
-            lg.logger_.debug('[POP][STAND_EVAL] Individual N#' + str(index))
+        individuals = [MLCRepository.get_instance().get_individual(index) for index in indivs]
+
+        # Expressions of the individuals are computed together while they are evaluated
+        expression_batch = None
+        if self._expression_batch_size is not None:
+            expression_batch = ExpressionBatch(individuals, self._expression_batch_size)
+            expression_batch.bind()
+
+        try:
+            if hasattr(self._callback, 'cost_batch') and self._worker is None:
+                return self._evaluate_batch(indivs, individuals)
+            return self._evaluate_one_by_one(indivs, individuals)
+        finally:
+            if expression_batch is not None:
+                expression_batch.release()
 
-            # Retrieve the individual to be evaluated
-            py_indiv = MLCRepository.get_instance().get_individual(index)
+    def _evaluate_one_by_one(self, indivs, individuals):
+        jj = []
+
+        for index, py_indiv in zip(indivs, individuals):
             lg.logger_.debug('[POP][STAND_EVAL] Individual N#' + str(index) +
                              ' Value: ' + py_indiv.get_value())
 
             try:
-                cost = self._callback.cost(py_indiv)
+                if self._worker is None:
+                    cost = self._callback.cost(py_indiv)
+                else:
+                    cost = self._supervised_cost(index, py_indiv)
                 jj.append(cost)
 
                 from MLC.Application import MLC_CALLBACKS
@@ -59,3 +115,74 @@ class StandaloneEvaluator(object):
                 sys.exit(-1)
 
         return jj
+
+    def _evaluate_batch(self, indivs, individuals):
+        """
+        Evaluate the individuals with the cost_batch function of the evaluation module, that
+        receives a list of individuals and returns the list of their costs
+        """
+        jj = []
+        chunksize = self._chunksize or max(1, len(individuals))
+
+        for begin in range(0, len(individuals), chunksize):
+            chunk = individuals[begin:begin + chunksize]
+            lg.logger_.debug('[POP][STAND_EVAL] Evaluating individuals N#{0} to N#{1} in batch'
+                             .format(indivs[begin], indivs[begin + len(chunk) - 1]))
+
+            try:
+                costs = list(self._callback.cost_batch(chunk))
+            except KeyError:
+                lg.logger_.error("[POP][STAND_EVAL] Evaluation Function " +
+                                 "doesn't exists. Aborting progam.")
+                sys.exit(-1)
+
+            if len(costs) != len(chunk):
+                raise ValueError("cost_batch returned {0} costs for {1} individuals"
+                                 .format(len(costs), len(chunk)))
+
+            from MLC.Application import MLC_CALLBACKS
+            for index, cost in zip(indivs[begin:begin + chunksize], costs):
+                jj.append(cost)
+                self._callback_manager.on_event(MLC_CALLBACKS.ON_EVALUATE, index, cost)
+
+        return jj
+
+    def slots(self):
+        return 1
+
+    def submit(self, index):
+        """
+        Queue the evaluation of an individual, it is evaluated by next_result
+        """
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        self._submitted.append((ticket, index))
+        return ticket
+
+    def next_result(self):
+        """
+        Evaluate the oldest submitted individual and return (ticket, cost)
+        """
+        ticket, index = self._submitted.popleft()
+        return ticket, self.evaluate([index])[0]
+
+    def _supervised_cost(self, index, py_indiv):
+        attempts = 1
+        if self._timeout_action == StandaloneEvaluator.TimeoutAction.RETRY:
+            attempts += self._timeout_retries
+
+        for attempt in range(1, attempts + 1):
+            try:
+                return self._worker.cost(py_indiv)
+            except EvaluationTimeout, err:
+                lg.logger_.warn("[POP][STAND_EVAL] Individual N#{0} - Attempt {1}/{2}: {3}"
+                                .format(index, attempt, attempts, err))
+                MLCRepository.get_instance().add_evaluation_event(index, err.event, attempt, err.duration)
+
+        lg.logger_.warn("[POP][STAND_EVAL] Individual N#{0} could not be evaluated. "
+                        "Using the bad value as its cost".format(index))
+        return self._config.parameters().badvalue
+
+    def close(self):
+        if self._worker is not None:
+            self._worker.stop()
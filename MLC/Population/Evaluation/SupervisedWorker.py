@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+
+import multiprocessing
+import sys
+import time
+import MLC.Log.log as lg
+
+from MLC.mlc_parameters.mlc_parameters import Config
+from MLC.Population.Evaluation.EvaluationFixtures import fixtures_state
+from MLC.Population.Evaluation.MultiprocessEvaluator import _initialize_worker, _evaluate_individual
+
+
+class EvaluationTimeout(Exception):
+    """
+    The evaluation of an individual didn't finish. The event is 'timeout' when the worker
+    was killed because the evaluation took too long, and 'crash' when the worker died
+    """
+    TIMEOUT = 'timeout'
+    CRASH = 'crash'
+
+    def __init__(self, event, duration):
+        Exception.__init__(self, "Evaluation {0} after {1:.2f} seconds".format(event, duration))
+        self.event = event
+        self.duration = duration
+
+
+def _worker_loop(connection, config_dictionary, system_path, function_name, fixtures):
+    _initialize_worker(config_dictionary, system_path, function_name, fixtures)
+    # The evaluation module is imported, the timeouts count from now on
+    connection.send(True)
+
+    while True:
+        individual_data = connection.recv()
+        if individual_data is None:
+            break
+
+        try:
+            connection.send((True, _evaluate_individual(individual_data)))
+        except Exception, err:
+            connection.send((False, err))
+
+
+class SupervisedWorker(object):
+    """
+    Process that evaluates one individual at a time, killed and started again when an
+    evaluation lasts more than timeout seconds. The worker imports the evaluation module
+    once, like the workers of the MultiprocessEvaluator. The time spent starting the worker
+    does not count in the timeout of the evaluation.
+    """
+
+    def __init__(self, timeout):
+        self._timeout = timeout
+        self._process = None
+        self._connection = None
+
+    def cost(self, individual):
+        """
+        Return the cost of the individual computed by the worker. Raise EvaluationTimeout
+        if the evaluation didn't finish in time or the worker died, and the exception
+        raised by the cost function otherwise
+        """
+        self._start()
+        self._connection.send((individual.get_value(), individual.get_formal(), individual.get_complexity()))
+        start_time = time.time()
+
+        if not self._connection.poll(self._timeout):
+            self.stop(kill=True)
+            raise EvaluationTimeout(EvaluationTimeout.TIMEOUT, time.time() - start_time)
+
+        try:
+            success, result = self._connection.recv()
+        except (EOFError, IOError):
+            self.stop(kill=True)
+            raise EvaluationTimeout(EvaluationTimeout.CRASH, time.time() - start_time)
+
+        if not success:
+            raise result
+        return result
+
+    def _start(self):
+        if self._process is not None and self._process.is_alive():
+            return
+
+        self.stop(kill=True)
+        config = Config.get_instance()
+        self._connection, worker_connection = multiprocessing.Pipe()
+        self._process = multiprocessing.Process(target=_worker_loop,
+                                                args=(worker_connection,
+                                                      Config.to_dictionary(config),
+                                                      list(sys.path),
+                                                      config.get('EVALUATOR', 'evaluation_function'),
+                                                      fixtures_state()))
+        self._process.daemon = True
+        start_time = time.time()
+        self._process.start()
+        worker_connection.close()
+
+        # Wait for the worker to be ready
+        try:
+            self._connection.recv()
+        except (EOFError, IOError):
+            self.stop(kill=True)
+            raise EvaluationTimeout(EvaluationTimeout.CRASH, time.time() - start_time)
+        lg.logger_.debug("[SUPERVISED_WORKER] Worker started. PID: {0}".format(self._process.pid))
+
+    def stop(self, kill=False):
+        if self._process is None:
+            return
+
+        if kill:
+            lg.logger_.debug("[SUPERVISED_WORKER] Killing worker. PID: {0}".format(self._process.pid))
+            self._process.terminate()
+        else:
+            try:
+                self._connection.send(None)
+            except IOError:
+                pass
+
+        self._process.join()
+        self._connection.close()
+        self._process = None
+        self._connection = None
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import multiprocessing
+import sys
+import threading
+import MLC.Log.log as lg
+
+from multiprocessing.pool import ThreadPool
+from MLC.Population.Evaluation.AsyncTasks import AsyncTasks
+from MLC.mlc_parameters.mlc_parameters import Config
+from MLC.db.mlc_repository import MLCRepository
+
+_thread_local = threading.local()
+
+
+class ThreadContext(object):
+    """
+    Resources of one evaluation thread, like a connection or an Arduino interface. Cost
+    functions store in it whatever they need to keep between evaluations
+    """
+    pass
+
+
+def thread_context():
+    """
+    Return the context of the current thread. Cost functions can use it no matter the
+    evaluation method, the context of a thread is created the first time it is requested
+    """
+    context = getattr(_thread_local, 'context', None)
+    if context is None:
+        context = ThreadContext()
+        _thread_local.context = context
+    return context
+
+
+class ThreadPoolEvaluator(object):
+    """
+    Evaluates the individuals in a pool of threads, for cost functions that spend most of
+    their time waiting for serial ports, sockets or external simulators. The costs are
+    returned in the order of the individuals, ON_EVALUATE is emitted as they arrive.
+
+    The amount of threads is given by the parameter workers of the EVALUATOR section (the
+    amount of CPUs by default). Every thread has its own ThreadContext (see thread_context).
+    If the evaluation module defines open_thread_context(context) it is called when a thread
+    starts, and close_thread_context(context) is called by every thread for its own context
+    when the evaluator is closed, so the resources are released by the thread that opened
+    them.
+    """
+
+    def __init__(self, callback, callback_manager):
+        self._config = Config.get_instance()
+        self._callback = callback
+        self._callback_manager = callback_manager
+        self._pool = None
+        self._tasks = AsyncTasks()
+        # Threads that still have to close their context
+        self._closing = 0
+        self._closing_condition = threading.Condition()
+
+        self._workers = multiprocessing.cpu_count()
+        if self._config.has_option('EVALUATOR', 'workers') and self._config.getint('EVALUATOR', 'workers') > 0:
+            self._workers = self._config.getint('EVALUATOR', 'workers')
+
+    def evaluate(self, indivs):
+        jj = []
+
+        lg.logger_.info("Evaluating %s individuals in %s threads" % (len(indivs), self._workers))
+
+        individuals = [MLCRepository.get_instance().get_individual(index) for index in indivs]
+        try:
+            costs = self._get_pool().imap(self._callback.cost, individuals)
+            for index, cost in zip(indivs, costs):
+                lg.logger_.debug('[POP][THREAD_POOL_EVAL] Individual N#' + str(index) + ' Cost: ' + str(cost))
+                jj.append(cost)
+
+                from MLC.Application import MLC_CALLBACKS
+                self._callback_manager.on_event(MLC_CALLBACKS.ON_EVALUATE, index, cost)
+
+        except KeyError:
+            lg.logger_.error("[POP][THREAD_POOL_EVAL] Evaluation Function " +
+                             "doesn't exists. Aborting progam.")
+            self.close()
+            sys.exit(-1)
+
+        return jj
+
+    def slots(self):
+        return self._workers
+
+    def submit(self, index):
+        """
+        Start the evaluation of an individual in the first free thread, see next_result
+        """
+        py_indiv = MLCRepository.get_instance().get_individual(index)
+        return self._tasks.submit(self._get_pool(), self._callback.cost, py_indiv, index)
+
+    def next_result(self):
+        """
+        Wait for any of the submitted evaluations to finish and return (ticket, cost)
+        """
+        ticket, index, cost = self._tasks.next_result()
+        lg.logger_.debug('[POP][THREAD_POOL_EVAL] Individual N#' + str(index) + ' Cost: ' + str(cost))
+
+        from MLC.Application import MLC_CALLBACKS
+        self._callback_manager.on_event(MLC_CALLBACKS.ON_EVALUATE, index, cost)
+        return ticket, cost
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ThreadPool(self._workers, initializer=self._open_context)
+        return self._pool
+
+    def _open_context(self):
+        if hasattr(self._callback, 'open_thread_context'):
+            self._callback.open_thread_context(thread_context())
+
+    def _close_context(self, _):
+        try:
+            if hasattr(self._callback, 'close_thread_context'):
+                self._callback.close_thread_context(thread_context())
+            _thread_local.context = None
+        finally:
+            # Wait for the other threads, so every thread takes one of these tasks
+            with self._closing_condition:
+                self._closing -= 1
+                self._closing_condition.notify_all()
+                while self._closing > 0:
+                    self._closing_condition.wait()
+
+    def close(self):
+        if self._pool is None:
+            return
+
+        try:
+            self._closing = self._workers
+            self._pool.map(self._close_context, range(self._workers), chunksize=1)
+        finally:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
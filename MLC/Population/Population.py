@@ -24,6 +24,7 @@ import MLC.Log.log as lg
 import sys
 import time
 
+from collections import OrderedDict
 from MLC.Common.RandomManager import RandomManager
 from MLC.individual.Individual import OperationOverIndividualFail
 
@@ -40,6 +41,15 @@ class Population(object):
         CROSSOVER = 3
         ELITISM = 4
 
+    class CostCachePolicy:
+        EVALUATE = "evaluate"
+        LAST = "last"
+        AVERAGE = "average"
+        ALL = [EVALUATE, LAST, AVERAGE]
+
+    # Two sided 95% confidence interval of the cost used when racing
+    RACING_CONFIDENCE_Z = 1.96
+
     def __init__(self, size, sub_generations, configuration, mlc_repository):
         # repository to obtain individuals
         self._mlc_repository = mlc_repository
@@ -55,10 +65,14 @@ class Population(object):
         self._gen_method  = [-1] * self._size
         self._parents     = [[]] * self._size
 
+        # cost samples of the individuals evaluated more than once: {indiv_id: [(cost, ev_time)]}
+        self._cost_samples = {}
+
         # genetic operations for individuals
-        self._probrep = self._config.getfloat("OPTIMIZATION", "probrep")
-        self._probmut = self._config.getfloat("OPTIMIZATION", "probmut")
-        self._probcro = self._config.getfloat("OPTIMIZATION", "probcro")
+        parameters = self._config.parameters()
+        self._probrep = parameters.probrep
+        self._probmut = parameters.probmut
+        self._probcro = parameters.probcro
 
     @staticmethod
     def gen_method_description(method_type):
@@ -81,7 +95,7 @@ class Population(object):
         gen_creator.create(self._size)
         self.set_individuals(gen_creator.individuals())
 
-    def evaluate(self, evaluator):
+    def evaluate(self, evaluator, force=False):
         """
         Evaluates cost of individuals and update the MLC object MLC_OBJ.
         All options are set in the MLC object.
@@ -94,10 +108,34 @@ class Population(object):
             - averaging of all past cost values for a given individual if
                 evaluation are repeated (for experiments or
                 numerics with random noise).
+
+        Already evaluated individuals take their cost from the cost history
+        of the repository according to the EVALUATOR.cost_cache policy, unless
+        EVALUATOR.evaluate_all is set or force is True. Reused costs keep the
+        evaluation time of their last evaluation, so they are not taken as new
+        evaluations by the next generations.
         """
         # Update table individuals and MATLAB Population indexes and costs
-        bad_value = self._config.getfloat('EVALUATOR', 'badvalue')
-        costs = evaluator.evaluate(self._individuals)
+        bad_value = self._config.parameters().badvalue
+        cached = self._cached_costs(force)
+        self._cost_samples = {}
+
+        if cached is None:
+            costs = evaluator.evaluate(self._individuals)
+            ev_time = [time.time()] * self._size
+        else:
+            costs, ev_time = cached
+            pending = [index for index in xrange(self._size) if costs[index] is None]
+            pending_individuals = OrderedDict.fromkeys(self._individuals[index] for index in pending).keys()
+
+            lg.logger_.debug('Evaluate, individuals to evaluate: %s - Cached: %s' %
+                             (len(pending_individuals), self._size - len(pending)))
+            if pending_individuals:
+                new_costs = dict(zip(pending_individuals, evaluator.evaluate(pending_individuals)))
+                now = time.time()
+                for index in pending:
+                    costs[index] = new_costs[self._individuals[index]]
+                    ev_time[index] = now
 
         for i in xrange(self._size):
             new_cost = costs[i]
@@ -109,12 +147,140 @@ class Population(object):
             lg.logger_.debug('Evaluate Idx: %s - Indiv N#: %s - Cost: %s' % (i, self._individuals[i], new_cost))
 
         self._costs = costs
-        self._ev_time = [time.time()] * self._size
+        self._ev_time = ev_time
+
+    def _cached_costs(self, force):
+        """
+        Returns the costs and evaluation times of the individuals that are
+        not going to be evaluated again, and None for the other ones. Returns
+        None when every individual must be evaluated.
+        Cost cache policies:
+            - evaluate: evaluate every individual, even the already evaluated ones.
+            - last: reuse the last cost of the individual.
+            - average: reuse the average of all the past costs of the individual.
+        """
+        parameters = self._config.parameters()
+        policy = parameters.cost_cache or Population.CostCachePolicy.EVALUATE
+        if policy not in Population.CostCachePolicy.ALL:
+            raise ValueError("Parameter cost_cache of section EVALUATOR is not a valid policy: '%s'. "
+                             "Valid policies: %s" % (policy, ", ".join(Population.CostCachePolicy.ALL)))
+
+        if force or parameters.evaluate_all or policy == Population.CostCachePolicy.EVALUATE:
+            return None
+
+        costs = [None] * self._size
+        ev_time = [None] * self._size
+        cached = {}
+        for index, individual in enumerate(self._individuals):
+            if individual not in cached:
+                cached[individual] = self._cost_from_history(individual, policy)
+
+            if cached[individual] is not None:
+                costs[index], ev_time[index] = cached[individual]
+
+        return costs, ev_time
+
+    def _cost_from_history(self, individual, policy):
+        cost_history = self._mlc_repository.get_individual_data(individual).get_cost_history()
+
+        # A reused cost is stored with the evaluation time of the evaluation it comes from,
+        # only the first cost of every evaluation time is a real evaluation
+        evaluations = OrderedDict()
+        for generation in sorted(cost_history):
+            for cost, ev_time in cost_history[generation]:
+                evaluations.setdefault(ev_time, cost)
+
+        if not evaluations:
+            return None
+
+        last_ev_time, last_cost = evaluations.items()[-1]
+        if policy == Population.CostCachePolicy.LAST:
+            return last_cost, last_ev_time
+
+        return sum(evaluations.values()) / float(len(evaluations)), last_ev_time
+
+    def race(self, evaluator, elite_size, max_evaluations):
+        """
+        Re-evaluates the individuals whose place inside or outside the elite
+        (the elite_size best individuals) is not statistically clear yet.
+        Every round evaluates again the individuals whose cost confidence
+        interval overlaps the elite boundary, until the ranking is stable or
+        the individuals were evaluated max_evaluations times. The cost of
+        every individual becomes the average of its samples, and the samples
+        of the re-evaluated individuals are kept to be stored in the
+        cost history.
+        """
+        bad_value = self._config.parameters().badvalue
+        samples = {}
+        for individual, cost, ev_time in zip(self._individuals, self._costs, self._ev_time):
+            samples.setdefault(individual, [(cost, ev_time)])
+
+        elite_size = min(elite_size, len(samples) - 1)
+        if elite_size < 1:
+            return
+
+        candidates = self._racing_candidates(samples, elite_size, max_evaluations)
+        while candidates:
+            lg.logger_.debug('[POP][RACING] Evaluating again %s individuals' % len(candidates))
+            costs = evaluator.evaluate(candidates)
+            now = time.time()
+            for individual, cost in zip(candidates, costs):
+                if cost > bad_value or str(cost) in ('nan', 'inf'):
+                    cost = bad_value
+                samples[individual].append((cost, now))
+
+            candidates = self._racing_candidates(samples, elite_size, max_evaluations)
+
+        for index, individual in enumerate(self._individuals):
+            individual_samples = samples[individual]
+            self._costs[index] = sum(cost for cost, _ in individual_samples) / float(len(individual_samples))
+            self._ev_time[index] = individual_samples[-1][1]
+
+            if len(individual_samples) > 1:
+                self._cost_samples[individual] = individual_samples
+
+    def _racing_candidates(self, samples, elite_size, max_evaluations):
+        statistics = {}
+        for individual, individual_samples in samples.items():
+            costs = [cost for cost, _ in individual_samples]
+            mean = sum(costs) / float(len(costs))
+            variance = None
+            if len(costs) > 1:
+                variance = sum((cost - mean) ** 2 for cost in costs) / (len(costs) - 1)
+            statistics[individual] = (mean, variance, len(costs))
+
+        ranking = sorted(statistics, key=lambda individual: statistics[individual][0])
+        evaluated_again = [stats[1] for stats in statistics.values() if stats[1] is not None]
+
+        if not evaluated_again:
+            # Nothing is known about the noise yet: evaluate again the elite
+            # and the best individual outside of it
+            candidates = ranking[:elite_size + 1]
+        else:
+            # The individuals evaluated once use the noise of the other ones
+            pooled_variance = sum(evaluated_again) / len(evaluated_again)
+
+            def interval(individual):
+                mean, variance, evaluations = statistics[individual]
+                if variance is None:
+                    variance = pooled_variance
+                half_width = Population.RACING_CONFIDENCE_Z * math.sqrt(variance / evaluations)
+                return mean - half_width, mean + half_width
+
+            intervals = dict((individual, interval(individual)) for individual in ranking)
+            elite, others = ranking[:elite_size], ranking[elite_size:]
+            worst_elite_upper = max(intervals[individual][1] for individual in elite)
+            best_other_lower = min(intervals[individual][0] for individual in others)
+
+            candidates = [individual for individual in elite if intervals[individual][1] >= best_other_lower]
+            candidates += [individual for individual in others if intervals[individual][0] <= worst_elite_upper]
+
+        return [individual for individual in candidates if statistics[individual][2] < max_evaluations]
 
     def remove_bad_individuals(self):
         # Get the individuals which value is the same as the
         # badvalue defined in the configuration
-        bad_value = self._config.getfloat('EVALUATOR', 'badvalue')
+        bad_value = self._config.parameters().badvalue
         bad_list = [x for x in xrange(len(self._costs)) if self._costs[x] == bad_value]
 
         if len(bad_list) > 0.4 * len(self._individuals):
@@ -186,6 +352,29 @@ class Population(object):
         else:
             self._parents[kw['dest_index']] = [kw['parent_index'] + 1]
 
+    def set_individual(self, index, indiv_index, cost, gen_method, parents, ev_time=-1):
+        """
+        Set all the attributes of the individual in the position index of the population
+        """
+        self._individuals[index] = indiv_index
+        self._costs[index] = cost
+        self._ev_time[index] = ev_time
+        self._gen_method[index] = gen_method
+        self._parents[index] = list(parents)
+
+    def set_cost_samples(self, indiv_index, samples):
+        """
+        Set the costs of the evaluations of an individual in this population, a list of
+        (cost, ev_time) stored in its cost history
+        """
+        self._cost_samples[indiv_index] = list(samples)
+
+    def choose_parent(self):
+        """
+        Position of an individual chosen with the selection method among the whole population
+        """
+        return self._choose_individual((0, self._size - 1))
+
     def get_best_individual(self):
         best_indivs = [x[0] for x in sorted(enumerate(self._costs), key=lambda x: x[1])]
         best_index = self._individuals[best_indivs[0]]
@@ -216,7 +405,7 @@ class Population(object):
                                  for x in enumerate(next_population.get_individuals()[subgen2_begin:subgen2_end + 1])
                                  if x[1] == -1]
             individuals_created = 0
-            param_elitism = self._config.getint('OPTIMIZATION', 'elitism')
+            param_elitism = self._config.parameters().elitism
 
             # Apply the elitism algorithm only if we're NOT modifying a previously evolved population
             if is_first_evolve:
@@ -349,6 +538,7 @@ class Population(object):
 
         indivs = []
         costs = []
+        ev_time = []
         gen_method = []
         parents = []
 
@@ -360,11 +550,13 @@ class Population(object):
             for i in xrange(subgen[1] - subgen[0] + 1):
                 indivs.append(self._individuals[indexes[i]])
                 costs.append(self._costs[indexes[i]])
+                ev_time.append(self._ev_time[indexes[i]])
                 gen_method.append(self._gen_method[indexes[i]])
                 parents.append(self._parents[indexes[i]])
 
         self._individuals = indivs
         self._costs = costs
+        self._ev_time = ev_time
         self._gen_method = gen_method
         self._parents = parents
 
@@ -417,10 +609,11 @@ class Population(object):
         return op
 
     def _choose_individual(self, subgen_range):
-        selection_method = self._config.get("OPTIMIZATION", "selectionmethod")
+        parameters = self._config.parameters()
+        selection_method = parameters.selectionmethod
 
         if selection_method == "tournament":
-            tournament_size = self._config.getint("OPTIMIZATION", "tournamentsize")
+            tournament_size = parameters.tournamentsize
             # Get randomly as many individuals as tournament_size property is set
             indivs_chosen = []
             subgen_len = subgen_range[1] - subgen_range[0] + 1
@@ -465,6 +658,9 @@ class Population(object):
     def get_costs(self):
         return self._costs
 
+    def get_ev_times(self):
+        return self._ev_time
+
     def get_gen_methods(self):
         return self._gen_method
 
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import time
+import MLC.Log.log as lg
+
+from MLC.Common.RandomManager import RandomManager
+from MLC.db.mlc_repository import MLCRepository
+from MLC.individual.Individual import OperationOverIndividualFail
+from MLC.mlc_parameters.mlc_parameters import Config
+from MLC.Population.Population import Population
+from MLC.Simulation import Simulation
+
+
+class SteadyStateEvolution(object):
+    """
+    Asynchronous evolution: as soon as an evaluation slot of the evaluator frees up a new
+    offspring is bred from the archive (the best individuals found so far) with tournament
+    selection and dispatched. An evaluated offspring replaces the worst individual of the
+    archive when its cost is lower.
+
+    Every time as many evaluations as the size of the population have finished, the archive
+    is stored in the repository as a pseudo-generation. Individuals kept from the previous
+    pseudo-generation are stored as ELITISM, the new ones with the genetic operation that
+    created them. Parents are positions in the previous pseudo-generation, as in the
+    generational mode, parents that are not there anymore are left out. The costs of the
+    offspring that are not in the stored archive are kept as cost samples of the
+    pseudo-generation, so their evaluations remain in the cost history.
+
+    The evaluator must implement slots(), submit(index) and next_result().
+    """
+    CROSSOVER_ATTEMPTS = 10
+    BREED_ATTEMPTS = 100
+
+    def __init__(self, evaluator, callbacks_manager, look_for_duplicates):
+        self._config = Config.get_instance()
+        self._mlc_repository = MLCRepository.get_instance()
+        self._evaluator = evaluator
+        self._callbacks_manager = callbacks_manager
+        self._look_for_duplicates = look_for_duplicates
+
+        parameters = self._config.parameters()
+        self._badvalue = parameters.badvalue
+        self._probmut = parameters.probmut
+        self._probcro = parameters.probcro
+
+        self._archive = None
+        self._in_flight = {}
+        self._evaluations_left = 0
+        # Evaluations since the last pseudo-generation: {indiv_index: [(cost, ev_time)]}
+        self._evaluations = {}
+
+    def run(self, to_generation):
+        """
+        Evolve the last generation of the repository until to_generation pseudo-generations
+        are stored
+        """
+        last_generation = self._mlc_repository.count_population()
+        if last_generation >= to_generation:
+            return
+
+        self._archive = self._create_archive(last_generation)
+        size = self._archive.get_size()
+        self._evaluations_left = (to_generation - last_generation) * size
+        completed = 0
+
+        lg.logger_.info("[STEADY_STATE] Evolving to Population %s using population %s. Evaluation slots: %s"
+                        % (to_generation, last_generation, self._evaluator.slots()))
+
+        self._dispatch()
+        while self._in_flight:
+            ticket, cost = self._evaluator.next_result()
+            self._insert(self._in_flight.pop(ticket), cost)
+            completed += 1
+
+            if completed % size == 0:
+                self._checkpoint(self._mlc_repository.count_population() + 1)
+            self._dispatch()
+
+    def _create_archive(self, last_generation):
+        last_population = self._mlc_repository.get_population(last_generation)
+        size = Simulation.create_empty_population_for(last_generation + 1).get_size()
+        if last_population.get_size() != size:
+            raise ValueError("Steady state evolution needs the same size in every population. "
+                             "Size of population %s: %s - Next population: %s"
+                             % (last_generation, last_population.get_size(), size))
+
+        # The archive keeps the ids of the parents in the parents of every individual. They are
+        # translated to positions when the archive is stored
+        archive = Population(size, 1, self._config, self._mlc_repository)
+        for index in xrange(size):
+            indiv_index = last_population.get_individuals()[index]
+            archive.set_individual(index, indiv_index, last_population.get_costs()[index],
+                                   Population.GenerationMethod.ELITISM, [indiv_index],
+                                   last_population.get_ev_times()[index])
+        archive.sort()
+        return archive
+
+    def _dispatch(self):
+        slots = self._evaluator.slots()
+        while self._evaluations_left > 0 and len(self._in_flight) < slots:
+            for indiv_index, gen_method, parents in self._breed():
+                ticket = self._evaluator.submit(indiv_index)
+                self._in_flight[ticket] = (indiv_index, gen_method, parents)
+                self._evaluations_left -= 1
+
+    def _breed(self):
+        """
+        Create one offspring with a mutation or two with a crossover, returns a list of
+        (individual id, generation method, ids of the parents). When look_for_duplicates is
+        set and only duplicated offspring are bred after BREED_ATTEMPTS attempts, the last
+        ones are returned. The last evaluation is always bred with a mutation, so every
+        offspring stored in the repository is evaluated
+        """
+        duplicated = []
+        for _ in xrange(SteadyStateEvolution.BREED_ATTEMPTS):
+            total = self._probmut + self._probcro
+            if self._evaluations_left > 1 and total > 0 and RandomManager.rand() * total > self._probmut:
+                offspring = self._crossover()
+            else:
+                offspring = self._mutation()
+
+            if not offspring or not self._look_for_duplicates:
+                if offspring:
+                    return offspring
+                continue
+
+            unique = []
+            for child in offspring:
+                if not self._is_duplicate(child[0]) and child[0] not in [other[0] for other in unique]:
+                    unique.append(child)
+            if unique:
+                return unique
+            duplicated = offspring
+
+        if not duplicated:
+            raise ValueError("Steady state evolution could not breed any individual in %s attempts"
+                             % SteadyStateEvolution.BREED_ATTEMPTS)
+
+        lg.logger_.warn("[STEADY_STATE] Only duplicated individuals were bred in %s attempts, "
+                        "evaluating them again" % SteadyStateEvolution.BREED_ATTEMPTS)
+        return duplicated
+
+    def _mutation(self):
+        while True:
+            parent = self._archive.get_individuals()[self._archive.choose_parent()]
+            try:
+                new_ind = self._mlc_repository.get_individual(parent).mutate()
+                break
+            except OperationOverIndividualFail, ex:
+                lg.logger_.warn(str(ex))
+
+        number, repeated = self._mlc_repository.add_individual(new_ind)
+        return [(number, Population.GenerationMethod.MUTATION, [parent])]
+
+    def _crossover(self):
+        fail = True
+        attempts = 0
+        while fail:
+            # Small individuals can't be crossed, let _breed choose the operation again
+            if attempts == SteadyStateEvolution.CROSSOVER_ATTEMPTS:
+                return []
+            attempts += 1
+
+            parent_pos = self._archive.choose_parent()
+            parent_pos2 = parent_pos
+            while parent_pos == parent_pos2:
+                parent_pos2 = self._archive.choose_parent()
+
+            parent = self._archive.get_individuals()[parent_pos]
+            parent2 = self._archive.get_individuals()[parent_pos2]
+            try:
+                new_ind, new_ind2, fail = self._mlc_repository.get_individual(parent).crossover(
+                    self._mlc_repository.get_individual(parent2))
+            except OperationOverIndividualFail, ex:
+                lg.logger_.warn(str(ex))
+
+        offspring = []
+        for individual in (new_ind, new_ind2):
+            number, repeated = self._mlc_repository.add_individual(individual)
+            offspring.append((number, Population.GenerationMethod.CROSSOVER, [parent, parent2]))
+        return offspring
+
+    def _is_duplicate(self, indiv_index):
+        return (indiv_index in self._archive.get_individuals() or
+                indiv_index in [offspring[0] for offspring in self._in_flight.values()])
+
+    def _insert(self, offspring, cost):
+        indiv_index, gen_method, parents = offspring
+        if cost > self._badvalue or str(cost) in ('nan', 'inf'):
+            lg.logger_.debug('[STEADY_STATE] Invalid value found:%s for individual:%s' % (cost, indiv_index))
+            cost = self._badvalue
+
+        ev_time = time.time()
+        self._evaluations.setdefault(indiv_index, []).append((cost, ev_time))
+
+        worst = self._archive.get_size() - 1
+        if cost < self._archive.get_costs()[worst]:
+            lg.logger_.debug('[STEADY_STATE] Individual N#%s (Cost: %s) replaces individual N#%s (Cost: %s)'
+                             % (indiv_index, cost, self._archive.get_individuals()[worst],
+                                self._archive.get_costs()[worst]))
+            self._archive.set_individual(worst, indiv_index, cost, gen_method, parents, ev_time)
+            self._archive.sort()
+
+    def _checkpoint(self, generation):
+        previous = self._mlc_repository.get_population(generation - 1).get_individuals()
+        positions = {}
+        for position, indiv_index in enumerate(previous):
+            positions.setdefault(indiv_index, position + 1)
+
+        population = Simulation.create_empty_population_for(generation)
+        for index in xrange(self._archive.get_size()):
+            indiv_index = self._archive.get_individuals()[index]
+            parents = [positions[parent] for parent in self._archive.get_parents()[index] if parent in positions]
+            population.set_individual(index, indiv_index, self._archive.get_costs()[index],
+                                      self._archive.get_gen_methods()[index], parents,
+                                      self._archive.get_ev_times()[index])
+
+            # From now on the individual is kept from this pseudo-generation
+            self._archive.set_individual(index, indiv_index, self._archive.get_costs()[index],
+                                         Population.GenerationMethod.ELITISM, [indiv_index],
+                                         self._archive.get_ev_times()[index])
+        population.sort()
+
+        # The population keeps one evaluation of every individual, the other evaluations are
+        # stored as cost samples
+        for indiv_index, samples in self._evaluations.items():
+            if indiv_index not in population.get_individuals() or len(samples) > 1:
+                population.set_cost_samples(indiv_index, samples)
+        self._evaluations = {}
+
+        lg.logger_.info("Population created. Number: %s - Size: %s" % (generation, population.get_size()))
+        self._mlc_repository.add_population(population)
+
+        from MLC.Application import MLC_CALLBACKS
+        self._callbacks_manager.on_event(MLC_CALLBACKS.ON_NEW_GENERATION, generation)
@@ -27,12 +27,18 @@ import sys
 import time
 
 from matplotlib import rc
-from MLC.matlab_engine import MatlabEngine
+from MLC.matlab_engine_pool import MatlabEnginePool
 from MLC.mlc_parameters.mlc_parameters import Config
 from scipy import integrate
 
 g_simulink_opened = False
 
+# Sessions of MATLAB with the Simulink model opened, and the
+# (sessions, model name, model path) they were created for. Used
+# only when engine_sessions is greater than 1
+g_engine_pool = None
+g_engine_pool_key = None
+
 
 def retrieve_problem_variables(config):
     values_dict = {}
@@ -56,10 +62,61 @@ def retrieve_problem_variables(config):
     values_dict['goal'] = config.get('PROBLEM_VARIABLES', 'goal')
     values_dict['summator_gain'] = config.getint('PROBLEM_VARIABLES', 'summator_gain')
 
+    # Simulations run in parallel, one per MATLAB session
+    values_dict['engine_sessions'] = 1
+    if config.has_option('PROBLEM_VARIABLES', 'engine_sessions'):
+        values_dict['engine_sessions'] = config.getint('PROBLEM_VARIABLES', 'engine_sessions')
+
     return values_dict
 
 
-def individual_data(indiv):
+def shared_engine():
+    """
+    Return the MATLAB session shared with the rest of MLC, with the Simulink model opened.
+    MATLAB is imported here, like in the factory of the engine pool
+    """
+    global g_simulink_opened
+    from MLC.matlab_engine import MatlabEngine
+    eng = MatlabEngine.engine()
+
+    if not g_simulink_opened:
+        # FIXME: Not exactly the best solution. It does not allow us to use
+        # an already opened Simulink in other experiment
+        prob_var = retrieve_problem_variables(Config.get_instance())
+        lg.logger_.debug('[SIMULINK_EV] Starting experiment. Proceed to open Simulink')
+        eng.addpath(prob_var['model_path'])
+        eng.open(prob_var['model_name'])
+        g_simulink_opened = True
+
+    return eng
+
+
+def use_engine_pool():
+    return retrieve_problem_variables(Config.get_instance())['engine_sessions'] > 1
+
+
+def engine_pool():
+    global g_engine_pool, g_engine_pool_key
+
+    prob_var = retrieve_problem_variables(Config.get_instance())
+    pool_key = (prob_var['engine_sessions'], prob_var['model_name'], prob_var['model_path'])
+
+    if g_engine_pool_key != pool_key:
+        if g_engine_pool is not None:
+            g_engine_pool.close()
+
+        def open_model(eng):
+            lg.logger_.debug('[SIMULINK_EV] Proceed to open Simulink model {0}'.format(prob_var['model_name']))
+            eng.addpath(prob_var['model_path'])
+            eng.open(prob_var['model_name'])
+
+        g_engine_pool = MatlabEnginePool(prob_var['engine_sessions'], setup=open_model)
+        g_engine_pool_key = pool_key
+
+    return g_engine_pool
+
+
+def individual_data(indiv, eng=None):
     """
     Returns as a dict: * clock
                        * dj_nat
@@ -68,12 +125,18 @@ def individual_data(indiv):
                        * j_sensor
                        * dj_control
                        * j_control
+    The simulation runs in eng, in a free session of the engine pool when
+    engine_sessions is greater than 1, or in the shared MATLAB session
     """
-    global g_simulink_opened
+    if eng is None:
+        if use_engine_pool():
+            with engine_pool().session() as eng:
+                return individual_data(indiv, eng)
+        eng = shared_engine()
+
     # Measure the time spent in the evaluation of the individual
     start_time = time.time()
 
-    eng = MatlabEngine.engine()
     config = Config.get_instance()
 
     # Get problem variables
@@ -93,13 +156,6 @@ def individual_data(indiv):
     formal = formal.replace('S0', 'u(1)')
 
     model_name = prob_var['model_name']
-    if not g_simulink_opened:
-        # FIXME: Not exactly the best solution. It does not allow us to use
-        # an already opened Simulink in other experiment
-        lg.logger_.debug('[SIMULINK_EV] Starting experiment. Proceed to open Simulink')
-        eng.addpath(prob_var['model_path'])
-        eng.open(model_name)
-        g_simulink_opened = True
 
     # Set Simulation parameters
     eng.set_param(model_name + '/Arduino/Control_Function', 'expression', formal, nargout=0)
@@ -194,6 +250,14 @@ def cost(indiv):
     return simulink_results['j0']
 
 
+def cost_batch(indivs):
+    if not use_engine_pool():
+        return [cost(indiv) for indiv in indivs]
+
+    # Every simulation runs in the first free MATLAB session
+    return engine_pool().map(lambda eng, indiv: individual_data(indiv, eng)['j0'], indivs)
+
+
 def show_best(index, generation, indiv, cost, block=True):
     # TODO: Add texlive-latex-extra and textlive-latex-recommended in the Wiki if we want to use LaTeX fonts
     sl_results = individual_data(indiv)
@@ -41,6 +41,7 @@ from MLC.api.mlc import PreevaluationScriptNotExistException
 from MLC.api.mlc import ImportExperimentPathNotExistException
 from MLC.api.mlc import ConfigFilePathNotExistException
 from MLC.Application import Application
+from MLC.Common.CallbackRegistry import CallbackRegistry
 from MLC.config import get_templates_path
 from MLC.config import set_working_directory
 from MLC.db.mlc_repository import MLCRepository
@@ -155,6 +156,7 @@ class MLCLocal(MLC):
         # and Preevaluation Scripts
         experiment_dir = os.path.join(self._working_dir, experiment_name)
         sys.path.append(experiment_dir)
+        CallbackRegistry.get_instance().clear()
         self._open_experiments[experiment_name] = self._experiments[experiment_name]
 
     def close_experiment(self, experiment_name):
@@ -162,6 +164,7 @@ class MLCLocal(MLC):
         # problems between Evaluation and Preevaluation scripts from other projects
         experiment_dir = os.path.join(self._working_dir, experiment_name)
         sys.path.remove(experiment_dir)
+        CallbackRegistry.get_instance().clear()
         self._open_experiments[experiment_name].get_simulation().close()
         del self._open_experiments[experiment_name]
 
@@ -32,8 +32,12 @@ class MLCRepositoryHelper:
 
     @staticmethod
     def get_hash_for_individual(individual):
+        return MLCRepositoryHelper.get_hash_for_value(individual.get_value())
+
+    @staticmethod
+    def get_hash_for_value(value):
         m = hashlib.md5()
-        m.update(individual.get_value())
+        m.update(value)
         return m.hexdigest()
 
 
@@ -51,6 +55,10 @@ class IndividualData:
             date and time (on the computer clock) of sending of the indivs to the evaluation function
         appearances:
             number of time the individual appears
+
+        When the individual was evaluated more than once in a generation (see
+        Population.race), the cost history keeps every cost sample instead of
+        the average cost of the generation.
     """
 
     def __init__(self, value):
@@ -71,6 +79,11 @@ class IndividualData:
         self._cost_history[generation].append((cost, evaluation_time))
         self._appearances += 1
 
+    def _set_samples(self, generation, samples):
+        # the individual was evaluated many times in the generation, its cost
+        # in the population is the average of these samples
+        self._cost_history[generation] = samples
+
 
 class MLCRepository:
     _instance = None
@@ -131,6 +144,16 @@ class MLCRepository:
                                evaluation_time, generation=-1):
         raise NotImplementedError("This method must be implemented")
 
+    def update_individual_costs(self, costs, generation=-1):
+        raise NotImplementedError("This method must be implemented")
+
+    # evaluations that didn't finish (timeouts and crashes of the evaluation worker)
+    def add_evaluation_event(self, individual_id, event, attempt, duration):
+        raise NotImplementedError("This method must be implemented")
+
+    def get_evaluation_events(self, individual_id=None):
+        raise NotImplementedError("This method must be implemented")
+
     # board configuration
     def save_board_configuration(self, board_config, board_id=None):
         raise NotImplementedError("This method must be implemented")
@@ -169,4 +192,9 @@ class MLCRepository:
         else:
             database = SQLiteRepository.IN_MEMORY_DB
 
-        MLCRepository._instance = SQLiteRepository(database, init_db=first_init)
+        cache_size = SQLiteRepository.DEFAULT_INDIVIDUAL_CACHE_SIZE
+        if Config.get_instance().has_option("BEHAVIOUR", "individual_cache_size"):
+            cache_size = Config.get_instance().getint("BEHAVIOUR", "individual_cache_size")
+
+        MLCRepository._instance = SQLiteRepository(database, init_db=first_init,
+                                                   individual_cache_size=cache_size)
@@ -23,7 +23,34 @@ def stmt_create_table_individuals():
     return ''' CREATE TABLE individual(indiv_id INTEGER PRIMARY KEY,
                                        value text,
                                        formal text,
-                                       complexity INTEGER)'''
+                                       complexity INTEGER,
+                                       hash TEXT)'''
+
+
+def stmt_add_column_individual_hash():
+    return '''ALTER TABLE individual ADD COLUMN hash TEXT'''
+
+
+def stmt_get_individual_columns():
+    return '''PRAGMA table_info(individual)'''
+
+
+def stmt_update_individual_hash():
+    return '''UPDATE individual SET hash = ? WHERE indiv_id = ?'''
+
+
+def stmt_create_indexes():
+    return ['''CREATE INDEX IF NOT EXISTS population_gen ON population(gen)''',
+            '''CREATE INDEX IF NOT EXISTS population_indiv_id ON population(indiv_id)''',
+            '''CREATE INDEX IF NOT EXISTS cost_sample_indiv_id ON cost_sample(indiv_id)''']
+
+
+def stmt_get_schema_version():
+    return '''PRAGMA user_version'''
+
+
+def stmt_set_schema_version(version):
+    return '''PRAGMA user_version = %d''' % version
 
 
 def stmt_create_table_population():
@@ -38,18 +65,60 @@ def stmt_create_table_population():
                             FOREIGN KEY(indiv_id) REFERENCES individual(indiv_id))'''
 
 
-def stmt_delete_generation(generation):
+def stmt_create_table_cost_sample():
+    return '''
+    CREATE TABLE IF NOT EXISTS cost_sample(id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                           gen INTEGER,
+                                           cost real,
+                                           evaluation_time INTEGER,
+                                           indiv_id INTEGER,
+                                           FOREIGN KEY(indiv_id) REFERENCES individual(indiv_id))'''
+
+
+def stmt_create_table_evaluation_event():
+    return '''
+    CREATE TABLE IF NOT EXISTS evaluation_event(id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                                gen INTEGER,
+                                                indiv_id INTEGER,
+                                                event TEXT,
+                                                attempt INTEGER,
+                                                duration real,
+                                                evaluation_time INTEGER)'''
+
+
+def stmt_delete_generation():
     return """DELETE FROM population
-              WHERE gen = %s""" % (generation,)
+              WHERE gen = ?"""
 
 
-def stmt_delete_from_generations(from_generation):
+def stmt_delete_from_generations():
     return """DELETE FROM population
-              WHERE gen >= %s""" % (from_generation,)
+              WHERE gen >= ?"""
 
-def stmt_delete_to_generations(to_generation):
+def stmt_delete_to_generations():
     return """DELETE FROM population
-              WHERE gen <= %s""" % (to_generation,)
+              WHERE gen <= ?"""
+
+
+def stmt_delete_cost_samples_from_generations():
+    return """DELETE FROM cost_sample
+              WHERE gen >= ?"""
+
+
+def stmt_delete_cost_samples_to_generations():
+    return """DELETE FROM cost_sample
+              WHERE gen <= ?"""
+
+
+def stmt_delete_evaluation_events_from_generations():
+    return """DELETE FROM evaluation_event
+              WHERE gen >= ?"""
+
+
+def stmt_delete_evaluation_events_to_generations():
+    return """DELETE FROM evaluation_event
+              WHERE gen <= ?"""
+
 
 def stmt_delete_unused_individuals():
     return '''DELETE FROM individual
@@ -57,7 +126,7 @@ def stmt_delete_unused_individuals():
 
 
 def stmt_get_unused_individuals():
-    return '''SELECT indiv_id FROM individual
+    return '''SELECT indiv_id, hash FROM individual
               WHERE indiv_id NOT IN (SELECT DISTINCT indiv_id FROM population)'''
 
 
@@ -70,21 +139,16 @@ def stmt_get_generations():
     return '''SELECT distinct gen FROM population'''
 
 
-def stmt_insert_individual_in_population(generation, indiv_id, cost, evaluation_time, gen_method, parents):
+def stmt_insert_individual_in_population():
     return '''INSERT INTO population (gen, cost, evaluation_time, gen_method, parents, indiv_id)
-              VALUES (%s, "%s", %s, %s, "%s", %s)''' % (generation,
-                                                        cost,
-                                                        evaluation_time,
-                                                        gen_method,
-                                                        parents,
-                                                        indiv_id)
+              VALUES (?, ?, ?, ?, ?, ?)'''
 
 
-def stmt_get_individuals_from_population(generation):
+def stmt_get_individuals_from_population():
     return '''SELECT indiv_id, cost, evaluation_time, gen_method, parents, ID
               FROM population
-              WHERE gen = %s
-              ORDER BY ID''' % generation
+              WHERE gen = ?
+              ORDER BY ID'''
 
 
 class SQLSaveFormal:
@@ -101,23 +165,31 @@ class SQLSaveFormal:
         return indiv_formal_column.split('@')
 
 
-def stmt_insert_individual(individual_id, individual):
-    return '''INSERT INTO individual VALUES (%s, "%s", "%s", %s)''' % (individual_id,
-                                                                       individual.get_value(),
-                                                                       SQLSaveFormal.to_sql(individual.get_formal()),
-                                                                       individual.get_complexity())
+def stmt_insert_individual():
+    return '''INSERT INTO individual (indiv_id, value, formal, complexity, hash)
+              VALUES (?, ?, ?, ?, ?)'''
 
 
-def stmt_get_all_individuals():
-    return '''SELECT indiv_id, value, formal, complexity
-              from individual
-              ORDER BY indiv_id'''
+def stmt_get_individual():
+    return '''SELECT value, formal, complexity
+              FROM individual
+              WHERE indiv_id = ?'''
+
 
+def stmt_get_individual_hashes():
+    return '''SELECT indiv_id, hash
+              FROM individual'''
 
-def stmt_get_individual_data(indiv_id):
+
+def stmt_get_individual_values():
+    return '''SELECT indiv_id, value
+              FROM individual'''
+
+
+def stmt_get_individual_data():
     return '''SELECT gen, cost, evaluation_time
               FROM population
-              WHERE indiv_id = %s''' % (indiv_id)
+              WHERE indiv_id = ?'''
 
 
 def stmt_get_individuals_data():
@@ -126,19 +198,52 @@ def stmt_get_individuals_data():
               ORDER BY indiv_id'''
 
 
-def stmt_update_all_costs(individual_id, cost, evaluation_time):
+def stmt_insert_cost_sample():
+    return '''INSERT INTO cost_sample (gen, cost, evaluation_time, indiv_id)
+              VALUES (?, ?, ?, ?)'''
+
+
+def stmt_get_individual_cost_samples():
+    return '''SELECT gen, cost, evaluation_time
+              FROM cost_sample
+              WHERE indiv_id = ?
+              ORDER BY id'''
+
+
+def stmt_get_cost_samples():
+    return '''SELECT indiv_id, gen, cost, evaluation_time
+              FROM cost_sample
+              ORDER BY id'''
+
+
+def stmt_insert_evaluation_event():
+    return '''INSERT INTO evaluation_event (gen, indiv_id, event, attempt, duration, evaluation_time)
+              VALUES (?, ?, ?, ?, ?, ?)'''
+
+
+def stmt_get_evaluation_events():
+    return '''SELECT gen, indiv_id, event, attempt, duration, evaluation_time
+              FROM evaluation_event
+              ORDER BY id'''
+
+
+def stmt_get_individual_evaluation_events():
+    return '''SELECT gen, indiv_id, event, attempt, duration, evaluation_time
+              FROM evaluation_event
+              WHERE indiv_id = ?
+              ORDER BY id'''
+
+
+def stmt_update_all_costs():
     return '''UPDATE population
-              SET cost = %s, evaluation_time = %s
-              WHERE indiv_id = %s''' % (cost, evaluation_time, individual_id)
+              SET cost = ?, evaluation_time = ?
+              WHERE indiv_id = ?'''
 
 
-def stmt_update_cost(individual_id, cost, evaluation_time, generation):
+def stmt_update_cost():
     return '''UPDATE population
-              SET cost = %s, evaluation_time = %s
-              WHERE indiv_id = %s AND gen = %s''' % (cost,
-                                                     evaluation_time,
-                                                     individual_id,
-                                                     generation)
+              SET cost = ?, evaluation_time = ?
+              WHERE indiv_id = ? AND gen = ?'''
 """
 The individual with the least cost in the last population 
 is considered to be the best individual
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import sqlite3
+import threading
+
+from contextlib import contextmanager
+from sql_statements import stmt_enable_foreign_key
+
+
+class SQLiteConnections(object):
+    """
+    Connections to a SQLite database, one per thread, open until close() is called. SQLite
+    objects can't be shared between threads, so the GUI thread and the thread running the
+    experiment use their own connection.
+
+    An in memory database only lives in the connection that created it, so a single
+    connection is shared by all the threads in that case. Use locked() to keep the
+    transactions of the threads from interleaving over it.
+    """
+
+    def __init__(self, database, in_memory_db):
+        self._database = database
+        self._in_memory = (database == in_memory_db)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # [(thread, connection, lock)]
+        self._connections = []
+        self._closed = False
+
+    def connection(self):
+        return self.__connection()[0]
+
+    @contextmanager
+    def locked(self):
+        """
+        The connection of the current thread, no other thread uses it until the block ends
+        """
+        conn, lock = self.__connection()
+        with lock:
+            yield conn
+
+    def __connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and not self._closed:
+            return connection
+
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+
+            if self._in_memory and self._connections:
+                _, conn, lock = self._connections[0]
+            else:
+                self.__close_finished_threads()
+
+                # Connections are closed by close() or by the next thread that connects
+                # after the thread that opened them finished
+                conn = sqlite3.connect(self._database, check_same_thread=False)
+                conn.execute(stmt_enable_foreign_key())
+                lock = threading.RLock()
+                self._connections.append((threading.current_thread(), conn, lock))
+
+        self._local.connection = (conn, lock)
+        return conn, lock
+
+    def count(self):
+        with self._lock:
+            return len(self._connections)
+
+    def close(self):
+        with self._lock:
+            for _, conn, _ in self._connections:
+                conn.close()
+            self._connections = []
+            self._closed = True
+
+    def __close_finished_threads(self):
+        alive = []
+        for thread, conn, lock in self._connections:
+            if thread.is_alive():
+                alive.append((thread, conn, lock))
+            else:
+                conn.close()
+        self._connections = alive
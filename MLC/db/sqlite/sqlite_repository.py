@@ -20,13 +20,18 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
 import sqlite3
+import threading
 import time
 
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
+
 from MLC.db.mlc_repository import MLCRepository
 from MLC.db.mlc_repository import MLCRepositoryHelper, IndividualData
 from MLC.individual.Individual import Individual
 from MLC.Log.log import get_gui_logger
 from MLC.Simulation import Simulation
+from sqlite_connections import SQLiteConnections
 from sql_statements import *
 from sql_statements_board_configuration import *
 from MLC.arduino.protocol import ProtocolConfig
@@ -39,119 +44,195 @@ logger = get_gui_logger()
 
 class SQLiteRepository(MLCRepository):
     IN_MEMORY_DB = ":memory:"
+    # Version 2: indexes over the population table and hashes stored with the individuals
+    SCHEMA_VERSION = 2
+    DEFAULT_INDIVIDUAL_CACHE_SIZE = 10000
 
-    def __init__(self, database, init_db=False):
-        self._conn = sqlite3.connect(database)
+    def __init__(self, database, init_db=False, individual_cache_size=DEFAULT_INDIVIDUAL_CACHE_SIZE):
         self._database = database
+        self._connections = SQLiteConnections(database, SQLiteRepository.IN_MEMORY_DB)
 
         if init_db:
             self.__initialize_db()
-
-        self.__execute(stmt_enable_foreign_key())
+        else:
+            self.__migrate_db()
 
         # cache for population
         gen_numbers = self._get_generations()
         self.__generations = len(gen_numbers)
         self.__base_gen = gen_numbers[0] if gen_numbers else 1
 
-        # all individuals: {individual_id: (Individual, generated(bool))
-        self.__individuals = self.__load_individuals()
-        self._hashlist = {}
+        # Individuals are loaded when they are requested, the least recently used ones are
+        # released when there are more than individual_cache_size: {individual_id: Individual}
+        self.__individuals = OrderedDict()
+        self.__individual_cache_size = individual_cache_size
+        # The GUI and the experiment threads request individuals
+        self.__individuals_lock = threading.Lock()
 
-        # load hashes
-        for indiv_id, individual in self.__individuals.items():
-            hash = MLCRepositoryHelper.get_hash_for_individual(individual)
-            self._hashlist[hash] = indiv_id
+        # rows of the generations already read: {gen_id: ((indiv_id, cost, evaluation_time,
+        # gen_method, parents), ...)}. Every write over a generation discards its rows
+        self.__populations = {}
+        # incremented by every write, rows read during a write are not kept
+        self.__populations_version = 0
+        self.__populations_lock = threading.Lock()
+
+        # hashes of all individuals: {hash: individual_id}
+        self._hashlist = self.__load_hashes()
 
         # enhancement
-        self.__next_individual_id = 1 if not self.__individuals else max(self.__individuals.keys()) + 1
+        self.__next_individual_id = 1 if not self._hashlist else max(self._hashlist.values()) + 1
+        # individuals not stored yet: {individual_id: (Individual, hash)}
         self.__individuals_to_flush = {}
+        # individuals whose trees were built by the last population added
+        self.__last_population_individuals = []
 
     def close(self):
-        self._conn.close()
+        self._connections.close()
 
     def __initialize_db(self):
-        cursor = self._conn.cursor()
-
-        # MLC Population tables
-        cursor.execute(stmt_create_table_individuals())
-        cursor.execute(stmt_create_table_population())
-
-        # Board configuration tables
-        cursor.execute(stmt_create_table_board())
-        cursor.execute(stmt_create_table_serial_connection())
-        cursor.execute(stmt_create_table_digital_pin())
-        cursor.execute(stmt_create_table_analog_pin())
-        cursor.execute(stmt_create_table_pwm_pin())
-
-        cursor.close()
-        self._conn.commit()
-
-    def __get_db_connection(self, reopen_connection=False):
-        # TODO: Workaround. SQLite throw an exception when a connection is used 
-        # in different threads. To solve it, we create a new connection 
-        # every time a new connection is delivered
-        if self._database != SQLiteRepository.IN_MEMORY_DB:
-            # Close the previous connection
-            try:
-                self._conn.close()
-            except sqlite3.ProgrammingError:
-                # FIXME: There are open connections that cannot be closed for 
-                # the Thread bug. See what can be done
-                pass
+        with self.__transaction() as cursor:
+            # MLC Population tables
+            cursor.execute(stmt_create_table_individuals())
+            cursor.execute(stmt_create_table_population())
+            cursor.execute(stmt_create_table_cost_sample())
+            cursor.execute(stmt_create_table_evaluation_event())
+
+            # Board configuration tables
+            cursor.execute(stmt_create_table_board())
+            cursor.execute(stmt_create_table_serial_connection())
+            cursor.execute(stmt_create_table_digital_pin())
+            cursor.execute(stmt_create_table_analog_pin())
+            cursor.execute(stmt_create_table_pwm_pin())
+
+            for statement in stmt_create_indexes():
+                cursor.execute(statement)
+            cursor.execute(stmt_set_schema_version(SQLiteRepository.SCHEMA_VERSION))
+
+    def __migrate_db(self):
+        with self.__db_connection() as conn:
+            cursor = conn.cursor()
+            version = cursor.execute(stmt_get_schema_version()).fetchone()[0]
+            if version >= SQLiteRepository.SCHEMA_VERSION:
+                cursor.close()
+                return
+
+            logger.info("[SQLITE_REPO] Migrating database {0} from schema version {1} to {2}"
+                        .format(self._database, version, SQLiteRepository.SCHEMA_VERSION))
+
+            # SQLite commits before every schema change, so every step can be applied again if
+            # the migration is interrupted. The version is updated at the end
+
+            # databases created before the cost samples and the evaluation events
+            # were stored lack these tables
+            cursor.execute(stmt_create_table_cost_sample())
+            cursor.execute(stmt_create_table_evaluation_event())
+
+            columns = [row[1] for row in cursor.execute(stmt_get_individual_columns()).fetchall()]
+            if 'hash' not in columns:
+                cursor.execute(stmt_add_column_individual_hash())
+            hashes = [(MLCRepositoryHelper.get_hash_for_value(str(row[1])), row[0])
+                      for row in cursor.execute(stmt_get_individual_values()).fetchall()]
+            cursor.executemany(stmt_update_individual_hash(), hashes)
+            conn.commit()
+
+            for statement in stmt_create_indexes():
+                cursor.execute(statement)
+            cursor.execute(stmt_set_schema_version(SQLiteRepository.SCHEMA_VERSION))
 
-            self._conn = sqlite3.connect(self._database)
-        return self._conn
+            cursor.close()
+            conn.commit()
 
-    def __insert_individuals_pending(self, individual):
+    def __db_connection(self):
+        # Every thread uses its own connection, they are kept open until close(). The
+        # connection is locked while it is used, an in memory one is shared by all threads
+        return self._connections.locked()
+
+    @contextmanager
+    def __transaction(self):
+        # The connections are kept open, so a failed transaction is rolled back here instead
+        # of being committed by the next statement executed over the same connection
+        with self.__db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                yield cursor
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def __insert_individuals_pending(self, individual, hash):
         individual_id = self.__next_individual_id
-        self.__individuals_to_flush[individual_id] = individual
+        self.__individuals_to_flush[individual_id] = (individual, hash)
         self.__next_individual_id += 1
         return individual_id
 
-    def __flush_individuals(self):
-        conn = self.__get_db_connection()
-        cursor = conn.cursor()
+    def __flush_individuals(self, cursor):
+        rows = []
         for individual_id in sorted(self.__individuals_to_flush.keys()):
-            cursor.execute(stmt_insert_individual(individual_id, self.__individuals_to_flush[individual_id]))
-        cursor.close()
-        conn.commit()
-        self.__individuals_to_flush = {}
+            individual, hash = self.__individuals_to_flush[individual_id]
+            rows.append((individual_id,
+                         individual.get_value(),
+                         SQLSaveFormal.to_sql(individual.get_formal()),
+                         individual.get_complexity(),
+                         hash))
+        cursor.executemany(stmt_insert_individual(), rows)
 
     # operation over generations
     def add_population(self, population):
-        self.__flush_individuals()
-
-        conn = self.__get_db_connection()
-        cursor = conn.cursor()
+        next_gen_id = self.__base_gen + self.__generations
 
+        # The new individuals, the population and its cost samples are stored in one transaction
         try:
-            next_gen_id = self.__base_gen + self.__generations
-            for i in range(len(population._individuals)):
-                individual_id = population._individuals[i]
-                individual_cost = population._costs[i]
-                evaluation_time = population._ev_time[i]
-                individual_gen_method = population._gen_method[i]
-                individual_parents = ','.join(str(elem) for elem in population._parents[i])
-                cursor.execute(stmt_insert_individual_in_population(next_gen_id,
-                                                                    individual_id,
-                                                                    individual_cost,
-                                                                    evaluation_time,
-                                                                    individual_gen_method,
-                                                                    individual_parents))
+            with self.__transaction() as cursor:
+                self.__flush_individuals(cursor)
+
+                rows = []
+                for i in range(len(population._individuals)):
+                    rows.append((next_gen_id,
+                                 population._costs[i],
+                                 population._ev_time[i],
+                                 population._gen_method[i],
+                                 ','.join(str(elem) for elem in population._parents[i]),
+                                 population._individuals[i]))
+                cursor.executemany(stmt_insert_individual_in_population(), rows)
+
+                rows = []
+                for individual_id in sorted(population._cost_samples.keys()):
+                    for cost, evaluation_time in population._cost_samples[individual_id]:
+                        rows.append((next_gen_id, cost, evaluation_time, individual_id))
+                cursor.executemany(stmt_insert_cost_sample(), rows)
         except sqlite3.IntegrityError:
             raise KeyError("Trying to insert an invalid Individual")
 
-        cursor.close()
-        conn.commit()
-
+        self.__forget_populations(lambda gen_id: gen_id == next_gen_id)
+        self.__individuals_to_flush = {}
         self.__generations += 1
+        self.__compact_individuals(population._individuals)
+
+    def __compact_individuals(self, individual_ids):
+        # The trees of the individuals of the new population and of the previous one (used to
+        # evolve it) were built. Keep them in their compact form while they are in memory
+        with self.__individuals_lock:
+            for individual_id in self.__last_population_individuals + list(individual_ids):
+                individual = self.__individuals.get(individual_id)
+                if individual is not None:
+                    individual.compact()
+
+        self.__last_population_individuals = list(individual_ids)
 
     def get_population(self, generation):
         gen_id = self.__base_gen + generation - 1
         pop = self.__load_population(gen_id)
         return pop
 
+    def __forget_populations(self, condition):
+        with self.__populations_lock:
+            self.__populations_version += 1
+            for gen_id in [gen_id for gen_id in self.__populations if condition(gen_id)]:
+                del self.__populations[gen_id]
+
     def count_population(self):
         return self.__generations
 
@@ -161,7 +242,10 @@ class SQLiteRepository(MLCRepository):
             return
 
         gen_id = self.__base_gen + from_generation - 1
-        self.__execute(stmt_delete_from_generations(gen_id))
+        self.__execute_all([stmt_delete_from_generations(),
+                            stmt_delete_cost_samples_from_generations(),
+                            stmt_delete_evaluation_events_from_generations()], (gen_id,))
+        self.__forget_populations(lambda generation: generation >= gen_id)
         self.__generations = from_generation - 1
         if from_generation == 1:
             self.__base_gen = 1
@@ -171,7 +255,10 @@ class SQLiteRepository(MLCRepository):
             to_generation = self.__generations
 
         gen_id = self.__base_gen + to_generation - 1
-        self.__execute(stmt_delete_to_generations(gen_id))
+        self.__execute_all([stmt_delete_to_generations(),
+                            stmt_delete_cost_samples_to_generations(),
+                            stmt_delete_evaluation_events_to_generations()], (gen_id,))
+        self.__forget_populations(lambda generation: generation <= gen_id)
         self.__generations = self.__generations - to_generation
         if self.__generations == 0:
             self.__base_gen = 1
@@ -182,21 +269,21 @@ class SQLiteRepository(MLCRepository):
         to_delete = []
 
         # get individuals to delete
-        conn = self.__get_db_connection()
-        cursor = conn.execute(stmt_get_unused_individuals())
+        with self.__db_connection() as conn:
+            cursor = conn.execute(stmt_get_unused_individuals())
 
-        for row in cursor:
-            to_delete.append(row[0])
-        cursor.close()
+            for row in cursor:
+                to_delete.append((row[0], str(row[1])))
+            cursor.close()
 
         # delete individuals from the DB
         self.__execute(stmt_delete_unused_individuals())
 
         # delete them from the cache
-        for indiv_id in to_delete:
-            individual_to_delete = self.__individuals[indiv_id]
-            del self.__individuals[indiv_id]
-            del self._hashlist[MLCRepositoryHelper.get_hash_for_individual(individual_to_delete)]
+        with self.__individuals_lock:
+            for indiv_id, hash in to_delete:
+                self.__individuals.pop(indiv_id, None)
+                del self._hashlist[hash]
 
         return len(to_delete)
 
@@ -207,9 +294,9 @@ class SQLiteRepository(MLCRepository):
         if hash in self._hashlist:
             return self._hashlist[hash], True
 
-        individual_id = self.__insert_individuals_pending(individual)
+        individual_id = self.__insert_individuals_pending(individual, hash)
 
-        self.__individuals[individual_id] = individual
+        self.__cache_individual(individual_id, individual)
         self._hashlist[hash] = individual_id
 
         return individual_id, False
@@ -221,31 +308,60 @@ class SQLiteRepository(MLCRepository):
         raise NotImplementedError("This method must be implemented")
 
     def get_individual_with_min_cost_in_last_pop(self):
-        conn = self.__get_db_connection()
-        cursor = conn.execute(stmt_get_individual_with_min_cost_in_last_pop())
+        with self.__db_connection() as conn:
+            cursor = conn.execute(stmt_get_individual_with_min_cost_in_last_pop())
 
-        # We are expecting just one resultte
-        min_indiv_id = cursor.fetchone()[0]
-        cursor.close()
+            # We are expecting just one resultte
+            min_indiv_id = cursor.fetchone()[0]
+            cursor.close()
         return min_indiv_id
 
     def get_individual(self, individual_id):
-        try:
-            return self.__individuals[individual_id]
-        except KeyError:
-            raise KeyError("Individual N#%s does not exists" % individual_id)
+        with self.__individuals_lock:
+            individual = self.__individuals.pop(individual_id, None)
+            if individual is not None:
+                # Move the individual to the end of the LRU order
+                self.__individuals[individual_id] = individual
+                return individual
+
+        if individual_id in self.__individuals_to_flush:
+            individual = self.__individuals_to_flush[individual_id][0]
+        else:
+            with self.__db_connection() as conn:
+                row = conn.execute(stmt_get_individual(), (individual_id,)).fetchone()
+                conn.commit()
+            if row is None:
+                raise KeyError("Individual N#%s does not exists" % individual_id)
+            individual = Individual(str(row[0]), SQLSaveFormal.from_sql(row[1]), row[2])
+
+        self.__cache_individual(individual_id, individual)
+        return individual
+
+    def __cache_individual(self, individual_id, individual):
+        with self.__individuals_lock:
+            self.__individuals[individual_id] = individual
+            while len(self.__individuals) > self.__individual_cache_size:
+                self.__individuals.popitem(last=False)
 
     def get_individual_data(self, individual_id):
         try:
-            data = IndividualData(self.__individuals[individual_id].get_value())
-            conn = self.__get_db_connection()
-            cursor = conn.execute(stmt_get_individual_data(individual_id))
+            data = IndividualData(self.get_individual(individual_id).get_value())
+            with self.__db_connection() as conn:
+                cursor = conn.execute(stmt_get_individual_data(), (individual_id,))
 
-            for row in cursor:
-                data._add_data(row[0] - self.__base_gen + 1, row[1], row[2])
+                for row in cursor:
+                    data._add_data(row[0] - self.__base_gen + 1, row[1], row[2])
+                cursor.close()
 
-            cursor.close()
-            conn.commit()
+                samples = defaultdict(list)
+                cursor = conn.execute(stmt_get_individual_cost_samples(), (individual_id,))
+                for row in cursor:
+                    samples[row[0] - self.__base_gen + 1].append((row[1], row[2]))
+                cursor.close()
+                conn.commit()
+
+            for generation, generation_samples in samples.items():
+                data._set_samples(generation, generation_samples)
 
             return data
 
@@ -254,64 +370,125 @@ class SQLiteRepository(MLCRepository):
 
     def get_individuals_data(self):
         indiv_data_dict = {}
-        conn = self.__get_db_connection()
-        cursor = conn.execute(stmt_get_individuals_data())
+        with self.__db_connection() as conn:
+            values = dict((row[0], str(row[1])) for row in conn.execute(stmt_get_individual_values()))
+            cursor = conn.execute(stmt_get_individuals_data())
+
+            for row in cursor:
+                indiv_id = row[0]
+                if indiv_id not in indiv_data_dict:
+                    data = IndividualData(values[indiv_id])
+                    indiv_data_dict[indiv_id] = data
 
-        for row in cursor:
-            indiv_id = row[0]
-            if indiv_id not in indiv_data_dict:
-                data = IndividualData(self.__individuals[indiv_id].get_value())
-                indiv_data_dict[indiv_id] = data
+                indiv_data_dict[indiv_id]._add_data(row[1], row[2], row[3])
+            cursor.close()
 
-            indiv_data_dict[indiv_id]._add_data(row[1], row[2], row[3])
+            samples = defaultdict(list)
+            cursor = conn.execute(stmt_get_cost_samples())
+            for row in cursor:
+                samples[(row[0], row[1])].append((row[2], row[3]))
+            cursor.close()
+            conn.commit()
 
-        cursor.close()
-        conn.commit()
+        for (indiv_id, generation), generation_samples in samples.items():
+            indiv_data_dict[indiv_id]._set_samples(generation, generation_samples)
         return indiv_data_dict
 
     def count_individual(self):
-        return len(self.__individuals)
+        return len(self._hashlist)
 
     # special methods
     def update_individual_cost(self, individual_id, cost, evaluation_time, generation=-1):
-        stmt_to_update_cost = None
+        self.update_individual_costs([(individual_id, cost, evaluation_time)], generation)
 
+    def update_individual_costs(self, costs, generation=-1):
+        """
+        Update the costs of many individuals in a single transaction. costs is a list of
+        tuples (individual_id, cost, evaluation_time)
+        """
         if generation == -1:
-            stmt_to_update_cost = stmt_update_all_costs(individual_id, cost, evaluation_time)
+            statement = stmt_update_all_costs()
+            rows = [(cost, evaluation_time, individual_id) for individual_id, cost, evaluation_time in costs]
         else:
-            stmt_to_update_cost = stmt_update_cost(individual_id, cost,
-                                                   evaluation_time,
-                                                   generation + self.__base_gen - 1)
-
-        logger.debug("[SQLITE_REPO] [UPDATE_INDIV_COST] - Query executed: {0}"
-                     .format(stmt_to_update_cost))
-        self.__execute(stmt_to_update_cost)
-
-    def __execute(self, statement):
-        # print ">>> %s" % statement
-        conn = self.__get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(statement)
-        cursor.close()
-        conn.commit()
+            statement = stmt_update_cost()
+            gen_id = generation + self.__base_gen - 1
+            rows = [(cost, evaluation_time, individual_id, gen_id) for individual_id, cost, evaluation_time in costs]
+
+        logger.debug("[SQLITE_REPO] [UPDATE_INDIV_COSTS] - Query executed: {0} - Rows: {1}"
+                     .format(statement, len(rows)))
+        with self.__transaction() as cursor:
+            cursor.executemany(statement, rows)
+
+        if generation == -1:
+            self.__forget_populations(lambda gen_id: True)
+        else:
+            self.__forget_populations(lambda gen_id: gen_id == generation + self.__base_gen - 1)
+
+    def add_evaluation_event(self, individual_id, event, attempt, duration):
+        # The event belongs to the population being evaluated, the next one to be added
+        next_gen_id = self.__base_gen + self.__generations
+        self.__execute(stmt_insert_evaluation_event(),
+                       (next_gen_id, individual_id, event, attempt, duration, time.time()))
+
+    def get_evaluation_events(self, individual_id=None):
+        """
+        Return the evaluations that didn't finish as a list of tuples
+        (generation, individual_id, event, attempt, duration, evaluation_time)
+        """
+        if individual_id is None:
+            statement, parameters = stmt_get_evaluation_events(), ()
+        else:
+            statement, parameters = stmt_get_individual_evaluation_events(), (individual_id,)
+
+        events = []
+        with self.__db_connection() as conn:
+            cursor = conn.execute(statement, parameters)
+            for row in cursor:
+                events.append((row[0] - self.__base_gen + 1, row[1], row[2], row[3], row[4], row[5]))
+            cursor.close()
+            conn.commit()
+        return events
+
+    def __execute(self, statement, parameters=()):
+        with self.__transaction() as cursor:
+            cursor.execute(statement, parameters)
         return cursor.lastrowid
 
+    def __execute_all(self, statements, parameters=()):
+        # Execute the statements in a single transaction
+        with self.__transaction() as cursor:
+            for statement in statements:
+                cursor.execute(statement, parameters)
+
     def _get_generations(self):
         generations = []
-        conn = self.__get_db_connection()
-        cursor = conn.execute(stmt_get_generations())
-        for row in cursor:
-            generations.append(int(row[0]))
-        cursor.close()
-        conn.commit()
+        with self.__db_connection() as conn:
+            cursor = conn.execute(stmt_get_generations())
+            for row in cursor:
+                generations.append(int(row[0]))
+            cursor.close()
+            conn.commit()
         return sorted(generations)
 
     def __load_population(self, generation):
-        i = 0
+        with self.__populations_lock:
+            rows = self.__populations.get(generation)
+            version = self.__populations_version
+
+        if rows is None:
+            with self.__db_connection() as conn:
+                cursor = conn.execute(stmt_get_individuals_from_population(), (generation,))
+                rows = tuple(tuple(row) for row in cursor)
+                cursor.close()
+                conn.commit()
+
+            with self.__populations_lock:
+                if version == self.__populations_version:
+                    self.__populations[generation] = rows
+
+        # The rows are shared, every call returns a new Population
         population = Simulation.create_empty_population_for(generation)
-        conn = self.__get_db_connection()
-        cursor = conn.execute(stmt_get_individuals_from_population(generation))
-        for row in cursor:
+        for i, row in enumerate(rows):
             population._individuals[i] = row[0]
             population._costs[i] = row[1]
             population._ev_time[i] = row[2]
@@ -322,56 +499,49 @@ class SQLiteRepository(MLCRepository):
             else:
                 population._parents[i] = []
 
-            i += 1
-        cursor.close()
-        conn.commit()
         return population
 
-    def __load_individuals(self):
-        individuals = {}
-        conn = self.__get_db_connection()
-        cursor = conn.execute(stmt_get_all_individuals())
+    def __load_hashes(self):
+        hashes = {}
+        with self.__db_connection() as conn:
+            cursor = conn.execute(stmt_get_individual_hashes())
 
-        for row in cursor:
-            new_individual = Individual(str(row[1]), SQLSaveFormal.from_sql(row[2]), row[3])
-            individuals[row[0]] = new_individual
+            for row in cursor:
+                hashes[str(row[1])] = row[0]
 
-        cursor.close()
-        conn.commit()
-        return individuals
+            cursor.close()
+            conn.commit()
+        return hashes
 
     # board configuration
     def save_board_configuration(self, board_config, board_id=None):
 
-        conn = self.__get_db_connection()
-        cursor = conn.cursor()
-
-        try:
+        with self.__transaction() as cursor:
             # save/update board configuration
             if board_id is None:
-                cursor.execute(stmt_insert_board(board_config.board_type["SHORT_NAME"],
-                                                 0, # serial connection hardcoded
-                                                 board_config.read_count,
-                                                 board_config.read_delay,
-                                                 board_config.report_mode,
-                                                 board_config.analog_resolution))
+                cursor.execute(stmt_insert_board(), (board_config.board_type["SHORT_NAME"],
+                                                     0, # serial connection hardcoded
+                                                     board_config.read_count,
+                                                     board_config.read_delay,
+                                                     board_config.report_mode,
+                                                     board_config.analog_resolution))
                 board_id = cursor.lastrowid
             else:
-                cursor.execute(stmt_update_board(board_id,
-                                                 board_config.board_type["SHORT_NAME"],
-                                                 0,
-                                                 board_config.read_count,
-                                                 board_config.read_delay,
-                                                 board_config.report_mode,
-                                                 board_config.analog_resolution))
+                cursor.execute(stmt_update_board(), (board_config.board_type["SHORT_NAME"],
+                                                     0,
+                                                     board_config.read_count,
+                                                     board_config.read_delay,
+                                                     board_config.report_mode,
+                                                     board_config.analog_resolution,
+                                                     board_id))
                 if cursor.rowcount < 1:
                     raise KeyError("Board %s does not exist" % board_id)
 
             # if board update is successful, update board pins
             # delete board pin configuration
-            cursor.execute(stmt_delete_digital_pin(board_id))
-            cursor.execute(stmt_delete_analog_pin(board_id))
-            cursor.execute(stmt_delete_pwm_pin(board_id))
+            cursor.execute(stmt_delete_digital_pin(), (board_id,))
+            cursor.execute(stmt_delete_analog_pin(), (board_id,))
+            cursor.execute(stmt_delete_pwm_pin(), (board_id,))
 
             # update digital pins
             self.__insert_pins(board_config.digital_input_pins, cursor, stmt_insert_digital_pin, board_id, 0)
@@ -382,20 +552,12 @@ class SQLiteRepository(MLCRepository):
             self.__insert_pins(board_config.analog_output_pins, cursor, stmt_insert_analog_pin, board_id, 1)
 
             # update pwm pins
-            for pin_id in board_config.pwm_pins:
-                cursor.execute(stmt_insert_pwm_pin(board_id, pin_id))
-
-        except Exception:
-            raise
-        finally:
-            cursor.close()
-            conn.commit()
+            cursor.executemany(stmt_insert_pwm_pin(), [(pin_id, board_id) for pin_id in board_config.pwm_pins])
 
         return board_id
 
     def __insert_pins(self, pin_list, cursor, stmt_insert_pin, board_id, pin_type):
-        for pin_id in pin_list:
-            cursor.execute(stmt_insert_pin(board_id, pin_id, pin_type))
+        cursor.executemany(stmt_insert_pin(), [(pin_id, board_id, pin_type) for pin_id in pin_list])
 
     def __get_pins(self, cursor, stmt_get_pins, board_id):
         input_pins = []
@@ -411,97 +573,90 @@ class SQLiteRepository(MLCRepository):
 
     def get_board_configuration_ids(self):
         board_ids = []
-        conn = self.__get_db_connection()
-        cursor = conn.execute(stmt_get_board_configuration_ids())
-        for row in cursor:
-            board_ids.append(row[0])
-        cursor.close()
+        with self.__db_connection() as conn:
+            cursor = conn.execute(stmt_get_board_configuration_ids())
+            for row in cursor:
+                board_ids.append(row[0])
+            cursor.close()
         return board_ids
 
     def load_board_configuration(self, board_id):
         protocol = None
-        conn = self.__get_db_connection()
-        cursor = conn.execute(stmt_get_board(board_id))
+        with self.__db_connection() as conn:
+            cursor = conn.execute(stmt_get_board(board_id))
 
-        for row in cursor:
-            board_type = filter(lambda x: x["SHORT_NAME"] == row[0], types)
+            for row in cursor:
+                board_type = filter(lambda x: x["SHORT_NAME"] == row[0], types)
 
-            protocol = ProtocolConfig(connection=None,
-                                      board_type=board_type[0],
-                                      report_mode=row[1],
-                                      read_count=row[2],
-                                      read_delay=row[3],
-                                      analog_resolution=row[4])
-            break
+                protocol = ProtocolConfig(connection=None,
+                                          board_type=board_type[0],
+                                          report_mode=row[1],
+                                          read_count=row[2],
+                                          read_delay=row[3],
+                                          analog_resolution=row[4])
+                break
 
-        if protocol is None:
-            raise KeyError("Board %s dows not exists" % board_id)
+            if protocol is None:
+                raise KeyError("Board %s dows not exists" % board_id)
 
-        # load pins
-        input_pins, output_pins = self.__get_pins(cursor, stmt_get_analog_pins, board_id)
-        protocol.analog_input_pins.extend(input_pins)
-        protocol.analog_output_pins.extend(output_pins)
+            # load pins
+            input_pins, output_pins = self.__get_pins(cursor, stmt_get_analog_pins, board_id)
+            protocol.analog_input_pins.extend(input_pins)
+            protocol.analog_output_pins.extend(output_pins)
 
-        input_pins, output_pins = self.__get_pins(cursor, stmt_get_digital_pins, board_id)
-        protocol.digital_input_pins.extend(input_pins)
-        protocol.digital_output_pins.extend(output_pins)
+            input_pins, output_pins = self.__get_pins(cursor, stmt_get_digital_pins, board_id)
+            protocol.digital_input_pins.extend(input_pins)
+            protocol.digital_output_pins.extend(output_pins)
 
-        for row in cursor.execute(stmt_get_pwm_pins(board_id)):
-            protocol.pwm_pins.append(row[0])
+            for row in cursor.execute(stmt_get_pwm_pins(board_id)):
+                protocol.pwm_pins.append(row[0])
 
-        cursor.close()
+            cursor.close()
 
         return protocol
 
     def save_serial_connection(self, serial_connection, board_id, connection_id=None):
-        conn = self.__get_db_connection()
-        cursor = conn.cursor()
-
         try:
-            # save/update board configuration
-            if connection_id is None:
-                cursor.execute(stmt_insert_serial_connection(board_id,
-                                                             serial_connection.port,
-                                                             serial_connection.baudrate,
-                                                             serial_connection.parity,
-                                                             serial_connection.stopbits,
-                                                             serial_connection.bytesize))
-                connection_id = cursor.lastrowid
-            else:
-                cursor.execute(stmt_update_serial_connection(connection_id,
-                                                             board_id,
-                                                             serial_connection.port,
-                                                             serial_connection.baudrate,
-                                                             serial_connection.parity,
-                                                             serial_connection.stopbits,
-                                                             serial_connection.bytesize))
-                if cursor.rowcount < 1:
-                    raise KeyError("Connection %s does not exist" % board_id)
+            with self.__transaction() as cursor:
+                # save/update board configuration
+                if connection_id is None:
+                    cursor.execute(stmt_insert_serial_connection(), (board_id,
+                                                                     serial_connection.port,
+                                                                     serial_connection.baudrate,
+                                                                     serial_connection.parity,
+                                                                     serial_connection.stopbits,
+                                                                     serial_connection.bytesize))
+                    connection_id = cursor.lastrowid
+                else:
+                    cursor.execute(stmt_update_serial_connection(), (board_id,
+                                                                     serial_connection.port,
+                                                                     serial_connection.baudrate,
+                                                                     serial_connection.parity,
+                                                                     serial_connection.stopbits,
+                                                                     serial_connection.bytesize,
+                                                                     connection_id))
+                    if cursor.rowcount < 1:
+                        raise KeyError("Connection %s does not exist" % board_id)
         except sqlite3.IntegrityError:
             raise KeyError("Board %s does not exist" % board_id)
-        except Exception:
-            raise
-        finally:
-            cursor.close()
-            conn.commit()
 
         return connection_id
 
     def load_serial_connection(self, board_id):
         serial_connection = None
 
-        conn = self.__get_db_connection()
-        cursor = conn.execute(stmt_get_serial_connection(board_id))
+        with self.__db_connection() as conn:
+            cursor = conn.execute(stmt_get_serial_connection(board_id))
 
-        for row in cursor:
-            serial_connection = SerialConnectionConfig(port=row[0],
-                                                       baudrate=row[1],
-                                                       parity=row[2],
-                                                       stopbits=row[3],
-                                                       bytesize=row[4])
-            break
-
-        if serial_connection is None:
-            raise KeyError("Serial Connectio %s doess not exists" % board_id)
+            for row in cursor:
+                serial_connection = SerialConnectionConfig(port=row[0],
+                                                           baudrate=row[1],
+                                                           parity=row[2],
+                                                           stopbits=row[3],
+                                                           bytesize=row[4])
+                break
+
+            if serial_connection is None:
+                raise KeyError("Serial Connectio %s doess not exists" % board_id)
 
         return serial_connection
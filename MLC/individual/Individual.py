@@ -22,10 +22,10 @@
 import numpy as np
 import math
 
-from collections import Counter
 from MLC.mlc_parameters.mlc_parameters import Config
 from MLC.Common.Operations import Operations
 from MLC.Common.LispTreeExpr.LispTreeExpr import LispTreeExpr
+from MLC.Common.LispTreeExpr.LispTreeExpr import TreeVisitor
 from MLC.Common.RandomManager import RandomManager
 from MLC.Common.PreevaluationManager import PreevaluationManager
 
@@ -104,8 +104,16 @@ class Individual(object):
         # _tree property. Use self._tree instead of self._lazy_tree to
         # obtain the tree expression.
         self._lazy_tree = None
+        # Compact form of the tree and the function compiled from it, kept when the nodes
+        # of the tree are released
+        self._compact_tree = None
+        self._compiled_expression = None
         self._value = value
 
+        # Expression batch (and position in it) used to calculate the expression of the tree
+        self._expression_batch = None
+        self._batch_position = None
+
         if formal is not None and complexity is not None:
             self._formal = formal
             self._complexity = complexity
@@ -114,23 +122,60 @@ class Individual(object):
             self._complexity = self._tree.complexity()
             self._value = self._tree.get_expanded_tree_as_string()
 
-        self._range = self._config.getint("POPULATION", "range")
-        self._precision = self._config.getint("POPULATION", "precision")
+        parameters = self._config.parameters()
+        self._range = parameters.range
+        self._precision = parameters.precision
+
+    @staticmethod
+    def from_tree(tree):
+        """
+        Create an individual over an already built tree, avoiding to parse its value again
+        """
+        individual = Individual(tree.get_expanded_tree_as_string(), tree.formal(), tree.complexity())
+        individual._lazy_tree = tree
+        return individual
 
     @property
     def _tree(self):
         if self._lazy_tree is None:
-            self._lazy_tree = LispTreeExpr(self.get_value())
+            if self._compact_tree is None:
+                self._lazy_tree = LispTreeExpr(self.get_value())
+            else:
+                self._lazy_tree = LispTreeExpr.from_compact(self._compact_tree)
+            self._lazy_tree._compiled_expression = self._compiled_expression
+            self._lazy_tree.set_expression_batch(self._expression_batch, self._batch_position)
         return self._lazy_tree
 
+    def set_expression_batch(self, expression_batch, position=None):
+        self._expression_batch = expression_batch
+        self._batch_position = position
+        if self._lazy_tree is not None:
+            self._lazy_tree.set_expression_batch(expression_batch, position)
+
+    def compact(self):
+        """
+        Release the nodes of the tree keeping it in its compact form. The tree is built
+        again from the compact form, without parsing the value, when it is needed. The
+        expression compiled from the tree is kept, so it isn't compiled again
+        """
+        if self._lazy_tree is None:
+            return
+
+        if self._lazy_tree._compiled_expression is not None:
+            self._compiled_expression = self._lazy_tree._compiled_expression
+
+        # Expressions without a root node are parsed again from the value
+        if self._compact_tree is None and not self._lazy_tree.get_root_node().is_leaf():
+            self._compact_tree = self._lazy_tree.to_compact()
+        self._lazy_tree = None
+
     @staticmethod
     def set_maxdepthfirst(value):
         Individual._maxdepthfirst = value
 
     def mutate(self, mutation_type=MutationType.ANY):
         try:
-            new_value = self.__mutate_tree(mutation_type)
-            return Individual(new_value)
+            return self.__mutate_tree(mutation_type)
 
         except TreeException, ex:
             raise OperationOverIndividualFail(self._value, "MUTATE", str(ex))
@@ -141,9 +186,7 @@ class Individual(object):
             [NEW_IND1,NEW_IND2,FAIL]=CROSSOVER(MLCIND1,MLCIND2,MLC_PARAMETERS)
         """
         try:
-            new_value_1, new_value_2 = self.__crossover_tree(other_individual)
-            indiv1 = Individual(new_value_1)
-            indiv2 = Individual(new_value_2)
+            indiv1, indiv2 = self.__crossover_tree(other_individual)
 
             # Check if the individual is valid
             preev_function = PreevaluationManager.get_callback()
@@ -154,7 +197,7 @@ class Individual(object):
                 preev_function = PreevaluationManager.get_callback()
                 success = preev_function.preev(indiv1) and preev_function.preev(indiv2)
 
-            return Individual(new_value_1), Individual(new_value_2), not success
+            return indiv1, indiv2, not success
 
         except TreeException, ex:
             raise OperationOverIndividualFail(self._value, "CROSSOVER", str(ex))
@@ -186,11 +229,12 @@ class Individual(object):
             another tree (with depth that can fit into maxdepth).
             Then interchange the two subtrees inputs:
 
-            :return: (first new tree, second new tree) as strings
+            :return: (first new individual, second new individual)
         """
-        maxtries = self._config.getint("GP", "maxtries")
-        mutmindepth = self._config.getint("GP", "mutmindepth")
-        maxdepth = self._config.getint("GP", "maxdepth")
+        parameters = self._config.parameters()
+        maxtries = parameters.maxtries
+        mutmindepth = parameters.mutmindepth
+        maxdepth = parameters.maxdepth
 
         correct = False
         count = 0
@@ -198,8 +242,8 @@ class Individual(object):
         while not correct and count < maxtries:
             try:
                 # Extracting subtrees
-                value_1, sm1, n = self.__extract_subtree(self.get_tree(), mutmindepth, maxdepth, maxdepth)
-                value_2, sm2, _ = self.__extract_subtree(other_individual.get_tree(), mutmindepth, n, maxdepth - n + 1)
+                node_1, n = self.__extract_subtree(self.get_tree(), mutmindepth, maxdepth, maxdepth)
+                node_2, _ = self.__extract_subtree(other_individual.get_tree(), mutmindepth, n, maxdepth - n + 1)
                 correct = True
 
             except TreeException, ex:
@@ -212,17 +256,18 @@ class Individual(object):
                                 "substitution {0} tests".format(maxtries))
 
         # Replacing subtrees
-        value_1 = value_1.replace('@', sm2)
-        value_2 = value_2.replace('@', sm1)
+        tree_1 = self.get_tree().replace_subtree(node_1, node_2)
+        tree_2 = other_individual.get_tree().replace_subtree(node_2, node_1)
 
-        return value_1, value_2
+        return Individual.from_tree(tree_1), Individual.from_tree(tree_2)
 
     def __mutate_tree(self, mutation_type):
-        mutmindepth = self._config.getint("GP", "mutmindepth")
-        maxdepth = self._config.getint("GP", "maxdepth")
-        sensor_spec = self._config.getboolean("POPULATION", "sensor_spec")
-        sensors = self._config.getint("POPULATION", 'sensors')
-        mutation_types = self._config.get_list("GP", 'mutation_types')
+        parameters = self._config.parameters()
+        mutmindepth = parameters.mutmindepth
+        maxdepth = parameters.maxdepth
+        sensor_spec = parameters.sensor_spec
+        sensors = parameters.sensors
+        mutation_types = parameters.mutation_types
 
         # equi probability for each mutation type selected.
         if mutation_type == Individual.MutationType.ANY:
@@ -230,59 +275,63 @@ class Individual(object):
             mutation_type = mutation_types[int(np.floor(rand_number * len(mutation_types)))]
 
         if mutation_type in [Individual.MutationType.REMOVE_SUBTREE_AND_REPLACE, Individual.MutationType.SHRINK]:
-            new_individual_value = None
+            new_individual = None
             preevok = False
             while not preevok:
                 # remove subtree and grow new subtree
                 try:
-                    subtree, _, _ = self.__extract_subtree(self._tree, mutmindepth, maxdepth, maxdepth)
+                    node, _ = self.__extract_subtree(self._tree, mutmindepth, maxdepth, maxdepth)
                     if mutation_type == Individual.MutationType.REMOVE_SUBTREE_AND_REPLACE:
                         next_individual_type = 0
                     else:
                         next_individual_type = 4
 
-                    new_individual_value = Individual.__generate_indiv_regressive_tree(subtree, self._config, next_individual_type)
+                    # The new subtree grows from the depth of the parent of the removed one
+                    subtree = Individual.__generate_indiv_regressive_tree(self._config,
+                                                                          next_individual_type,
+                                                                          node.get_depth() - 1)
+
+                    if sensor_spec:
+                        config_sensor_list = sorted(parameters.sensor_list)
+                    else:
+                        config_sensor_list = range(sensors - 1, -1, -1)
 
-                    if new_individual_value:
-                        if sensor_spec:
-                            config_sensor_list = sorted(self._config.get_list('POPULATION', 'sensor_list'))
-                        else:
-                            config_sensor_list = range(sensors - 1, -1, -1)
+                    for i in range(len(config_sensor_list)):
+                        subtree = subtree.replace("z%d" % i, "S%d" % config_sensor_list[i])
 
-                        for i in range(len(config_sensor_list)):
-                            new_individual_value = new_individual_value.replace("z%d" % i, "S%d" % config_sensor_list[i])
+                    new_tree = self._tree.replace_subtree(node, LispTreeExpr.parse_subtree(subtree))
+                    new_individual = Individual.from_tree(new_tree)
 
-                        # Preevaluate the Individual
-                        preevok = self._preevaluate_individual(new_individual_value)
-                    else:
-                        raise TreeException()
+                    # Preevaluate the Individual
+                    preevok = self._preevaluate_individual(new_individual)
 
                 except TreeException:
                     raise TreeException("[MUTATE_TREE] A non subtractable Individual was generated. "
                                         "Individual: {0}".format(self._tree.get_expanded_tree_as_string()))
 
-            return new_individual_value
+            return new_individual
 
         elif mutation_type == Individual.MutationType.REPARAMETRIZATION:
-            new_individual_value = None
+            new_individual = None
             preevok = False
             while not preevok:
-                new_individual_value = self.__reparam_tree(LispTreeExpr(self.get_value()))
-                preevok = self._preevaluate_individual(new_individual_value)
+                new_individual = Individual.from_tree(self.__reparam_tree(self._tree))
+                preevok = self._preevaluate_individual(new_individual)
 
-            return new_individual_value
+            return new_individual
 
         elif mutation_type == Individual.MutationType.HOIST:
+            new_individual = None
             preevok = False
             counter = 0
-            maxtries = self._config.getint("GP", "maxtries")
+            maxtries = parameters.maxtries
 
             while not preevok and counter < maxtries:
                 counter += 1
-                controls = self._config.getint("POPULATION", "controls")
+                controls = parameters.controls
                 prob_threshold = 1 / float(controls)
 
-                cl = [stree.to_string() for stree in self.get_tree().get_root_node()._nodes]
+                cl = list(self.get_tree().get_root_node().get_children())
 
                 changed = False
                 k = 0
@@ -293,46 +342,43 @@ class Individual(object):
                     if (RandomManager.rand() < prob_threshold) or (k == controls and not changed):
 
                         try:
-                            _, sm, _ = self.__extract_subtree(LispTreeExpr('(root ' + cl[nc - 1] + ')'),
-                                                              mutmindepth + 1,
-                                                              maxdepth,
-                                                              maxdepth + 1)
-                            cl[nc - 1] = sm
+                            cl[nc - 1], _ = self.__extract_subtree(self._tree,
+                                                                   mutmindepth + 1,
+                                                                   maxdepth,
+                                                                   maxdepth + 1,
+                                                                   control=cl[nc - 1])
                             changed = True
 
                         except TreeException:
                             changed = False
 
-                new_individual_value = "(root %s)" % " ".join(cl[:controls])
-                preevok = self._preevaluate_individual(new_individual_value)
+                new_individual = Individual.from_tree(LispTreeExpr.from_controls(cl[:controls]))
+                preevok = self._preevaluate_individual(new_individual)
 
             if counter == maxtries:
                 raise TreeException("[MUTATE HOIST] Candidate could not found a "
                                     "substitution {0} tests".format(maxtries))
 
-            return new_individual_value
+            return new_individual
         else:
             raise NotImplementedError("Mutation type %s not implemented" % mutation_type)
 
-    def __extract_subtree(self, expression_tree, mindepth, subtreedepthmax, maxdepth):
-        candidates = []
-        for node in expression_tree.internal_nodes():
-            if mindepth <= node.get_depth() <= maxdepth:
-                if node.get_subtreedepth() <= subtreedepthmax:
-                    candidates.append(node)
+    def __extract_subtree(self, expression_tree, mindepth, subtreedepthmax, maxdepth, control=None):
+        """
+        Choose randomly one of the internal nodes of the tree between the depths given. If a
+        control is given, only the nodes of that control are candidates.
 
+        :return: (extracted node, subtree depth of the node)
+        """
+        candidates = expression_tree.subtree_candidates(mindepth, maxdepth, subtreedepthmax, control)
         if not candidates:
             raise TreeException("No subtrees to extract from '%s' "
                                 "with mindepth=%s, maxdepth=%s, subtreedepthmax=%s" %
                                 (expression_tree, mindepth, maxdepth, subtreedepthmax))
 
-        candidates.sort(key=lambda x: x.get_expr_index(), reverse=False)
         n = int(np.ceil(RandomManager.rand() * len(candidates))) - 1
         extracted_node = candidates[n]
-        index = extracted_node.get_expr_index()
-        old_value = expression_tree.get_expanded_tree_as_string()
-        new_value = old_value[:index] + old_value[index:].replace(extracted_node.to_string(), '@', 1)
-        return new_value, extracted_node.to_string(), extracted_node.get_subtreedepth()
+        return extracted_node, extracted_node.get_subtreedepth()
 
     def __reparam_tree(self, tree_expression):
         def leaf_value_generator():
@@ -342,10 +388,19 @@ class Individual(object):
         return self.__change_const_tree(tree_expression, leaf_value_generator)
 
     def __change_const_tree(self, tree_expression, leaf_value_generator):
-        for leaf in tree_expression.leaf_nodes():
-            if not leaf.is_sensor():
-                leaf._arg = leaf_value_generator()
-        return tree_expression.get_expanded_tree_as_string()
+        """
+        Return a new tree with the constants of the given one changed. The tree is not modified
+        """
+        class ChangeConstantsVisitor(TreeVisitor):
+
+            def visit_leaf_node(self, node):
+                if not node.is_sensor():
+                    # FIXME: Don't like it. They should be private arguments
+                    node._arg = leaf_value_generator()
+
+        root = tree_expression.get_root_node().clone()
+        root.accept(ChangeConstantsVisitor())
+        return LispTreeExpr(root_node=root)
 
     def __str__(self):
         return "value: %s\n" % self.get_value() + \
@@ -363,10 +418,15 @@ class Individual(object):
         """
         value = None
         if rhs_value is None:
-            controls = config.getint('POPULATION', 'controls')
-            value = '(root%s)' % (' @' * controls)
+            controls = config.parameters().controls
+            value = '(root'
             for i in range(controls):
-                value = Individual.__generate_indiv_regressive_tree(value, config, individual_type)
+                # Every control grows from the root, and the ones after it are still to be generated
+                value += ' ' + Individual.__generate_indiv_regressive_tree(config,
+                                                                         individual_type,
+                                                                         begin_depth=1,
+                                                                         seeds_after=i < controls - 1)
+            value += ')'
         else:
             value = rhs_value
 
@@ -374,10 +434,16 @@ class Individual(object):
         return Individual(value)
 
     @staticmethod
-    def __generate_indiv_regressive_tree(value, config, indiv_type):
+    def __generate_indiv_regressive_tree(config, indiv_type, begin_depth, seeds_after=False):
+        """
+        Generate randomly the value of a subtree. Sensors are named 'z<sensor number>'.
+
+        :param begin_depth: amount of opened brackets before the subtree (the depth of the seed)
+        :param seeds_after: True if there are other subtrees to generate after this one
+        """
+        parameters = config.parameters()
         min_depth = 0
         max_depth = 0
-        new_value = ""
 
         # Maxdepthfirst change while we are creating the first population
         if indiv_type:
@@ -385,87 +451,77 @@ class Individual(object):
                 min_depth = Individual._maxdepthfirst
                 max_depth = Individual._maxdepthfirst
             elif indiv_type == 2 or indiv_type == 3:
-                min_depth = int(config.get('GP', 'mindepth'))
+                min_depth = parameters.mindepth
                 max_depth = Individual._maxdepthfirst
             elif indiv_type == 4:
-                min_depth = int(config.get('GP', 'mindepth'))
+                min_depth = parameters.mindepth
                 max_depth = 1
             else:
-                min_depth = int(config.get('GP', 'mindepth'))
-                max_depth = int(config.get('GP', 'maxdepth'))
+                min_depth = parameters.mindepth
+                max_depth = parameters.maxdepth
 
         else:
-            min_depth = int(config.get('GP', 'mindepth'))
-            max_depth = int(config.get('GP', 'maxdepth'))
-
-        # Check if the seed character is in the string
-        index = value.find('@')
-        if index == -1:
-            return None
+            min_depth = parameters.mindepth
+            max_depth = parameters.maxdepth
 
-        # Split the value in two strings, not containing the first seed character
-        begin_str = value[:index]
-        end_str = value[index + 1:]
-
-        # Count the amounts of '(' until the first seed character (This is the depth of the seed)
-        counter = Counter(begin_str)
-        begin_depth = counter['('] - counter[')']
+        return Individual.__generate_regressive_subtree(config, indiv_type, min_depth, max_depth,
+                                                        begin_depth, seeds_after)
 
+    @staticmethod
+    def __generate_regressive_subtree(config, indiv_type, min_depth, max_depth, begin_depth, seeds_after):
+        parameters = config.parameters()
         leaf_node = False
         if begin_depth >= max_depth:
             leaf_node = True
-        elif (begin_depth < min_depth and end_str.find(
-                '@') == -1) or indiv_type == 3:
+        elif (begin_depth < min_depth and not seeds_after) or indiv_type == 3:
             leaf_node = False
         else:
-            leaf_node = RandomManager.rand() < config.getfloat(
-                'POPULATION', 'leaf_prob')
+            leaf_node = RandomManager.rand() < parameters.leaf_prob
 
         if leaf_node:
-            use_sensor = RandomManager.rand() < config.getfloat(
-                'POPULATION', 'sensor_prob')
+            use_sensor = RandomManager.rand() < parameters.sensor_prob
             if use_sensor:
-                sensor_number = math.ceil(RandomManager.rand() * config.getint('POPULATION', 'sensors')) - 1
-                new_value = begin_str + 'z' + str(sensor_number).rstrip('0').rstrip('.') + end_str
+                sensor_number = math.ceil(RandomManager.rand() * parameters.sensors) - 1
+                return 'z' + str(sensor_number).rstrip('0').rstrip('.')
             else:
-                range = config.getfloat('POPULATION', 'range')
-                precision = config.get('POPULATION', 'precision')
                 # Generate a float number between -range and +range with a precision of 'precision'
-                new_exp = (("%." + precision + "f") % (
-                    (RandomManager.rand() - 0.5) * 2 * range))
-                new_value = begin_str + new_exp + end_str
+                return "%.*f" % (parameters.precision,
+                                 (RandomManager.rand() - 0.5) * 2 * parameters.range)
+
+        # Create a node. The arguments are generated from left to right
+        op_num = math.ceil(RandomManager.rand() * Operations.get_instance().length())
+        op = Operations.get_instance().get_operation_from_op_num(op_num)
+        if (op["nbarg"] == 1):
+            arg = Individual.__generate_regressive_subtree(config, indiv_type, min_depth, max_depth,
+                                                           begin_depth + 1, seeds_after)
+            return '(' + op["op"] + ' ' + arg + ')'
         else:
-            # Create a node
-            op_num = math.ceil(RandomManager.rand() * Operations.get_instance().length())
-            op = Operations.get_instance().get_operation_from_op_num(op_num)
-            if (op["nbarg"] == 1):
-                new_value = begin_str + '(' + op["op"] + ' @)' + end_str
-                new_value = Individual.__generate_indiv_regressive_tree(new_value, config, indiv_type)
-            else:
-                # nbrag == 2
-                new_value = begin_str + '(' + op["op"] + ' @ @)' + end_str
-                new_value = Individual.__generate_indiv_regressive_tree(new_value, config, indiv_type)
-                new_value = Individual.__generate_indiv_regressive_tree(new_value, config, indiv_type)
-        return new_value
+            # nbrag == 2
+            arg_1 = Individual.__generate_regressive_subtree(config, indiv_type, min_depth, max_depth,
+                                                             begin_depth + 1, True)
+            arg_2 = Individual.__generate_regressive_subtree(config, indiv_type, min_depth, max_depth,
+                                                             begin_depth + 1, seeds_after)
+            return '(' + op["op"] + ' ' + arg_1 + ' ' + arg_2 + ')'
 
     def _preevaluate_individual(self, new_indiv):
         preev_function = PreevaluationManager.get_callback()
         if preev_function is not None:
-            return preev_function.preev(Individual(new_indiv))
+            return preev_function.preev(new_indiv)
         else:
             return True
 
     @staticmethod
     def __simplify_and_sensors_tree(value, config):
+        parameters = config.parameters()
         sensor_list = ()
         replace_list = ()
 
-        if config.getboolean('POPULATION', 'sensor_spec'):
-            config_sensor_list = sorted(config.get_list('POPULATION', 'sensor_list'))
+        if parameters.sensor_spec:
+            config_sensor_list = sorted(parameters.sensor_list)
             sensor_list = ['S' + str(x) for x in config_sensor_list]
             replace_list = ['z' + str(x) for x in range(len(config_sensor_list))]
         else:
-            amount_sensors = config.getint('POPULATION', 'sensors')
+            amount_sensors = parameters.sensors
             # Replace the available sensors in the individual expression
             sensor_list = ['S' + str(x) for x in range(amount_sensors)]
             replace_list = ['z' + str(x) for x in range(amount_sensors)]
@@ -473,7 +529,7 @@ class Individual(object):
         for i in range(len(replace_list)):
             value = value.replace(replace_list[i], sensor_list[i])
 
-        if config.getboolean('OPTIMIZATION', 'simplify'):
+        if parameters.simplify:
             return LispTreeExpr(value).get_simplified_tree_as_string()
 
         return value
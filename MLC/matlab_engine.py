@@ -39,8 +39,6 @@ class MatlabEngine:
     def engine():
         if MatlabEngine._engine_instance is None:
             lg.logger_.info("[MATLAB_ENGINE] Loading MATLAB environment. Please wait...")
-            matlab_code_dir = mlcv3_config.get_matlab_path()
-
             # Check if a MATLAB session exists.
             try:
                 sessions = matlab.engine.find_matlab()
@@ -53,9 +51,25 @@ class MatlabEngine:
                 # Init the MATLAB engine in the regular way
                 MatlabEngine._engine_instance = matlab.engine.start_matlab()
 
-            MatlabEngine._engine_instance.addpath(matlab_code_dir)
-            MatlabEngine._engine_instance.addpath(os.path.join(matlab_code_dir, "MLC_tools"))
-            MatlabEngine._engine_instance.addpath(os.path.join(matlab_code_dir, "MLC_tools/Demo"))
+            MatlabEngine.add_mlc_paths(MatlabEngine._engine_instance)
             lg.logger_.info("[MATLAB_ENGINE] MATLAB environment loaded succesfully.")
 
         return MatlabEngine._engine_instance
+
+    @staticmethod
+    def start_session():
+        """
+        Start a new MATLAB session, not shared with the engine() one. Used by the
+        MatlabEnginePool
+        """
+        lg.logger_.info("[MATLAB_ENGINE] Starting a new MATLAB session. Please wait...")
+        session = matlab.engine.start_matlab()
+        MatlabEngine.add_mlc_paths(session)
+        return session
+
+    @staticmethod
+    def add_mlc_paths(engine):
+        matlab_code_dir = mlcv3_config.get_matlab_path()
+        engine.addpath(matlab_code_dir)
+        engine.addpath(os.path.join(matlab_code_dir, "MLC_tools"))
+        engine.addpath(os.path.join(matlab_code_dir, "MLC_tools/Demo"))
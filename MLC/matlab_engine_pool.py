@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import MLC.Log.log as lg
+import Queue
+import threading
+
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
+
+
+def matlab_session_factory():
+    """
+    Default factory of the pool, starts a new MATLAB session. MATLAB is imported here, so
+    the pool can be used with another factory where MATLAB is not installed
+    """
+    from MLC.matlab_engine import MatlabEngine
+    return MatlabEngine.start_session()
+
+
+class MatlabEnginePool(object):
+    """
+    Pool of MATLAB engine sessions that run the simulations in parallel. Sessions are
+    started by the factory the first time they are needed (or by warm_up) and prepared once
+    by setup(session), like opening a Simulink model. The factory may return any object
+    with the API of the MATLAB engine used by the evaluation scripts.
+    """
+    _factory = staticmethod(matlab_session_factory)
+
+    def __init__(self, size, setup=None, factory=None):
+        if size < 1:
+            raise ValueError("The pool needs at least one MATLAB session, size: {0}".format(size))
+
+        self._size = size
+        self._setup = setup
+        self._factory = factory or MatlabEnginePool._factory
+        self._free_sessions = Queue.Queue()
+        self._sessions = []
+        # sessions being started by the factory
+        self._starting = 0
+        self._sessions_lock = threading.Lock()
+        self._dispatcher = None
+
+    @staticmethod
+    def set_factory(factory):
+        """
+        Replace the factory of the sessions of the pools created from now on, None to
+        start MATLAB sessions again
+        """
+        MatlabEnginePool._factory = staticmethod(factory or matlab_session_factory)
+
+    def size(self):
+        return self._size
+
+    def count_sessions(self):
+        with self._sessions_lock:
+            return len(self._sessions)
+
+    def warm_up(self):
+        """
+        Start all the sessions of the pool at once, MATLAB takes a while to start
+        """
+        missing = self._reserve(self._size)
+        if missing > 0:
+            # Every session is freed as soon as it is ready, so the sessions already started
+            # are kept in the pool if another one fails to start
+            starter = ThreadPool(missing)
+            try:
+                starter.map(lambda _: self._free_sessions.put(self._start_session()), range(missing))
+            finally:
+                starter.close()
+
+    @contextmanager
+    def session(self):
+        """
+        Context manager that lends a free session, waiting for one when all are in use
+        """
+        session = self._acquire()
+        try:
+            yield session
+        finally:
+            self._free_sessions.put(session)
+
+    def map(self, function, items):
+        """
+        Return [function(session, item) for item in items], dispatching every item to a
+        free session
+        """
+        def run(item):
+            with self.session() as session:
+                return function(session, item)
+
+        if self._dispatcher is None:
+            self._dispatcher = ThreadPool(self._size)
+        return self._dispatcher.map(run, items, chunksize=1)
+
+    def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.close()
+            self._dispatcher.join()
+            self._dispatcher = None
+
+        with self._sessions_lock:
+            for session in self._sessions:
+                self._quit(session)
+            self._sessions = []
+
+        self._free_sessions = Queue.Queue()
+
+    def _acquire(self):
+        try:
+            return self._free_sessions.get_nowait()
+        except Queue.Empty:
+            pass
+
+        if self._reserve(1):
+            return self._start_session()
+
+        return self._free_sessions.get()
+
+    def _reserve(self, amount):
+        """
+        Reserve the place of up to amount sessions about to be started, return how many
+        """
+        with self._sessions_lock:
+            amount = min(amount, self._size - len(self._sessions) - self._starting)
+            self._starting += max(0, amount)
+            return max(0, amount)
+
+    def _start_session(self):
+        try:
+            session = self._factory()
+            if self._setup is not None:
+                try:
+                    self._setup(session)
+                except Exception:
+                    # The session is not in the pool yet, nobody else would close it
+                    self._quit(session)
+                    raise
+        finally:
+            with self._sessions_lock:
+                self._starting -= 1
+
+        with self._sessions_lock:
+            self._sessions.append(session)
+            lg.logger_.info("[MATLAB_POOL] MATLAB session {0}/{1} ready".format(len(self._sessions), self._size))
+        return session
+
+    def _quit(self, session):
+        try:
+            session.quit()
+        except Exception, err:
+            lg.logger_.warn("[MATLAB_POOL] MATLAB session could not be closed: {0}".format(err))
@@ -37,6 +37,75 @@ class saved():
         self.cr.restore()
 
 
+class Parameters(object):
+    """
+    Read only snapshot of the parameters used while the population evolves, converted to
+    their types once. Parameters whose section or option are not in the configuration are None
+    """
+    # (attribute, section, option, type)
+    FIELDS = [('sensors', 'POPULATION', 'sensors', 'int'),
+              ('sensor_spec', 'POPULATION', 'sensor_spec', 'bool'),
+              ('sensor_list', 'POPULATION', 'sensor_list', 'list'),
+              ('controls', 'POPULATION', 'controls', 'int'),
+              ('sensor_prob', 'POPULATION', 'sensor_prob', 'probability'),
+              ('leaf_prob', 'POPULATION', 'leaf_prob', 'probability'),
+              ('range', 'POPULATION', 'range', 'float'),
+              ('precision', 'POPULATION', 'precision', 'int'),
+              ('opsetrange', 'POPULATION', 'opsetrange', 'list'),
+              ('maxdepth', 'GP', 'maxdepth', 'int'),
+              ('maxdepthfirst', 'GP', 'maxdepthfirst', 'int'),
+              ('mindepth', 'GP', 'mindepth', 'int'),
+              ('mutmindepth', 'GP', 'mutmindepth', 'int'),
+              ('mutmaxdepth', 'GP', 'mutmaxdepth', 'int'),
+              ('mutsubtreemindepth', 'GP', 'mutsubtreemindepth', 'int'),
+              ('maxtries', 'GP', 'maxtries', 'int'),
+              ('mutation_types', 'GP', 'mutation_types', 'list'),
+              ('elitism', 'OPTIMIZATION', 'elitism', 'int'),
+              ('probrep', 'OPTIMIZATION', 'probrep', 'probability'),
+              ('probmut', 'OPTIMIZATION', 'probmut', 'probability'),
+              ('probcro', 'OPTIMIZATION', 'probcro', 'probability'),
+              ('selectionmethod', 'OPTIMIZATION', 'selectionmethod', 'str'),
+              ('tournamentsize', 'OPTIMIZATION', 'tournamentsize', 'int'),
+              ('simplify', 'OPTIMIZATION', 'simplify', 'bool'),
+              ('badvalue', 'EVALUATOR', 'badvalue', 'float'),
+              ('evaluate_all', 'EVALUATOR', 'evaluate_all', 'bool'),
+              ('cost_cache', 'EVALUATOR', 'cost_cache', 'str')]
+
+    __slots__ = tuple(field[0] for field in FIELDS)
+
+    def __init__(self, config):
+        for attribute, section, option, value_type in Parameters.FIELDS:
+            value = None
+            if config.has_option(section, option):
+                value = Parameters._read(config, section, option, value_type)
+            object.__setattr__(self, attribute, value)
+
+    @staticmethod
+    def _read(config, section, option, value_type):
+        try:
+            if value_type == 'int':
+                return config.getint(section, option)
+            if value_type == 'bool':
+                return config.getboolean(section, option)
+            if value_type == 'list':
+                return config.get_list(section, option)
+            if value_type == 'str':
+                return config.get(section, option)
+
+            value = config.getfloat(section, option)
+        except ValueError:
+            raise ValueError("Parameter %s of section %s is not a valid %s: '%s'" %
+                             (option, section, value_type, config.get(section, option)))
+
+        if value_type == 'probability' and not 0 <= value <= 1:
+            raise ValueError("Parameter %s of section %s is not a probability: %s" %
+                             (option, section, value))
+        return value
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Parameters are read only, change the configuration instead")
+
+
 class Config(ConfigParser.ConfigParser):
     """
     Singleton class that parse and manipulates the Config file of the MLC
@@ -44,9 +113,47 @@ class Config(ConfigParser.ConfigParser):
     _instance = None
 
     def __init__(self):
+        self._parameters = None
         ConfigParser.ConfigParser.__init__(self)
         self._log_prefix = '[CONFIG] '
 
+    def parameters(self):
+        """
+        Return the Parameters of the configuration. The snapshot is built again only after
+        the configuration is modified or reloaded
+        """
+        if self._parameters is None:
+            self._parameters = Parameters(self)
+        return self._parameters
+
+    def reload_parameters(self):
+        self._parameters = Parameters(self)
+        return self._parameters
+
+    def read(self, filenames):
+        self._parameters = None
+        return ConfigParser.ConfigParser.read(self, filenames)
+
+    def readfp(self, fp, filename=None):
+        self._parameters = None
+        ConfigParser.ConfigParser.readfp(self, fp, filename)
+
+    def set(self, section, option, value=None):
+        self._parameters = None
+        ConfigParser.ConfigParser.set(self, section, option, value)
+
+    def add_section(self, section):
+        self._parameters = None
+        ConfigParser.ConfigParser.add_section(self, section)
+
+    def remove_option(self, section, option):
+        self._parameters = None
+        return ConfigParser.ConfigParser.remove_option(self, section, option)
+
+    def remove_section(self, section):
+        self._parameters = None
+        return ConfigParser.ConfigParser.remove_section(self, section)
+
     def get_list(self, section, param, item_type=int):
         value = self.get(section, param)
 
@@ -72,6 +179,12 @@ class Config(ConfigParser.ConfigParser):
             for opt, value in options.iteritems():
                 self.set(section, opt, value)
 
+        # Options added after the configuration was saved
+        for section in self.sections():
+            for opt in self.options(section):
+                if opt not in self._dictionary.get(section, {}):
+                    self.remove_option(section, opt)
+
     @staticmethod
     def to_dictionary(config_parser):
         config_dict = {}
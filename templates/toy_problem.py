@@ -30,17 +30,37 @@ import time
 
 from MLC.arduino.protocol import ArduinoUserInterface
 from MLC.mlc_parameters.mlc_parameters import Config
+from MLC.Population.Evaluation.EvaluationFixtures import fixtures
 from PyQt5.QtCore import Qt
 
 
-def individual_data(indiv):
-    SAMPLES = 201
+SAMPLES = 201
+
+
+def setup(config):
+    # Reference curve computed once and shared by every evaluation
     x = np.linspace(-10.0, 10.0, num=SAMPLES)
     y = np.tanh(x**3 - x**2 - 1)
+    return {"x": x, "y": y}
+
+
+def curve_data():
+    data = fixtures()
+    if "x" not in data:
+        # Used out of an evaluation, like in show_best
+        data = setup(Config.get_instance())
+    return data["x"], data["y"]
 
+
+def add_noise(y):
     config = Config.get_instance()
     artificial_noise = config.getint('EVALUATOR', 'artificialnoise')
-    y_with_noise = y + [random.random() / 2 - 0.25 for _ in xrange(SAMPLES)] + artificial_noise * 500
+    return y + [random.random() / 2 - 0.25 for _ in xrange(SAMPLES)] + artificial_noise * 500
+
+
+def individual_data(indiv):
+    x, y = curve_data()
+    y_with_noise = add_noise(y)
 
     if isinstance(indiv.get_formal(), str):
         formal = indiv.get_formal().replace('S0', 'x')
@@ -74,6 +94,34 @@ def cost(indiv):
     return cost_value
 
 
+def cost_batch(indivs):
+    """
+    Vectorized version of cost. The control laws of all the individuals are stacked in one
+    array and the costs are computed at once. The noise of every individual is drawn in the
+    same order than cost does, so both functions return the same costs
+    """
+    # toy problem support for multiple controls: they are not vectorized
+    if any(isinstance(indiv.get_formal(), list) for indiv in indivs):
+        return [cost(indiv) for indiv in indivs]
+
+    x, y = curve_data()
+    y_with_noise = np.empty((len(indivs), SAMPLES))
+    b = np.empty((len(indivs), SAMPLES))
+
+    for i, indiv in enumerate(indivs):
+        y_with_noise[i] = add_noise(y)
+        # Constant expressions return a float, that fills the whole row
+        b[i] = indiv.get_tree().calculate_expression([x])
+
+    # Deactivate the numpy warnings, because this sum could raise an overflow
+    # Runtime warning from time to time
+    np.seterr(all='ignore')
+    costs = np.sum((b - y_with_noise)**2, axis=1)
+    np.seterr(all='warn')
+
+    return [float(cost_value) for cost_value in costs]
+
+
 def show_best(index, generation, indiv, cost, block=True):
     x, y, y_with_noise, b = individual_data(indiv)
     mean_squared_error = np.sqrt((y_with_noise - b)**2 / (1 + np.absolute(x**2)))
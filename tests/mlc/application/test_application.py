@@ -167,6 +167,33 @@ class ApplicationTest(unittest.TestCase):
             self.assertEqual(ApplicationTest.on_start, 1)
             self.assertEqual(ApplicationTest.on_start_counter_2, 1)
 
+    def test_evaluator_is_closed_when_the_evolution_fails(self):
+        with saved(Config.get_instance()) as config:
+            config.set("POPULATION", "size", "5")
+            config.set("BEHAVIOUR", "save", "false")
+
+            class FailingEvaluator(object):
+                closed = 0
+
+                def evaluate(self, indivs):
+                    raise RuntimeError("Evaluation failed")
+
+                def close(self):
+                    FailingEvaluator.closed += 1
+
+            # The experiment provides the evaluation module
+            ApplicationTest.mlc_local.new_experiment(ApplicationTest.experiment_name,
+                                                     ApplicationTest.test_conf_path)
+            ApplicationTest.mlc_local.open_experiment(ApplicationTest.experiment_name)
+            try:
+                mlc = Application(Simulation(""))
+                mlc._evaluator = FailingEvaluator()
+                self.assertRaises(RuntimeError, mlc.go, to_generation=2)
+                self.assertEqual(FailingEvaluator.closed, 1)
+            finally:
+                ApplicationTest.mlc_local.close_experiment(ApplicationTest.experiment_name)
+                ApplicationTest.mlc_local.delete_experiment(ApplicationTest.experiment_name)
+
     @unittest.skip
     def test_set_custom_gen_creator(self):
         with saved(Config.get_instance()) as config:
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import unittest
+import numpy as np
+import os
+
+from MLC import config as config_path
+from MLC.Log.log import set_logger
+from MLC.mlc_parameters.mlc_parameters import Config
+from MLC.individual.Individual import Individual
+from MLC.Common.LispTreeExpr.LispTreeExpr import LispTreeExpr
+
+
+class CompactTreeTest(unittest.TestCase):
+    EXPRESSIONS = ["(root S0)",
+                   "(root -2.5000)",
+                   "(root (+ (sin S0) (/ 2.0000 S1)))",
+                   "(root (log (* (exp (cos S12)) (- S0 -1.5000))) (tanh 2.0000) S3)",
+                   "(root (- (+ (* 2.0000 S0) (* 2.0000 S1)) (/ (sin 2.0000) (cos -2.0000))))"]
+
+    @classmethod
+    def setUpClass(cls):
+        set_logger("testing")
+        config = Config.get_instance()
+        config.read(os.path.join(config_path.get_test_path(), 'mlc/individual/configuration.ini'))
+
+    def test_tree_from_compact_form(self):
+        for expression in CompactTreeTest.EXPRESSIONS:
+            tree = LispTreeExpr(expression)
+            compact_tree = tree.to_compact()
+            new_tree = LispTreeExpr.from_compact(compact_tree)
+
+            self.assertEquals(new_tree.get_expanded_tree_as_string(), expression)
+            self.assertEquals(new_tree.formal(), tree.formal())
+            self.assertEquals(new_tree.complexity(), tree.complexity())
+            self.assertEquals(self._nodes_description(new_tree), self._nodes_description(tree))
+
+    def test_compact_form(self):
+        compact_tree = LispTreeExpr(CompactTreeTest.EXPRESSIONS[4]).to_compact()
+        # One opcode per node, the constants are stored once
+        self.assertEquals(len(compact_tree), 13)
+        self.assertEquals(compact_tree._constants, ("2.0000", "-2.0000"))
+        self.assertEquals(list(compact_tree._arguments), [0, 0, 0, 1, 0, 1])
+
+    def test_nodes_without_dict(self):
+        tree = LispTreeExpr(CompactTreeTest.EXPRESSIONS[3])
+        for node in tree.nodes():
+            self.assertFalse(hasattr(node, '__dict__'))
+
+    def test_individual_compact(self):
+        x = np.linspace(1, 10, num=91)
+        individual = Individual(CompactTreeTest.EXPRESSIONS[2])
+        expected = individual.get_tree().calculate_expression([x, x ** 2])
+
+        individual.compact()
+        self.assertIsNone(individual._lazy_tree)
+        self.assertIsNotNone(individual._compact_tree)
+
+        self.assertEquals(individual.get_tree().get_expanded_tree_as_string(), individual.get_value())
+        self.assertTrue(np.array_equal(individual.get_tree().calculate_expression([x, x ** 2]), expected))
+
+    def test_individual_compact_keeps_compiled_expression(self):
+        x = np.linspace(1, 10, num=91)
+        individual = Individual(CompactTreeTest.EXPRESSIONS[2])
+        expected = individual.get_tree().calculate_expression([x, x ** 2])
+        compiled = individual.get_tree().compile_expression()
+
+        individual.compact()
+        self.assertIs(individual.get_tree().compile_expression(), compiled)
+        self.assertTrue(np.array_equal(individual.get_tree().calculate_expression([x, x ** 2]), expected))
+
+        individual.compact()
+        self.assertIs(individual.get_tree().compile_expression(), compiled)
+
+    def _nodes_description(self, tree):
+        return [(node.to_string(), node.get_depth(), node.get_subtreedepth(), node.get_expr_index())
+                for node in tree.nodes()]
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+import numpy as np
+import os
+
+from MLC import config as config_path
+from MLC.Log.log import set_logger
+from MLC.mlc_parameters.mlc_parameters import Config
+from MLC.individual.Individual import Individual
+from MLC.Common.LispTreeExpr.ExpressionBatch import ExpressionBatch
+from MLC.Common.LispTreeExpr.LispTreeExpr import ExpressionCompiler
+from MLC.Common.LispTreeExpr.LispTreeExpr import LispTreeExpr
+
+
+class ExpressionBatchTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        set_logger("testing")
+        config = Config.get_instance()
+        config.read(os.path.join(config_path.get_test_path(), 'mlc/individual/configuration.ini'))
+
+    def setUp(self):
+        self._x = np.linspace(1, 10, num=91)
+        self._individuals = [Individual("(root (+ (sin S0) (/ 2.0000 S0)))"),
+                             Individual("(root (* (sin S0) (/ 2.0000 S0)))"),
+                             Individual("(root (exp (cos S0)))"),
+                             Individual("(root 3.5000)")]
+
+    def test_shared_subexpressions_are_compiled_once(self):
+        compiler = ExpressionCompiler()
+        for individual in self._individuals[:2]:
+            compiler.add_tree(individual.get_tree().get_root_node())
+
+        # (sin S0) and (/ 2.0000 S0) are shared by both trees
+        self.assertEquals(len(compiler._statements), 4)
+        self.assertEquals(len(compiler._constants), 1)
+
+    def test_temporaries_are_released_after_their_last_use(self):
+        compiler = ExpressionCompiler()
+        for individual in self._individuals[:2]:
+            compiler.add_tree(individual.get_tree().get_root_node())
+
+        # sin(S0) and 2/S0 are released once the last result using them is computed
+        source = compiler._function_source("[t2, t3]").splitlines()
+        self.assertEquals(source[4], "    t3 = t0 * t1")
+        self.assertEquals(source[5], "    del t0, t1")
+        self.assertEquals(source[-1], "    return [t2, t3]")
+        self.assertNotIn("t2", " ".join(line for line in source if "del" in line))
+
+        values = compiler.compile_batch()([self._x])
+        self.assertTrue(np.array_equal(values[1], np.sin(self._x) * (2 / self._x)))
+
+    def test_batch_values(self):
+        expected = [LispTreeExpr(i.get_value()).calculate_expression([self._x]) for i in self._individuals]
+
+        batch = ExpressionBatch(self._individuals)
+        values = batch.calculate_expressions([self._x])
+        for value, expected_value in zip(values, expected):
+            self.assertTrue(np.array_equal(value, expected_value))
+
+    def test_batch_is_computed_when_an_input_is_shared(self):
+        batch = ExpressionBatch(self._individuals)
+        batch.bind()
+
+        # The first individual computes its own expression
+        first = self._individuals[0].get_tree().calculate_expression([self._x])
+        self.assertIsNone(batch._compiled_batch)
+
+        # The same input requested again by the same individual
+        self._individuals[0].get_tree().calculate_expression([np.copy(self._x)])
+        self.assertIsNone(batch._compiled_batch)
+
+        # Other individual requests the same sensor values
+        second = self._individuals[1].get_tree().calculate_expression([np.copy(self._x)])
+        self.assertIsNotNone(batch._compiled_batch)
+        self.assertTrue(np.array_equal(second, np.sin(self._x) * (2 / self._x)))
+        self.assertTrue(np.array_equal(first, np.sin(self._x) + (2 / self._x)))
+
+        # Values are copied, the cost function can modify them
+        second[:] = 0
+        self.assertFalse(np.array_equal(self._individuals[1].get_tree().calculate_expression([self._x]), second))
+        self.assertEquals(self._individuals[3].get_tree().calculate_expression([self._x]), 3.5)
+
+        batch.release()
+        self.assertIsNone(self._individuals[0].get_tree()._expression_batch)
+
+    def test_batch_values_are_limited_by_size(self):
+        # The values of one input are 4 arrays of 91 floats at most
+        batch = ExpressionBatch(self._individuals, size_mb=4000. / (1024 * 1024))
+        batch.bind()
+
+        inputs = [self._x, self._x + 1, self._x + 2]
+        for sensors in inputs:
+            self._individuals[0].get_tree().calculate_expression([sensors])
+            self._individuals[1].get_tree().calculate_expression([sensors])
+
+        # Only the values of the last input fit in the batch
+        self.assertEquals(batch._values.keys(), [ExpressionBatch.sensors_fingerprint([inputs[-1]])])
+        self.assertLessEqual(batch._size, 4000)
+
+        # Values bigger than the batch are not kept, every individual computes its own values
+        batch.release()
+        batch = ExpressionBatch(self._individuals, size_mb=1000. / (1024 * 1024))
+        batch.bind()
+        self._individuals[0].get_tree().calculate_expression([self._x])
+        second = self._individuals[1].get_tree().calculate_expression([self._x])
+        third = self._individuals[2].get_tree().calculate_expression([self._x])
+        self.assertEquals(len(batch._values), 0)
+        self.assertTrue(np.array_equal(second, np.sin(self._x) * (2 / self._x)))
+        self.assertTrue(np.array_equal(third, np.exp(np.cos(self._x))))
+        batch.release()
+
+    def test_sensors_fingerprint(self):
+        fingerprint = ExpressionBatch.sensors_fingerprint([self._x])
+        self.assertEquals(fingerprint, ExpressionBatch.sensors_fingerprint([np.copy(self._x)]))
+        self.assertNotEquals(fingerprint, ExpressionBatch.sensors_fingerprint([self._x + 1]))
+        self.assertNotEquals(fingerprint, ExpressionBatch.sensors_fingerprint([self._x, self._x]))
@@ -20,6 +20,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
 import unittest
+import numpy as np
 import MLC.Log.log as lg
 from MLC import config as config_path
 from MLC.Log.log import set_logger
@@ -30,8 +31,12 @@ from MLC.Common.LispTreeExpr.LispTreeExpr import NotBalancedParanthesisException
 from MLC.Common.LispTreeExpr.LispTreeExpr import OperationArgumentsAmountException
 from MLC.Common.LispTreeExpr.LispTreeExpr import OperationNotFoundException
 from MLC.Common.LispTreeExpr.LispTreeExpr import RootNotFoundExprException
+from MLC.Common.LispTreeExpr.LispTreeExpr import TrailingTrashExprException
+from MLC.Common.LispTreeExpr.LispTreeExpr import TreeVisitor
 
 import os
+import shutil
+import tempfile
 
 
 class ExpressionTreeTest(unittest.TestCase):
@@ -144,6 +149,34 @@ class ExpressionTreeTest(unittest.TestCase):
         expression = '(root (tanh (+ (tanh (+ (sin (+ (+ (- S0 (log 3.4232)) (- S0 (log -3.3987 123))) (- S0 (log 7.7256)))) (sin (- S0 (log 6.3053))))) (- S0 (log 2.7057)))))'
         self.assert_check_expression_with_exception(expression, OperationArgumentsAmountException)
 
+    def test_check_expression_trailing_trash(self):
+        expression = '(root (+ 2 3)) S0'
+        self.assert_check_expression_with_exception(expression, TrailingTrashExprException)
+
+    def test_check_expression_second_control_incorrect_arguments_amount(self):
+        expression = '(root (+ 2 3) (tanh 2 3))'
+        self.assert_check_expression_with_exception(expression, OperationArgumentsAmountException)
+
+    def test_tree_nodes_of_deep_expression(self):
+        expression = '(root (tanh (+ (tanh (+ (sin (+ (+ (- S0 (log 3.4232)) (- S0 (log -3.3987))) (- S0 (log 7.7256)))) (sin (- S0 (log 6.3053))))) (- S0 (log 2.7057)))) (cos S1))'
+        tree = LispTreeExpr(expression)
+        self.assertEquals(tree.get_expanded_tree_as_string(), expression)
+        self.assertEquals(tree.get_root_node().get_subtreedepth(), 10)
+
+        for node in tree.nodes():
+            # Every node knows where it starts in the expression
+            self.assertTrue(expression[node.get_expr_index():].startswith(node.to_string()))
+
+            if node.is_leaf():
+                self.assertEquals(node.get_subtreedepth(), 0)
+            else:
+                children = node.get_children()
+                self.assertEquals(node.get_subtreedepth(),
+                                  1 + max([child.get_subtreedepth() for child in children]))
+                for child in children:
+                    expected_depth = node.get_depth() if child.is_leaf() else node.get_depth() + 1
+                    self.assertEquals(child.get_depth(), expected_depth)
+
     def test_tree_depth_root(self):
         expression = '(root S0)'
         tree = LispTreeExpr(expression)
@@ -192,6 +225,38 @@ class ExpressionTreeTest(unittest.TestCase):
         self.assertNode(subtree_1, depth=3, childs=1, expr_index=19)
         self.assertNode(subtree_1._nodes[0], depth=3, childs=0, expr_index=24)
 
+    def test_replace_subtree(self):
+        expression = '(root (+ (tanh S0) (cos S1)) (exp S0))'
+        tree = LispTreeExpr(expression)
+        tanh_node = tree.get_root_node()._nodes[0]._nodes[0]
+
+        new_tree = tree.replace_subtree(tanh_node, LispTreeExpr.parse_subtree('(* S1 (log 2.0000))'))
+        new_expression = '(root (+ (* S1 (log 2.0000)) (cos S1)) (exp S0))'
+        self.assertEquals(new_tree.get_expanded_tree_as_string(), new_expression)
+        self.assertEquals(new_tree.complexity(), LispTreeExpr(new_expression).complexity())
+        self.assertEquals(new_tree.formal(), LispTreeExpr(new_expression).formal())
+
+        # The original tree is not modified
+        self.assertEquals(tree.get_expanded_tree_as_string(), expression)
+        self.assertEquals(tanh_node.to_string(), '(tanh S0)')
+
+        # Nodes are numbered as if the new tree were parsed
+        self.assertEquals(self._nodes_description(new_tree),
+                          self._nodes_description(LispTreeExpr(new_expression)))
+
+    def test_from_controls(self):
+        tree = LispTreeExpr('(root (+ (tanh S0) (cos S1)) (exp S0))')
+        controls = tree.get_root_node()._nodes
+
+        new_tree = LispTreeExpr.from_controls([controls[1], controls[0]._nodes[1]])
+        self.assertEquals(new_tree.get_expanded_tree_as_string(), '(root (exp S0) (cos S1))')
+        self.assertEquals(self._nodes_description(new_tree),
+                          self._nodes_description(LispTreeExpr('(root (exp S0) (cos S1))')))
+
+    def _nodes_description(self, tree):
+        return [(node.get_node_id(), node.to_string(), node.get_depth(),
+                 node.get_subtreedepth(), node.get_expr_index()) for node in tree.nodes()]
+
     def test_do_not_raise_exception_when_numpy_warning_appear(self):
         # This expression raise a numpy warning
         expression = '(root (cos (exp 1e20)))'
@@ -203,6 +268,127 @@ class ExpressionTreeTest(unittest.TestCase):
         except FloatingPointError:
             self.assertEquals(True, False)
 
+    def test_calculate_expression_compiled_matches_tree_compute(self):
+        x = np.linspace(-10, 10, num=201)
+        sensors = [x, np.cos(x)]
+        expressions = ['(root (+ S0 (* 2.5000 S1)))',
+                       '(root (/ S0 (- S1 S1)))',
+                       '(root (/ 3.0000 (- S0 0.0100)))',
+                       '(root (log (- S0 S0)))',
+                       '(root (tanh (exp (sin (log (* S0 S1))))))',
+                       '(root (- (cos S1) (/ -1.2000 0.0001)))']
+
+        for expression in expressions:
+            expected = self._compute_with_tree_nodes(LispTreeExpr(expression), sensors)
+            result = LispTreeExpr(expression).calculate_expression(sensors)
+            self.assertTrue(np.allclose(result, expected, equal_nan=True), expression)
+
+    def test_calculate_expression_multiple_controls(self):
+        x = np.linspace(-1, 1, num=5)
+        tree = LispTreeExpr('(root (+ S0 1.0000) S1 -2.0000)')
+        result = tree.calculate_expression([x, 2 * x])
+
+        self.assertEquals(len(result), 3)
+        self.assertTrue(np.array_equal(result[0], x + 1))
+        self.assertTrue(np.array_equal(result[1], 2 * x))
+        self.assertEquals(result[2], -2.0)
+
+    def test_compiled_expression_is_reused(self):
+        tree = LispTreeExpr('(root (sin S0))')
+        compiled = tree.compile_expression()
+        self.assertIs(tree.compile_expression(), compiled)
+        self.assertEquals(tree.calculate_expression([0.0]), 0.0)
+
+    def test_calculate_expression_blocks(self):
+        x = np.linspace(-10, 10, num=1001)
+        tree = LispTreeExpr('(root (+ (sin S0) (* S1 2.0000)))')
+        expected = tree.calculate_expression([x, x ** 2])
+
+        blocks = list(tree.calculate_expression_blocks([x, x ** 2], block_size=300))
+        self.assertEquals([len(values) for _, values in blocks], [300, 300, 300, 101])
+        self.assertTrue(np.allclose(np.concatenate([values for _, values in blocks]), expected))
+
+    def test_calculate_expression_blocks_from_2d_array(self):
+        x = np.linspace(-10, 10, num=1001)
+        sensors = np.vstack([x, x ** 2])
+        tree = LispTreeExpr('(root (+ (sin S0) (* S1 2.0000)))')
+
+        # Every row is the series of one sensor
+        blocks = list(tree.calculate_expression_blocks(sensors, block_size=300))
+        self.assertEquals([len(values) for _, values in blocks], [300, 300, 300, 101])
+        self.assertEquals(blocks[0][0].shape, (2, 300))
+        self.assertTrue(np.allclose(np.concatenate([values for _, values in blocks]),
+                                    np.sin(x) + x ** 2 * 2))
+
+    def test_calculate_expression_blocks_from_generator(self):
+        x = np.linspace(-10, 10, num=1000)
+        tree = LispTreeExpr('(root (exp (cos S0)))')
+        generator = ([x[start:start + 100]] for start in range(0, len(x), 100))
+
+        values = [v for _, v in tree.calculate_expression_blocks(generator)]
+        self.assertEquals(len(values), 10)
+        self.assertTrue(np.allclose(np.concatenate(values), np.exp(np.cos(x))))
+
+    def test_accumulate_expression_over_memory_mapped_sensors(self):
+        directory = tempfile.mkdtemp()
+        try:
+            x = np.memmap(os.path.join(directory, 'sensor.dat'), dtype='float64', mode='w+', shape=(5000,))
+            x[:] = np.linspace(-10, 10, num=5000)
+            x.flush()
+
+            sensor = np.memmap(os.path.join(directory, 'sensor.dat'), dtype='float64', mode='r', shape=(5000,))
+            tree = LispTreeExpr('(root (- S0 (tanh S0)))')
+            cost = tree.accumulate_expression([sensor],
+                                              lambda sensors, b: np.sum((b - sensors[0]) ** 2),
+                                              block_size=512)
+
+            self.assertAlmostEqual(cost, np.sum(np.tanh(x) ** 2))
+            del x, sensor
+        finally:
+            shutil.rmtree(directory)
+
+    def test_subtree_candidates(self):
+        tree = LispTreeExpr('(root (+ (sin (* S0 (exp S1))) (/ 2.0000 (log S0))) '
+                            '(- (tanh (cos S1)) (* (+ S0 1.0000) S1)))')
+        controls = tree.get_root_node().get_children()
+
+        for mindepth in range(1, 6):
+            for maxdepth in range(mindepth, 6):
+                for subtreedepthmax in range(1, 6):
+                    for control in [None] + controls:
+                        expected = [node for node in tree.internal_nodes()
+                                    if mindepth <= node.get_depth() <= maxdepth and
+                                    node.get_subtreedepth() <= subtreedepthmax and
+                                    (control is None or node in self._subtree_nodes(control))]
+                        expected.sort(key=lambda node: node.get_expr_index())
+
+                        candidates = tree.subtree_candidates(mindepth, maxdepth, subtreedepthmax, control)
+                        self.assertEquals(candidates, expected)
+
+        # The candidates of a query are computed once
+        self.assertIs(tree.subtree_candidates(2, 4, 3), tree.subtree_candidates(2, 4, 3))
+
+    def _subtree_nodes(self, node):
+        nodes = [node]
+        if not node.is_leaf():
+            for child in node.get_children():
+                nodes.extend(self._subtree_nodes(child))
+        return nodes
+
+    def _compute_with_tree_nodes(self, tree, sensors):
+        class SensorsVisitor(TreeVisitor):
+
+            def visit_leaf_node(self, node):
+                if node.is_sensor():
+                    node._value = sensors[int(node._arg[1:])]
+                else:
+                    node._value = float(node._arg)
+
+        tree.get_root_node().accept(SensorsVisitor())
+        result = tree.get_root_node().compute()
+        np.seterr(all='warn')
+        return result
+
     def assertNode(self, node, depth, childs, expr_index):
         self.assertEquals(node.get_depth(), depth)
         self.assertEquals(node.get_expr_index(), expr_index)
@@ -211,15 +397,10 @@ class ExpressionTreeTest(unittest.TestCase):
             self.assertEquals(len(node._nodes), childs)
 
     def assert_check_expression_with_exception(self, expression, exception_class):
-        try:
-            LispTreeExpr.check_expression(expression)
-            self.assertTrue(True, False)
-        except exception_class:
-            self.assertTrue(True, True)
+        self.assertRaises(exception_class, LispTreeExpr.check_expression, expression)
 
     def assert_check_expression_without_exception(self, expression):
         try:
             LispTreeExpr.check_expression(expression)
-            self.assertTrue(True, True)
-        except ExprException:
-            self.assertTrue(True, False)
+        except ExprException, err:
+            self.fail(str(err))
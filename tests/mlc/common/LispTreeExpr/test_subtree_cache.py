@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import unittest
+import numpy as np
+import os
+
+from MLC import config as config_path
+from MLC.Log.log import set_logger
+from MLC.mlc_parameters.mlc_parameters import Config
+from MLC.Common.LispTreeExpr.LispTreeExpr import ExpressionCompiler
+from MLC.Common.LispTreeExpr.LispTreeExpr import LispTreeExpr
+from MLC.Common.LispTreeExpr.SubtreeCache import SubtreeCache
+
+
+class SubtreeCacheTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        set_logger("testing")
+        config = Config.get_instance()
+        config.read(os.path.join(config_path.get_test_path(), 'mlc/individual/configuration.ini'))
+
+    def setUp(self):
+        self._x = np.linspace(-10, 10, num=201)
+        self._cache = SubtreeCache(enabled=True)
+        SubtreeCache._instance = self._cache
+
+    def tearDown(self):
+        SubtreeCache._instance = None
+
+    def _compiled_value(self, tree, sensors):
+        return ExpressionCompiler.execute(ExpressionCompiler().compile(tree.get_root_node()), sensors)
+
+    def test_disabled_by_default(self):
+        SubtreeCache._instance = None
+        self.assertFalse(SubtreeCache.get_instance().is_enabled())
+
+    def test_values(self):
+        expressions = ["(root (+ (sin S0) (/ 2.0000 S0)))",
+                       "(root (log (* (exp (cos S0)) (- S0 1.5000))))",
+                       "(root (tanh (/ S0 0.0000)))",
+                       "(root 3.5000)",
+                       "(root (sin S0) (cos S0))"]
+        for expression in expressions:
+            tree = LispTreeExpr(expression)
+            expected = self._compiled_value(tree, [self._x])
+            # Computed once without values in the cache and once reading them
+            for _ in range(2):
+                value = tree.calculate_expression([self._x])
+                self.assertTrue(np.allclose(value, expected))
+
+    def test_shared_subtrees_are_computed_once(self):
+        LispTreeExpr("(root (+ (sin S0) (/ 2.0000 S0)))").calculate_expression([self._x])
+        self.assertEquals(self._cache.statistics()["misses"], 3)
+        self.assertEquals(self._cache.statistics()["hits"], 0)
+
+        # (sin S0) was already computed for the same sensor values
+        LispTreeExpr("(root (* (sin S0) 3.0000))").calculate_expression([self._x])
+        self.assertEquals(self._cache.statistics()["misses"], 4)
+        self.assertEquals(self._cache.statistics()["hits"], 1)
+
+        # A different input computes the subtree again
+        LispTreeExpr("(root (sin S0))").calculate_expression([self._x + 1])
+        self.assertEquals(self._cache.statistics()["misses"], 5)
+        self.assertEquals(self._cache.statistics()["hits"], 1)
+
+    def test_returned_values_are_copies(self):
+        tree = LispTreeExpr("(root (sin S0))")
+        value = tree.calculate_expression([self._x])
+        value[:] = 0
+        self.assertTrue(np.allclose(tree.calculate_expression([self._x]), np.sin(self._x)))
+
+    def test_least_recently_used_values_are_discarded(self):
+        # Room for the values of two subtrees
+        self._cache = SubtreeCache(enabled=True, size_mb=2 * (self._x.nbytes + 200) / (1024. * 1024.))
+        SubtreeCache._instance = self._cache
+
+        LispTreeExpr("(root (sin S0))").calculate_expression([self._x])
+        LispTreeExpr("(root (cos S0))").calculate_expression([self._x])
+        LispTreeExpr("(root (sin S0))").calculate_expression([self._x])
+        LispTreeExpr("(root (exp S0))").calculate_expression([self._x])
+
+        statistics = self._cache.statistics()
+        self.assertEquals(statistics["entries"], 2)
+        self.assertEquals(statistics["evictions"], 1)
+
+        # (cos S0) was discarded, (sin S0) was not
+        LispTreeExpr("(root (sin S0))").calculate_expression([self._x])
+        self.assertEquals(self._cache.statistics()["hits"], 2)
+        LispTreeExpr("(root (cos S0))").calculate_expression([self._x])
+        self.assertEquals(self._cache.statistics()["misses"], 4)
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from MLC.Log.log import set_logger
+from MLC.Common.CallbackRegistry import CallbackRegistry
+
+
+class CallbackRegistryTest(unittest.TestCase):
+    PACKAGE = "RegistryTestEvaluation"
+
+    @classmethod
+    def setUpClass(cls):
+        set_logger("testing")
+
+    def setUp(self):
+        self._registry = CallbackRegistry()
+        self._experiment_dirs = [self._create_experiment(1), self._create_experiment(2)]
+
+    def tearDown(self):
+        for experiment_dir in self._experiment_dirs:
+            if experiment_dir in sys.path:
+                sys.path.remove(experiment_dir)
+            shutil.rmtree(experiment_dir)
+
+        for module_name in [CallbackRegistryTest.PACKAGE, CallbackRegistryTest.PACKAGE + ".callback"]:
+            sys.modules.pop(module_name, None)
+
+    def _create_experiment(self, value):
+        experiment_dir = tempfile.mkdtemp()
+        package_dir = os.path.join(experiment_dir, CallbackRegistryTest.PACKAGE)
+        os.mkdir(package_dir)
+        open(os.path.join(package_dir, "__init__.py"), "w").close()
+        self._write_callback(experiment_dir, value)
+        return experiment_dir
+
+    def _write_callback(self, experiment_dir, value, modification_time=None):
+        callback_path = os.path.join(experiment_dir, CallbackRegistryTest.PACKAGE, "callback.py")
+        with open(callback_path, "w") as callback_file:
+            callback_file.write("def cost(indiv):\n    return %s\n" % value)
+
+        # Remove the bytecode, it could have been compiled in the same second
+        if os.path.exists(callback_path + "c"):
+            os.remove(callback_path + "c")
+
+        if modification_time is not None:
+            os.utime(callback_path, (modification_time, modification_time))
+
+    def test_module_is_imported_once(self):
+        sys.path.append(self._experiment_dirs[0])
+        module = self._registry.get_module(CallbackRegistryTest.PACKAGE, "callback")
+        self.assertEqual(module.cost(None), 1)
+        self.assertIs(self._registry.get_module(CallbackRegistryTest.PACKAGE, "callback"), module)
+
+    def test_modified_module_is_imported_again(self):
+        sys.path.append(self._experiment_dirs[0])
+        module = self._registry.get_module(CallbackRegistryTest.PACKAGE, "callback")
+        self.assertEqual(module.cost(None), 1)
+
+        modification_time = os.path.getmtime(module.__file__.rstrip("c")) + 10
+        self._write_callback(self._experiment_dirs[0], 3, modification_time)
+        module = self._registry.get_module(CallbackRegistryTest.PACKAGE, "callback")
+        self.assertEqual(module.cost(None), 3)
+
+    def test_module_of_other_experiment(self):
+        sys.path.append(self._experiment_dirs[0])
+        module = self._registry.get_module(CallbackRegistryTest.PACKAGE, "callback")
+        self.assertEqual(module.cost(None), 1)
+
+        # Switch to the second experiment
+        sys.path.remove(self._experiment_dirs[0])
+        sys.path.append(self._experiment_dirs[1])
+        module = self._registry.get_module(CallbackRegistryTest.PACKAGE, "callback")
+        self.assertEqual(module.cost(None), 2)
+
+    def test_module_not_found(self):
+        sys.path.append(self._experiment_dirs[0])
+        self.assertRaises(ImportError, self._registry.get_module, CallbackRegistryTest.PACKAGE, "not_found")
+        self.assertRaises(ImportError, self._registry.get_module, "RegistryTestNotFound", "callback")
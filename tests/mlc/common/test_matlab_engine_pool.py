@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import threading
+import time
+import unittest
+from tests.test_helpers import TestHelper
+
+from MLC.Log.log import set_logger
+from MLC.matlab_engine_pool import MatlabEnginePool, matlab_session_factory
+from MLC.mlc_parameters.mlc_parameters import saved, Config
+from MLC.individual.Individual import Individual
+
+
+class FakeEngine(object):
+    """
+    Stand-in of a MATLAB session with the API used by simulink_ev. The simulation result
+    is a constant control law applied during amount_periods seconds
+    """
+    lock = threading.Lock()
+    created = []
+    running = 0
+    max_running = 0
+
+    def __init__(self):
+        self.paths = []
+        self.models = []
+        self.params = {}
+        self.closed = False
+        with FakeEngine.lock:
+            FakeEngine.created.append(self)
+
+    def addpath(self, path):
+        self.paths.append(path)
+
+    def open(self, model):
+        self.models.append(model)
+
+    def set_param(self, block, param, value, nargout=0):
+        self.params[(block, param)] = value
+
+    def sim(self, model):
+        with FakeEngine.lock:
+            FakeEngine.running += 1
+            FakeEngine.max_running = max(FakeEngine.max_running, FakeEngine.running)
+        time.sleep(0.05)
+        with FakeEngine.lock:
+            FakeEngine.running -= 1
+
+    def eval(self, expression):
+        stop_time = float(self.params[(self.models[0], 'StopTime')])
+        step = float(self.params[(self.models[0], 'FixedStep')])
+        samples = int(round(stop_time / step)) + 1
+        control = float(self.params[(self.models[0] + '/Arduino/Control_Function', 'expression')])
+        columns = {'data(:,1)': lambda i: i * step,
+                   'data(:,2)': lambda i: 1.65 + (i % 2),
+                   'data(:,3)': lambda i: 1.65 + (i % 2) * control,
+                   'data(:,4)': lambda i: control}
+        return [[columns[expression](i)] for i in range(samples)]
+
+    def quit(self):
+        self.closed = True
+
+    @staticmethod
+    def reset():
+        FakeEngine.created = []
+        FakeEngine.running = 0
+        FakeEngine.max_running = 0
+
+
+class MatlabEnginePoolTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        TestHelper.load_default_configuration()
+        set_logger('testing')
+
+    def setUp(self):
+        FakeEngine.reset()
+
+    def tearDown(self):
+        MatlabEnginePool.set_factory(None)
+
+    def test_map_dispatches_to_free_sessions(self):
+        setups = []
+        pool = MatlabEnginePool(3, setup=setups.append, factory=FakeEngine)
+
+        def simulate(eng, item):
+            eng.sim("model")
+            return item * 2
+
+        try:
+            self.assertEqual(pool.map(simulate, range(9)), [item * 2 for item in range(9)])
+        finally:
+            pool.close()
+
+        self.assertEqual(len(FakeEngine.created), 3)
+        self.assertEqual(FakeEngine.max_running, 3)
+        self.assertEqual(setups, FakeEngine.created)
+        self.assertTrue(all(engine.closed for engine in FakeEngine.created))
+
+    def test_sessions_are_reused(self):
+        pool = MatlabEnginePool(2, factory=FakeEngine)
+
+        with pool.session() as first:
+            pass
+        with pool.session() as second:
+            pass
+
+        self.assertTrue(first is second)
+        self.assertEqual(pool.count_sessions(), 1)
+
+        pool.warm_up()
+        self.assertEqual(pool.count_sessions(), 2)
+        pool.close()
+        self.assertEqual(pool.count_sessions(), 0)
+
+    def test_swap_factory(self):
+        MatlabEnginePool.set_factory(FakeEngine)
+        pool = MatlabEnginePool(1)
+        with pool.session() as eng:
+            self.assertTrue(isinstance(eng, FakeEngine))
+        pool.close()
+
+        MatlabEnginePool.set_factory(None)
+        self.assertTrue(MatlabEnginePool(1)._factory is matlab_session_factory)
+
+    def test_invalid_size(self):
+        self.assertRaises(ValueError, MatlabEnginePool, 0)
+
+    def test_sessions_started_are_kept_when_warm_up_fails(self):
+        calls = []
+
+        def factory():
+            with FakeEngine.lock:
+                calls.append(None)
+                if len(calls) == 2:
+                    raise RuntimeError("MATLAB could not be started")
+            return FakeEngine()
+
+        pool = MatlabEnginePool(3, factory=factory)
+        self.assertRaises(RuntimeError, pool.warm_up)
+
+        self.assertEqual(pool.count_sessions(), 2)
+        with pool.session() as first:
+            with pool.session() as second:
+                self.assertEqual(set([first, second]), set(FakeEngine.created))
+        pool.close()
+        self.assertTrue(all(engine.closed for engine in FakeEngine.created))
+
+    def test_session_is_closed_when_setup_fails(self):
+        def setup(session):
+            raise RuntimeError("The model could not be opened")
+
+        pool = MatlabEnginePool(1, setup=setup, factory=FakeEngine)
+        self.assertRaises(RuntimeError, pool.warm_up)
+
+        self.assertEqual(pool.count_sessions(), 0)
+        self.assertEqual(len(FakeEngine.created), 1)
+        self.assertTrue(FakeEngine.created[0].closed)
+        pool.close()
+
+    def test_simulink_cost_batch(self):
+        from MLC.Scripts.Evaluation import simulink_ev
+
+        MatlabEnginePool.set_factory(FakeEngine)
+        with saved(Config.get_instance()) as config:
+            if not config.has_section('PROBLEM_VARIABLES'):
+                config.add_section('PROBLEM_VARIABLES')
+            for option, value in [('signal_frequency', '1'), ('signal_offset', '1.65'),
+                                  ('sampling_resolution', '0.01'), ('amount_periods', '2'),
+                                  ('signal_amplitude', '1'), ('model_name', 'model'),
+                                  ('model_path', '/models'), ('gamma', '0.1'),
+                                  ('sensor_source', 'signal_to_cancel'), ('goal', 'kill_signal'),
+                                  ('summator_gain', '1'), ('engine_sessions', '2')]:
+                config.set('PROBLEM_VARIABLES', option, value)
+
+            individuals = [Individual("(root %s)" % value) for value in ["0.5000", "1.0000", "1.5000", "0.2500"]]
+            try:
+                costs = simulink_ev.cost_batch(individuals)
+                expected = [simulink_ev.cost(individual) for individual in individuals]
+            finally:
+                simulink_ev.engine_pool().close()
+                simulink_ev.g_engine_pool_key = None
+
+        self.assertEqual(costs, expected)
+        self.assertEqual(len(set(costs)), len(costs))
+        self.assertEqual(len(FakeEngine.created), 2)
+        self.assertEqual(FakeEngine.max_running, 2)
+        self.assertTrue(all(engine.models == ['model'] and '/models' in engine.paths
+                            for engine in FakeEngine.created))
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import os
+import shutil
+import tempfile
+import unittest
+from tests.test_helpers import TestHelper
+
+from MLC.db.mlc_repository import MLCRepository
+from MLC.db.sqlite.sqlite_repository import SQLiteRepository
+from MLC.individual.Individual import Individual
+from MLC.mlc_parameters.mlc_parameters import Config
+from MLC.Population.Population import Population
+
+
+class IndividualCacheTest(unittest.TestCase):
+    VALUES = ["(root (+ S0 1.0000))",
+              "(root (* S0 S0))",
+              "(root (sin S0))",
+              "(root (cos S0))"]
+
+    @classmethod
+    def setUpClass(cls):
+        TestHelper.load_default_configuration()
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._database = os.path.join(self._dir, "experiment.db")
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def _open(self, init_db=False):
+        repository = SQLiteRepository(self._database, init_db=init_db, individual_cache_size=2)
+        MLCRepository._instance = repository
+        return repository
+
+    def _create_experiment(self, values):
+        repository = self._open(init_db=True)
+        indivs = [repository.add_individual(Individual(value))[0] for value in values]
+        population = Population(len(indivs), 1, Config.get_instance(), repository)
+        population.set_individuals(list(enumerate(indivs)))
+        repository.add_population(population)
+        repository.close()
+
+    def test_individuals_are_loaded_on_demand(self):
+        self._create_experiment(IndividualCacheTest.VALUES)
+        repository = self._open()
+
+        self.assertEqual(repository.count_individual(), len(IndividualCacheTest.VALUES))
+        self.assertEqual(repository.add_individual(Individual(IndividualCacheTest.VALUES[2])), (3, True))
+        for indiv_id, value in enumerate(IndividualCacheTest.VALUES):
+            self.assertEqual(repository.get_individual(indiv_id + 1).get_value(), value)
+        self.assertEqual(repository.get_individual_data(4).get_value(), IndividualCacheTest.VALUES[3])
+        self.assertRaises(KeyError, repository.get_individual, 10)
+        repository.close()
+
+    def test_least_recently_used_individuals_are_released(self):
+        self._create_experiment(IndividualCacheTest.VALUES)
+        repository = self._open()
+
+        first = repository.get_individual(1)
+        repository.get_individual(2)
+        self.assertIs(repository.get_individual(1), first)
+
+        # individual 2 is the least recently used one
+        second = repository.get_individual(2)
+        repository.get_individual(3)
+        repository.get_individual(1)
+        self.assertIsNot(repository.get_individual(2), second)
+        repository.close()
+
+    def test_new_individuals_are_kept_until_stored(self):
+        repository = self._open(init_db=True)
+        indivs = [repository.add_individual(Individual(value))[0] for value in IndividualCacheTest.VALUES]
+
+        for indiv_id, value in zip(indivs, IndividualCacheTest.VALUES):
+            self.assertEqual(repository.get_individual(indiv_id).get_value(), value)
+        repository.close()
+
+    def test_remove_unused_individuals(self):
+        self._create_experiment(IndividualCacheTest.VALUES[:2])
+        repository = self._open()
+        repository.add_individual(Individual(IndividualCacheTest.VALUES[2]))
+        population = Population(2, 1, Config.get_instance(), repository)
+        population.set_individuals([(0, 1), (1, 1)])
+        repository.add_population(population)
+        repository.remove_population_to(1)
+
+        self.assertEqual(repository.remove_unused_individuals(), 2)
+        self.assertEqual(repository.count_individual(), 1)
+        self.assertRaises(KeyError, repository.get_individual, 2)
+        self.assertEqual(repository.add_individual(Individual(IndividualCacheTest.VALUES[1])), (4, False))
+        repository.close()
@@ -190,6 +190,35 @@ class MLCRepositoryTest(unittest.TestCase):
         except KeyError:
             self.assertTrue(True)
 
+    def test_add_population_keeps_cost_precision(self):
+        mlc_repo = self.__get_new_repo()
+        mlc_repo.add_individual(Individual("(root (+ 1 1))"))
+
+        p = Population(1, 0, Config.get_instance(), mlc_repo)
+        p._individuals = [1]
+        p._costs = [1234.5678901234567]
+        p._ev_time = [1500000000.123456]
+        p._gen_method = [1]
+        mlc_repo.add_population(p)
+
+        p_from_repo = mlc_repo.get_population(1)
+        self.assertEqual(p_from_repo._costs[0], p._costs[0])
+        self.assertEqual(p_from_repo._ev_time[0], p._ev_time[0])
+
+    def test_invalid_population_is_rolled_back(self):
+        mlc_repo = self.__get_new_repo()
+        mlc_repo.add_individual(Individual("(root (+ 1 1))"))
+
+        p = Population(2, 0, Config.get_instance(), mlc_repo)
+        p._individuals = [1, 100]
+        self.assertRaises(KeyError, mlc_repo.add_population, p)
+        self.assertEqual(mlc_repo.count_population(), 0)
+
+        # the new individuals are stored with the next population
+        p._individuals = [1, 1]
+        mlc_repo.add_population(p)
+        self.assertEqual(mlc_repo.get_individual_data(1).get_appearances(), 2)
+
     def test_get_individual_data(self):
         mlc_repo = self.__get_new_repo()
 
@@ -320,6 +349,37 @@ class MLCRepositoryTest(unittest.TestCase):
         self.assertEqual(p._costs, [8, 9, 10])
         self.assertEqual(p._ev_time, [11, 12, 13])
 
+    def test_update_individual_costs(self):
+        mlc_repo = self.__get_new_repo()
+
+        # add individuals
+        mlc_repo.add_individual(Individual("(root (+ 1 1))"))
+        mlc_repo.add_individual(Individual("(root (+ 2 2))"))
+
+        # add populations
+        for individuals, costs, ev_time in [([1, 2, 1], [4, 5, 6], [5, 6, 7]),
+                                            ([2, 1, 2], [8, 9, 10], [11, 12, 13])]:
+            p = Population(3, 0, Config.get_instance(), mlc_repo)
+            p._individuals = individuals
+            p._costs = costs
+            p._ev_time = ev_time
+            mlc_repo.add_population(p)
+
+        # update the costs of both individuals in the second population
+        mlc_repo.update_individual_costs([(1, 45, 46), (2, 47, 48)], generation=2)
+        p = mlc_repo.get_population(1)
+        self.assertEqual(p._costs, [4, 5, 6])
+        p = mlc_repo.get_population(2)
+        self.assertEqual(p._costs, [47, 45, 47])
+        self.assertEqual(p._ev_time, [48, 46, 48])
+
+        # update the costs in every population
+        mlc_repo.update_individual_costs([(1, 1.5, 50), (2, 2.5, 51)])
+        p = mlc_repo.get_population(1)
+        self.assertEqual(p._costs, [1.5, 2.5, 1.5])
+        self.assertEqual(p._ev_time, [50, 51, 50])
+        self.assertEqual(mlc_repo.get_individual_data(2).get_cost_history()[2], [(2.5, 51), (2.5, 51)])
+
     def test_reload_individuals_in_memory_loss_data(self):
         mlc_repo = self.__get_new_repo()
 
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from tests.test_helpers import TestHelper
+
+from MLC.db.mlc_repository import MLCRepository
+from MLC.db.sqlite.sqlite_repository import SQLiteRepository
+from MLC.individual.Individual import Individual
+from MLC.mlc_parameters.mlc_parameters import Config, saved
+from MLC.Population.Population import Population
+
+
+class PopulationCacheTest(unittest.TestCase):
+    VALUES = ["(root (+ S0 1.0000))", "(root (* S0 S0))"]
+
+    @classmethod
+    def setUpClass(cls):
+        TestHelper.load_default_configuration()
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._database = os.path.join(self._dir, "experiment.db")
+        self._repository = SQLiteRepository(self._database, init_db=True)
+        MLCRepository._instance = self._repository
+        self._indivs = [self._repository.add_individual(Individual(value))[0]
+                        for value in PopulationCacheTest.VALUES]
+
+    def tearDown(self):
+        self._repository.close()
+        shutil.rmtree(self._dir)
+
+    def _add_population(self, costs):
+        population = Population(len(costs), 1, Config.get_instance(), self._repository)
+        population.set_individuals(list(enumerate(self._indivs)))
+        population._costs = list(costs)
+        self._repository.add_population(population)
+
+    def _costs(self, generation):
+        with saved(Config.get_instance()) as config:
+            config.set("POPULATION", "size", str(len(self._indivs)))
+            return self._repository.get_population(generation).get_costs()
+
+    def _delete_rows_behind_the_repository(self):
+        conn = sqlite3.connect(self._database)
+        conn.execute("DELETE FROM population")
+        conn.commit()
+        conn.close()
+
+    def test_generations_are_read_once(self):
+        self._add_population([1.0, 2.0])
+        self.assertEqual(self._costs(1), [1.0, 2.0])
+
+        self._delete_rows_behind_the_repository()
+        self.assertEqual(self._costs(1), [1.0, 2.0])
+
+    def test_every_call_returns_a_new_population(self):
+        self._add_population([1.0, 2.0])
+        self._costs(1)[0] = 100.0
+
+        self.assertEqual(self._costs(1), [1.0, 2.0])
+
+    def test_cost_updates_discard_the_generation(self):
+        self._add_population([1.0, 2.0])
+        self._add_population([3.0, 4.0])
+        self._costs(1)
+        self._costs(2)
+
+        self._repository.update_individual_cost(self._indivs[0], 5.0, 0, generation=2)
+        self.assertEqual(self._costs(2), [5.0, 4.0])
+
+        self._repository.update_individual_cost(self._indivs[1], 6.0, 0)
+        self.assertEqual(self._costs(1), [1.0, 6.0])
+        self.assertEqual(self._costs(2), [5.0, 6.0])
+
+    def test_removed_generations_are_discarded(self):
+        self._add_population([1.0, 2.0])
+        self._add_population([3.0, 4.0])
+        self._costs(2)
+
+        self._repository.remove_population_from(2)
+        self._add_population([7.0, 8.0])
+        self.assertEqual(self._costs(2), [7.0, 8.0])
+
+        self._repository.remove_population_to(1)
+        self.assertEqual(self._repository.count_population(), 1)
+        self.assertEqual(self._costs(1), [7.0, 8.0])
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from tests.test_helpers import TestHelper
+
+from MLC.db.mlc_repository import MLCRepository, MLCRepositoryHelper
+from MLC.db.sqlite.sqlite_repository import SQLiteRepository
+from MLC.individual.Individual import Individual
+from MLC.mlc_parameters.mlc_parameters import Config, saved
+from MLC.Population.Population import Population
+
+# Schema of the databases created before the versioned schema
+LEGACY_SCHEMA = ["CREATE TABLE individual(indiv_id INTEGER PRIMARY KEY, value text, formal text, "
+                 "complexity INTEGER)",
+                 "CREATE TABLE population(id INTEGER PRIMARY KEY AUTOINCREMENT, gen INTEGER, cost real, "
+                 "evaluation_time INTEGER, gen_method INTEGER, parents TEXT, indiv_id INTEGER, "
+                 "FOREIGN KEY(indiv_id) REFERENCES individual(indiv_id))"]
+
+
+class SchemaMigrationTest(unittest.TestCase):
+    VALUES = ["(root (+ S0 1.0000))", "(root (* S0 S0))"]
+
+    @classmethod
+    def setUpClass(cls):
+        TestHelper.load_default_configuration()
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._database = os.path.join(self._dir, "experiment.db")
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def _create_legacy_db(self):
+        conn = sqlite3.connect(self._database)
+        for statement in LEGACY_SCHEMA:
+            conn.execute(statement)
+        for indiv_id, value in enumerate(SchemaMigrationTest.VALUES):
+            conn.execute("INSERT INTO individual VALUES (?, ?, ?, ?)", (indiv_id + 1, value, "S0", 2))
+            conn.execute("INSERT INTO population (gen, cost, evaluation_time, gen_method, parents, indiv_id) "
+                         "VALUES (1, ?, 0, 1, '', ?)", (float(indiv_id), indiv_id + 1))
+        conn.commit()
+        conn.close()
+
+    def _schema(self):
+        conn = sqlite3.connect(self._database)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        indexes = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+        hashes = [row[0] for row in conn.execute("SELECT hash FROM individual ORDER BY indiv_id")]
+        conn.close()
+        return version, indexes, hashes
+
+    def test_new_database_uses_last_schema(self):
+        SQLiteRepository(self._database, init_db=True).close()
+
+        version, indexes, _ = self._schema()
+        self.assertEqual(version, SQLiteRepository.SCHEMA_VERSION)
+        self.assertIn("population_gen", indexes)
+        self.assertIn("population_indiv_id", indexes)
+
+    def test_legacy_database_is_migrated(self):
+        self._create_legacy_db()
+        repository = SQLiteRepository(self._database)
+        MLCRepository._instance = repository
+
+        version, indexes, hashes = self._schema()
+        self.assertEqual(version, SQLiteRepository.SCHEMA_VERSION)
+        self.assertIn("population_gen", indexes)
+        self.assertIn("population_indiv_id", indexes)
+        self.assertEqual(hashes, [MLCRepositoryHelper.get_hash_for_value(value)
+                                  for value in SchemaMigrationTest.VALUES])
+
+        # the data of the experiment is kept and the tables added after it was created exist
+        self.assertEqual(repository.count_population(), 1)
+        self.assertEqual(repository.add_individual(Individual(SchemaMigrationTest.VALUES[1])), (2, True))
+        self.assertEqual(repository.get_evaluation_events(), [])
+        with saved(Config.get_instance()) as config:
+            config.set("POPULATION", "size", "2")
+            self.assertEqual(repository.get_population(1).get_individuals(), [1, 2])
+        repository.close()
+
+    def test_stored_hashes_are_used(self):
+        repository = SQLiteRepository(self._database, init_db=True)
+        MLCRepository._instance = repository
+        for value in SchemaMigrationTest.VALUES:
+            repository.add_individual(Individual(value))
+        repository.add_population(self._population(repository))
+        repository.close()
+
+        repository = SQLiteRepository(self._database)
+        self.assertEqual(repository.add_individual(Individual(SchemaMigrationTest.VALUES[0])), (1, True))
+        self.assertEqual(repository.add_individual(Individual("(root S0)")), (3, False))
+        repository.close()
+
+    def _population(self, repository):
+        population = Population(2, 1, Config.get_instance(), repository)
+        population.set_individuals([(0, 1), (1, 2)])
+        return population
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from tests.test_helpers import TestHelper
+
+from MLC.db.mlc_repository import MLCRepository
+from MLC.db.sqlite.sqlite_connections import SQLiteConnections
+from MLC.db.sqlite.sqlite_repository import SQLiteRepository
+from MLC.individual.Individual import Individual
+from MLC.mlc_parameters.mlc_parameters import Config, saved
+from MLC.Population.Population import Population
+
+
+class SQLiteConnectionsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        TestHelper.load_default_configuration()
+
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._database = os.path.join(self._dir, "connections.db")
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def _in_thread(self, function):
+        result = []
+        thread = threading.Thread(target=lambda: result.append(function()))
+        thread.start()
+        thread.join()
+        return result[0]
+
+    def test_one_connection_per_thread(self):
+        connections = SQLiteConnections(self._database, SQLiteRepository.IN_MEMORY_DB)
+        conn = connections.connection()
+
+        self.assertIs(connections.connection(), conn)
+        self.assertIsNot(self._in_thread(connections.connection), conn)
+        self.assertEqual(connections.count(), 2)
+        connections.close()
+
+    def test_in_memory_connection_is_shared(self):
+        connections = SQLiteConnections(SQLiteRepository.IN_MEMORY_DB, SQLiteRepository.IN_MEMORY_DB)
+        conn = connections.connection()
+
+        self.assertIs(self._in_thread(connections.connection), conn)
+        self.assertEqual(connections.count(), 1)
+        connections.close()
+
+    def test_connections_of_finished_threads_are_closed(self):
+        connections = SQLiteConnections(self._database, SQLiteRepository.IN_MEMORY_DB)
+        thread_conn = self._in_thread(connections.connection)
+        connections.connection()
+
+        self.assertEqual(connections.count(), 1)
+        self.assertRaises(sqlite3.ProgrammingError, thread_conn.execute, "SELECT 1")
+        connections.close()
+
+    def test_close_closes_every_connection(self):
+        connections = SQLiteConnections(self._database, SQLiteRepository.IN_MEMORY_DB)
+        conn = connections.connection()
+        connections.close()
+
+        self.assertRaises(sqlite3.ProgrammingError, conn.execute, "SELECT 1")
+        self.assertRaises(sqlite3.ProgrammingError, connections.connection)
+
+    def test_repository_shared_between_threads(self):
+        repository = SQLiteRepository(self._database, init_db=True)
+        MLCRepository._instance = repository
+
+        def add_population():
+            population = Population(2, 1, Config.get_instance(), repository)
+            individuals = [repository.add_individual(Individual(value))[0]
+                           for value in ["(root (+ S0 1.0000))", "(root (* S0 S0))"]]
+            population.set_individuals(list(enumerate(individuals)))
+            repository.add_population(population)
+            return individuals
+
+        individuals = self._in_thread(add_population)
+
+        self.assertEqual(repository.count_population(), 1)
+        with saved(Config.get_instance()) as config:
+            config.set("POPULATION", "size", "2")
+            self.assertEqual(repository.get_population(1).get_individuals(), individuals)
+        self.assertEqual(repository.get_individual_data(individuals[0]).get_appearances(), 1)
+        repository.close()
+
+    def test_in_memory_connection_is_locked_while_used(self):
+        connections = SQLiteConnections(SQLiteRepository.IN_MEMORY_DB, SQLiteRepository.IN_MEMORY_DB)
+        events = []
+
+        def use_connection():
+            with connections.locked():
+                events.append("thread")
+
+        with connections.locked() as conn:
+            thread = threading.Thread(target=use_connection)
+            thread.start()
+            thread.join(0.2)
+            events.append("main")
+            self.assertIs(connections.connection(), conn)
+        thread.join()
+
+        self.assertEqual(events, ["main", "thread"])
+        connections.close()
+
+    def test_failed_population_is_rolled_back(self):
+        repository = SQLiteRepository(self._database, init_db=True)
+        MLCRepository._instance = repository
+        population = Population(2, 1, Config.get_instance(), repository)
+        individuals = [repository.add_individual(Individual(value))[0]
+                       for value in ["(root (+ S0 1.0000))", "(root (* S0 S0))"]]
+        population.set_individuals(list(enumerate(individuals)))
+        # a cost that can't be bound makes the insertion of the population fail
+        population._costs[1] = object()
+
+        self.assertRaises(sqlite3.InterfaceError, repository.add_population, population)
+        # the next write over the same connection must not commit the failed transaction
+        repository.update_individual_cost(individuals[0], 1.0, 1.0)
+        repository.close()
+
+        repository = SQLiteRepository(self._database)
+        self.assertEqual(repository.count_population(), 0)
+        self.assertEqual(repository.count_individual(), 0)
+        repository.close()
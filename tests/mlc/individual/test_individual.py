@@ -172,6 +172,16 @@ class IndividualTest(unittest.TestCase):
                                 value="(root (cos (* (+ (+ (* -1.912 -9.178) (cos S0)) (cos S0)) 3.113)))",
                                 formal="cos((((((-1.912) .* (-9.178)) + cos(S0)) + cos(S0)) .* 3.113))")
 
+    def test_crossover_does_not_modify_parents(self):
+        value_2 = self._individual_l2.get_value()
+        value_3 = self._individual_l3.get_value()
+        new_ind_1, new_ind_2, _ = self._individual_l2.crossover(self._individual_l3)
+
+        self.assertEquals(self._individual_l2.get_tree().get_expanded_tree_as_string(), value_2)
+        self.assertEquals(self._individual_l3.get_tree().get_expanded_tree_as_string(), value_3)
+        self.assertEquals(new_ind_1.get_tree().get_expanded_tree_as_string(), new_ind_1.get_value())
+        self.assertEquals(new_ind_2.get_tree().get_expanded_tree_as_string(), new_ind_2.get_value())
+
     def test_crossover_different_levels_2_3(self):
         # self._engine.rand('seed', 40.0, nargout=0)
         new_ind_1, new_ind_2, _ = self._individual_l2.crossover(self._individual_l3)
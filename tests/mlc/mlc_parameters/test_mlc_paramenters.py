@@ -91,3 +91,52 @@ list_float_range = 1:10"""
             self.assertTrue(isinstance(item, float))
         self.assertTrue(isinstance(value, list))
 
+
+    def test_parameters(self):
+        config = Config()
+        config.add_section("POPULATION")
+        config.set("POPULATION", "precision", "4")
+        config.set("POPULATION", "range", "10")
+        config.set("POPULATION", "sensor_prob", "0.33")
+        config.set("POPULATION", "opsetrange", "1:4")
+        config.set("POPULATION", "sensor_spec", "false")
+
+        parameters = config.parameters()
+        self.assertEqual(parameters.precision, 4)
+        self.assertEqual(parameters.range, 10.0)
+        self.assertEqual(parameters.sensor_prob, 0.33)
+        self.assertEqual(parameters.opsetrange, [1, 2, 3])
+        self.assertFalse(parameters.sensor_spec)
+
+        # Parameters not found in the configuration
+        self.assertIsNone(parameters.sensors)
+        self.assertIsNone(parameters.tournamentsize)
+
+    def test_parameters_are_rebuilt_when_config_changes(self):
+        config = Config()
+        config.add_section("GP")
+        config.set("GP", "maxdepth", "15")
+
+        parameters = config.parameters()
+        self.assertIs(config.parameters(), parameters)
+        self.assertRaises(AttributeError, setattr, parameters, "maxdepth", 10)
+
+        config.set("GP", "maxdepth", "10")
+        self.assertEqual(config.parameters().maxdepth, 10)
+        self.assertEqual(parameters.maxdepth, 15)
+
+        # An explicit reload builds them again
+        parameters = config.parameters()
+        reloaded = config.reload_parameters()
+        self.assertIsNot(reloaded, parameters)
+        self.assertIs(config.parameters(), reloaded)
+
+    def test_invalid_parameters(self):
+        config = Config()
+        config.add_section("OPTIMIZATION")
+        config.set("OPTIMIZATION", "probmut", "1.5")
+        self.assertRaises(ValueError, config.parameters)
+
+        config.set("OPTIMIZATION", "probmut", "0.4")
+        config.set("OPTIMIZATION", "elitism", "ten")
+        self.assertRaises(ValueError, config.parameters)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+from tests.test_helpers import TestHelper
+
+from MLC.Log.log import set_logger
+from MLC.mlc_parameters.mlc_parameters import saved, Config
+from MLC.Population.Population import Population
+from MLC.db.mlc_repository import MLCRepository
+from MLC.individual.Individual import Individual
+
+
+class RecordEvaluator(object):
+    def __init__(self, costs):
+        self._costs = costs
+        self.evaluated = []
+
+    def evaluate(self, indivs):
+        self.evaluated.append(list(indivs))
+        return [self._costs[indiv] for indiv in indivs]
+
+
+class CostCacheTest(unittest.TestCase):
+    VALUES = ["(root (+ S0 1.0000))",
+              "(root (sin (* S0 2.5000)))",
+              "(root (exp (- S0 (cos S0))))"]
+
+    @classmethod
+    def setUpClass(cls):
+        TestHelper.load_default_configuration()
+        set_logger('testing')
+
+    def _evaluate_twice(self, policy, evaluate_all="0"):
+        with saved(Config.get_instance()) as config:
+            config.set("BEHAVIOUR", "save", "false")
+            config.set("EVALUATOR", "evaluate_all", evaluate_all)
+            config.set("EVALUATOR", "cost_cache", policy)
+
+            MLCRepository.make("")
+            repository = MLCRepository.get_instance()
+            first, second, third = [repository.add_individual(Individual(value))[0]
+                                    for value in CostCacheTest.VALUES]
+
+            population = Population(2, 0, config, repository)
+            population.set_individuals([(0, first), (1, second)])
+            population.evaluate(RecordEvaluator({first: 1.0, second: 2.0}))
+            repository.add_population(population)
+
+            population = Population(2, 0, config, repository)
+            population.set_individuals([(0, first), (1, second)])
+            # Evaluated again, like the re-evaluation of the best individuals
+            population.evaluate(RecordEvaluator({first: 3.0, second: 4.0}), force=True)
+            repository.add_population(population)
+
+            # The same individual twice and a new one
+            evaluator = RecordEvaluator({first: 5.0, second: 6.0, third: 7.0})
+            population = Population(4, 0, config, repository)
+            population.set_individuals([(0, first), (1, third), (2, first), (3, third)])
+            population.evaluate(evaluator)
+
+            return population.get_costs(), evaluator.evaluated
+
+    def test_evaluate_policy(self):
+        costs, evaluated = self._evaluate_twice("evaluate")
+        self.assertEqual(costs, [5.0, 7.0, 5.0, 7.0])
+        self.assertEqual(len(evaluated[0]), 4)
+
+    def test_last_policy(self):
+        costs, evaluated = self._evaluate_twice("last")
+        self.assertEqual(costs, [3.0, 7.0, 3.0, 7.0])
+        self.assertEqual(len(evaluated), 1)
+        self.assertEqual(len(evaluated[0]), 1)
+
+    def test_average_policy(self):
+        costs, evaluated = self._evaluate_twice("average")
+        self.assertEqual(costs, [2.0, 7.0, 2.0, 7.0])
+        self.assertEqual(len(evaluated[0]), 1)
+
+    def test_reused_costs_are_not_evaluations(self):
+        with saved(Config.get_instance()) as config:
+            config.set("BEHAVIOUR", "save", "false")
+            config.set("EVALUATOR", "evaluate_all", "0")
+            config.set("EVALUATOR", "cost_cache", "average")
+
+            MLCRepository.make("")
+            repository = MLCRepository.get_instance()
+            individual = repository.add_individual(Individual(CostCacheTest.VALUES[0]))[0]
+
+            def evaluate(cost, force):
+                evaluator = RecordEvaluator({individual: cost})
+                population = Population(1, 0, config, repository)
+                population.set_individuals([(0, individual)])
+                population.evaluate(evaluator, force=force)
+                repository.add_population(population)
+                return population.get_costs()[0], evaluator.evaluated
+
+            self.assertEqual(evaluate(1.0, force=False), (1.0, [[individual]]))
+            # The cost is reused and stored in the population
+            self.assertEqual(evaluate(2.0, force=False), (1.0, []))
+            self.assertEqual(evaluate(4.0, force=True), (4.0, [[individual]]))
+            # Average of the two evaluations, not of the three populations
+            self.assertEqual(evaluate(8.0, force=False), (2.5, []))
+
+    def test_evaluate_all_forces_evaluation(self):
+        costs, evaluated = self._evaluate_twice("last", evaluate_all="1")
+        self.assertEqual(costs, [5.0, 7.0, 5.0, 7.0])
+        self.assertEqual(len(evaluated[0]), 4)
+
+    def test_invalid_policy(self):
+        self.assertRaises(ValueError, self._evaluate_twice, "sometimes")
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import unittest
+from tests.test_helpers import TestHelper
+
+from MLC.Application import MLCCallbacksManager
+from MLC.Log.log import set_logger
+from MLC.mlc_parameters.mlc_parameters import saved, Config
+from MLC.db.mlc_repository import MLCRepository
+from MLC.individual.Individual import Individual
+from MLC.Population.Evaluation.EvaluationFixtures import fixtures, release_fixtures
+from MLC.Population.Evaluation.EvaluatorFactory import EvaluatorFactory
+
+EVALUATION_MODULE = """
+import numpy as np
+from MLC.Population.Evaluation.EvaluationFixtures import fixtures
+
+setup_calls = []
+
+
+def setup(config):
+    setup_calls.append(config.get('EVALUATOR', 'evaluation_function'))
+    return {"offsets": np.arange(4.0), "scale": 2.0}
+
+
+def cost(indiv):
+    data = fixtures()
+    try:
+        data["offsets"][0] = 100.0
+        writable = 1
+    except ValueError:
+        writable = 0
+    return float(len(indiv.get_value())) * data["scale"] + data["offsets"].sum() + 1000 * writable
+"""
+
+
+class EvaluationFixturesTest(unittest.TestCase):
+    VALUES = ["(root (+ S0 1.0000))",
+              "(root (sin (* S0 2.5000)))",
+              "(root S0)"]
+
+    @classmethod
+    def setUpClass(cls):
+        TestHelper.load_default_configuration()
+        set_logger('testing')
+
+        cls._experiment_dir = TestHelper.create_experiment("fixtures_cost", EVALUATION_MODULE)
+
+    @classmethod
+    def tearDownClass(cls):
+        TestHelper.remove_experiment(cls._experiment_dir)
+        release_fixtures()
+
+    def _evaluate(self, evaluation_method):
+        with saved(Config.get_instance()) as config:
+            config.set("BEHAVIOUR", "save", "false")
+            config.set("EVALUATOR", "evaluation_function", "fixtures_cost")
+            config.set("EVALUATOR", "workers", "2")
+
+            MLCRepository.make("")
+            repository = MLCRepository.get_instance()
+            indivs = [repository.add_individual(Individual(value))[0] for value in EvaluationFixturesTest.VALUES]
+
+            callback = EvaluatorFactory.get_callback()
+            del callback.setup_calls[:]
+            evaluator = EvaluatorFactory.make(evaluation_method, MLCCallbacksManager())
+            try:
+                costs = evaluator.evaluate(indivs)
+            finally:
+                evaluator.close()
+
+            return costs, callback.setup_calls
+
+    def _expected_costs(self):
+        return [len(value) * 2.0 + 6.0 for value in EvaluationFixturesTest.VALUES]
+
+    def test_fixtures_in_process(self):
+        costs, setup_calls = self._evaluate("mfile_standalone")
+
+        self.assertEqual(costs, self._expected_costs())
+        self.assertEqual(setup_calls, ["fixtures_cost"])
+        self.assertFalse(fixtures()["offsets"].flags.writeable)
+
+    def test_fixtures_shared_with_worker_processes(self):
+        costs, setup_calls = self._evaluate("multiprocess")
+
+        # setup is called once, in this process
+        self.assertEqual(costs, self._expected_costs())
+        self.assertEqual(setup_calls, ["fixtures_cost"])
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import os
+import time
+import unittest
+from tests.test_helpers import TestHelper
+
+from MLC.Application import MLCCallbacksManager
+from MLC.Log.log import set_logger
+from MLC.mlc_parameters.mlc_parameters import saved, Config
+from MLC.db.mlc_repository import MLCRepository
+from MLC.individual.Individual import Individual
+import MLC.Population.Evaluation.SupervisedWorker as supervised_worker
+from MLC.Population.Evaluation.EvaluatorFactory import EvaluatorFactory
+
+EVALUATION_MODULE = """
+import os
+import time
+
+MARKER_DIR = %(experiment_dir)r
+
+
+def cost(indiv):
+    value = indiv.get_value()
+    if "sin" in value:
+        # Hangs forever
+        time.sleep(60)
+    if "exp" in value:
+        # Hangs only the first time
+        marker = os.path.join(MARKER_DIR, "exp_started")
+        if not os.path.exists(marker):
+            open(marker, "w").close()
+            time.sleep(60)
+    if "/" in value:
+        # The worker dies
+        os._exit(1)
+    return float(len(value))
+"""
+
+
+class EvaluationTimeoutTest(unittest.TestCase):
+    VALUES = ["(root (+ S0 1.0000))",
+              "(root (sin (* S0 2.5000)))",
+              "(root (exp (- S0 (cos S0))))",
+              "(root (/ 2.0000 S0))",
+              "(root S0)"]
+
+    @classmethod
+    def setUpClass(cls):
+        TestHelper.load_default_configuration()
+        set_logger('testing')
+
+        cls._experiment_dir = TestHelper.create_experiment("hanging_cost", EVALUATION_MODULE)
+
+    @classmethod
+    def tearDownClass(cls):
+        TestHelper.remove_experiment(cls._experiment_dir)
+
+    def setUp(self):
+        marker = os.path.join(self._experiment_dir, "exp_started")
+        if os.path.exists(marker):
+            os.remove(marker)
+
+    def _evaluate(self, action, values=VALUES):
+        with saved(Config.get_instance()) as config:
+            config.set("BEHAVIOUR", "save", "false")
+            config.set("EVALUATOR", "evaluation_function", "hanging_cost")
+            config.set("EVALUATOR", "timeout", "0.5")
+            config.set("EVALUATOR", "timeout_action", action)
+            config.set("EVALUATOR", "timeout_retries", "1")
+
+            MLCRepository.make("")
+            repository = MLCRepository.get_instance()
+            indivs = [repository.add_individual(Individual(value))[0] for value in values]
+
+            evaluator = EvaluatorFactory.make("mfile_standalone", MLCCallbacksManager())
+            try:
+                costs = evaluator.evaluate(indivs)
+            finally:
+                evaluator.close()
+
+            events = [(indiv, event, attempt) for _, indiv, event, attempt, _, _ in repository.get_evaluation_events()]
+            return indivs, costs, events, config.parameters().badvalue
+
+    def test_timeout_gets_badvalue(self):
+        indivs, costs, events, badvalue = self._evaluate("badvalue")
+
+        values = EvaluationTimeoutTest.VALUES
+        self.assertEqual(costs, [float(len(values[0])), badvalue, badvalue, badvalue, float(len(values[4]))])
+        self.assertEqual(events, [(indivs[1], "timeout", 1), (indivs[2], "timeout", 1), (indivs[3], "crash", 1)])
+
+    def test_timeout_retry(self):
+        indivs, costs, events, badvalue = self._evaluate("retry")
+
+        values = EvaluationTimeoutTest.VALUES
+        self.assertEqual(costs, [float(len(values[0])), badvalue, float(len(values[2])), badvalue,
+                                 float(len(values[4]))])
+        self.assertEqual(events, [(indivs[1], "timeout", 1), (indivs[1], "timeout", 2), (indivs[2], "timeout", 1),
+                                  (indivs[3], "crash", 1), (indivs[3], "crash", 2)])
+
+    def test_worker_start_is_not_timed(self):
+        initialize_worker = supervised_worker._initialize_worker
+
+        def slow_initialize_worker(*args):
+            # Like an evaluation module that takes long to import
+            time.sleep(1)
+            initialize_worker(*args)
+
+        supervised_worker._initialize_worker = slow_initialize_worker
+        try:
+            values = ["(root S0)", "(root (+ S0 1.0000))"]
+            indivs, costs, events, _ = self._evaluate("badvalue", values)
+        finally:
+            supervised_worker._initialize_worker = initialize_worker
+
+        self.assertEqual(costs, [float(len(value)) for value in values])
+        self.assertEqual(events, [])
+
+    def test_invalid_action(self):
+        self.assertRaises(ValueError, self._evaluate, "wait")
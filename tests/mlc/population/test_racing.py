@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+import unittest
+from tests.test_helpers import TestHelper
+
+from MLC.Log.log import set_logger
+from MLC.mlc_parameters.mlc_parameters import saved, Config
+from MLC.Population.Population import Population
+from MLC.db.mlc_repository import MLCRepository
+from MLC.individual.Individual import Individual
+
+
+class NoisyEvaluator(object):
+    def __init__(self, costs, noise):
+        self._costs = costs
+        self._noise = noise
+        self.evaluations = {}
+
+    def evaluate(self, indivs):
+        costs = []
+        for indiv in indivs:
+            times = self.evaluations.get(indiv, 0)
+            self.evaluations[indiv] = times + 1
+            costs.append(self._costs[indiv] + self._noise[times % len(self._noise)])
+        return costs
+
+
+class RacingTest(unittest.TestCase):
+    VALUES = ["(root (+ S0 1.0000))",
+              "(root (sin (* S0 2.5000)))",
+              "(root (exp (- S0 (cos S0))))",
+              "(root (/ 2.0000 S0))",
+              "(root (* S0 S0))"]
+
+    @classmethod
+    def setUpClass(cls):
+        TestHelper.load_default_configuration()
+        set_logger('testing')
+
+    def _race(self, costs, noise, elite_size, max_evaluations):
+        with saved(Config.get_instance()) as config:
+            config.set("BEHAVIOUR", "save", "false")
+
+            MLCRepository.make("")
+            repository = MLCRepository.get_instance()
+            indivs = [repository.add_individual(Individual(value))[0] for value in RacingTest.VALUES]
+
+            evaluator = NoisyEvaluator(dict(zip(indivs, costs)), noise)
+            population = Population(len(indivs), 1, config, repository)
+            population.set_individuals(list(enumerate(indivs)))
+            population.evaluate(evaluator)
+            population.race(evaluator, elite_size, max_evaluations)
+            population.sort()
+            repository.add_population(population)
+
+            return indivs, population, evaluator.evaluations, repository
+
+    def test_noiseless_costs_are_stable(self):
+        indivs, population, evaluations, _ = self._race([3.0, 1.0, 2.0, 20.0, 30.0], [0.0], 2, 5)
+
+        # The elite and its best challenger are evaluated again once
+        self.assertEqual([evaluations[indiv] for indiv in indivs], [2, 2, 2, 1, 1])
+        self.assertEqual(population.get_costs(), [1.0, 2.0, 3.0, 20.0, 30.0])
+
+    def test_clearly_bad_individuals_are_not_evaluated_again(self):
+        indivs, population, evaluations, _ = self._race([1.0, 1.1, 1.2, 20.0, 30.0], [0.5, -0.5], 1, 6)
+
+        self.assertEqual([evaluations[indiv] for indiv in indivs[3:]], [1, 1])
+        self.assertEqual(evaluations[indivs[0]], 6)
+        self.assertEqual(population.get_individuals()[:3], indivs[:3])
+        self.assertAlmostEqual(population.get_costs()[0], 1.0)
+
+    def test_samples_in_cost_history(self):
+        indivs, population, evaluations, repository = self._race([1.0, 1.1, 1.2, 20.0, 30.0], [0.5, -0.5], 1, 4)
+
+        history = repository.get_individual_data(indivs[0]).get_cost_history()
+        self.assertEqual([cost for cost, _ in history[1]], [1.5, 0.5, 1.5, 0.5])
+
+        history = repository.get_individual_data(indivs[4]).get_cost_history()
+        self.assertEqual([cost for cost, _ in history[1]], [30.5])
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import os
+import socket
+import subprocess
+import sys
+import threading
+import unittest
+from tests.test_helpers import TestHelper
+
+from MLC.Application import MLC_CALLBACKS
+from MLC.Application import MLCCallbacksManager
+from MLC.Log.log import set_logger
+from MLC.mlc_parameters.mlc_parameters import saved, Config
+from MLC.db.mlc_repository import MLCRepository
+from MLC.individual.Individual import Individual
+from MLC.Population.Evaluation.EvaluatorFactory import EvaluatorFactory
+from MLC.Population.Evaluation.RemoteEvaluator import authentication_code, new_nonce, receive_message, send_message
+from MLC.Population.Evaluation.RemoteWorker import RemoteWorker, RemoteWorkerError
+
+EVALUATION_MODULE = """
+import os
+
+MARKER_DIR = %(experiment_dir)r
+
+
+def cost(indiv):
+    value = indiv.get_value()
+    if "sin" in value:
+        # The first worker evaluating it dies
+        marker = os.path.join(MARKER_DIR, "sin_started")
+        if not os.path.exists(marker):
+            open(marker, "w").close()
+            os._exit(1)
+    if "exp" in value:
+        raise ValueError("exp is not allowed")
+    return float(len(value))
+"""
+
+
+class RemoteEvaluatorTest(unittest.TestCase):
+    VALUES = ["(root (+ S0 1.0000))",
+              "(root (sin (* S0 2.5000)))",
+              "(root S0)",
+              "(root (exp (- S0 (cos S0))))",
+              "(root (/ 2.0000 S0))"]
+
+    @classmethod
+    def setUpClass(cls):
+        TestHelper.load_default_configuration()
+        set_logger('testing')
+
+        cls._experiment_dir = TestHelper.create_experiment("remote_cost", EVALUATION_MODULE)
+
+    @classmethod
+    def tearDownClass(cls):
+        TestHelper.remove_experiment(cls._experiment_dir)
+
+    def setUp(self):
+        marker = os.path.join(self._experiment_dir, "sin_started")
+        if os.path.exists(marker):
+            os.remove(marker)
+
+    def _expected_costs(self, badvalue):
+        return [badvalue if "exp" in value else float(len(value)) for value in RemoteEvaluatorTest.VALUES]
+
+    def _start_worker(self, port, *args):
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+        command = [sys.executable, "-m", "MLC.Population.Evaluation.RemoteWorker",
+                   "--port", str(port), "--token", "secret"] + list(args)
+        with open(os.devnull, "w") as devnull:
+            return subprocess.Popen(command, env=environment, stdout=devnull, stderr=devnull)
+
+    def _connect(self, port, token="secret"):
+        connection = socket.create_connection(("127.0.0.1", port))
+        connection_file = connection.makefile('rb')
+        nonce = new_nonce()
+        send_message(connection, {"type": "hello", "name": "test", "nonce": nonce})
+        challenge = receive_message(connection_file)
+        send_message(connection, {"type": "answer",
+                                  "proof": authentication_code(token, "worker", challenge["nonce"], nonce)})
+        return connection, connection_file, receive_message(connection_file)
+
+    def _make_evaluator(self, config, events, token="secret"):
+        config.set("BEHAVIOUR", "save", "false")
+        config.set("EVALUATOR", "evaluation_function", "remote_cost")
+        config.set("EVALUATOR", "remote_port", "0")
+        config.set("EVALUATOR", "remote_heartbeat", "0.2")
+        config.set("EVALUATOR", "remote_token", token)
+
+        MLCRepository.make("")
+        repository = MLCRepository.get_instance()
+        indivs = [repository.add_individual(Individual(value))[0] for value in RemoteEvaluatorTest.VALUES]
+
+        callbacks_manager = MLCCallbacksManager()
+        callbacks_manager.subscribe(MLC_CALLBACKS.ON_EVALUATE, lambda index, cost: events.append((index, cost)))
+        return EvaluatorFactory.make("remote", callbacks_manager), indivs
+
+    def test_workers_in_localhost(self):
+        with saved(Config.get_instance()) as config:
+            events = []
+            evaluator, indivs = self._make_evaluator(config, events)
+            port = evaluator.address[1]
+            workers = [self._start_worker(port, "--batch", "2"), self._start_worker(port)]
+
+            try:
+                costs = evaluator.evaluate(indivs)
+            finally:
+                evaluator.close()
+            return_codes = [worker.wait() for worker in workers]
+
+            expected = self._expected_costs(config.parameters().badvalue)
+            self.assertEqual(costs, expected)
+            self.assertEqual(sorted(events), sorted(zip(indivs, expected)))
+            # One of the workers died evaluating the sin individual, which was queued again
+            self.assertEqual(sorted(return_codes), [0, 1])
+
+    def test_tasks_of_silent_worker_are_queued_again(self):
+        with saved(Config.get_instance()) as config:
+            events = []
+            evaluator, indivs = self._make_evaluator(config, events)
+            port = evaluator.address[1]
+
+            # A worker that takes every individual and stops answering
+            connection, connection_file, welcome = self._connect(port)
+            self.assertEqual(welcome["type"], "welcome")
+
+            results = []
+            evaluation = threading.Thread(target=lambda: results.append(evaluator.evaluate(indivs)))
+            evaluation.start()
+
+            send_message(connection, {"type": "get", "batch": 10})
+            tasks = []
+            while not tasks:
+                tasks = receive_message(connection_file)["tasks"]
+            self.assertEqual(len(tasks), len(indivs))
+
+            # Nobody dies this time
+            open(os.path.join(self._experiment_dir, "sin_started"), "w").close()
+            worker = self._start_worker(port, "--batch", "3")
+            try:
+                evaluation.join(60)
+            finally:
+                connection.close()
+                evaluator.close()
+                worker.wait()
+
+            self.assertEqual(results, [self._expected_costs(config.parameters().badvalue)])
+
+    def test_invalid_token(self):
+        with saved(Config.get_instance()) as config:
+            evaluator, _ = self._make_evaluator(config, [])
+            try:
+                connection, _, reply = self._connect(evaluator.address[1], token="wrong")
+                connection.close()
+            finally:
+                evaluator.close()
+
+            self.assertEqual(reply["type"], "error")
+
+    def test_worker_refuses_coordinator_without_the_token(self):
+        with saved(Config.get_instance()) as config:
+            evaluator, _ = self._make_evaluator(config, [])
+            try:
+                worker = RemoteWorker("127.0.0.1", evaluator.address[1], token="wrong")
+                self.assertRaisesRegexp(RemoteWorkerError, "does not know the token", worker.run)
+                self.assertRaises(RemoteWorkerError, RemoteWorker("127.0.0.1", evaluator.address[1]).run)
+            finally:
+                evaluator.close()
+
+    def test_token_is_required(self):
+        with saved(Config.get_instance()) as config:
+            self.assertRaises(ValueError, self._make_evaluator, config, [], token="")
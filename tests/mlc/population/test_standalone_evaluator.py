@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import unittest
+from tests.test_helpers import TestHelper
+
+from MLC.Application import MLC_CALLBACKS
+from MLC.Application import MLCCallbacksManager
+from MLC.Log.log import set_logger
+from MLC.mlc_parameters.mlc_parameters import saved, Config
+from MLC.db.mlc_repository import MLCRepository
+from MLC.individual.Individual import Individual
+from MLC.Population.Evaluation.EvaluatorFactory import EvaluatorFactory
+
+EVALUATION_MODULE = """
+chunks = []
+batched = []
+
+
+def cost(indiv):
+    raise AssertionError("cost_batch must be used")
+
+
+def cost_batch(indivs):
+    chunks.append(len(indivs))
+    batched.extend(indiv.get_tree()._expression_batch is not None for indiv in indivs)
+    if len(indivs) > 3:
+        # Wrong amount of costs
+        return []
+    return [float(len(indiv.get_value())) for indiv in indivs]
+"""
+
+
+class StandaloneEvaluatorTest(unittest.TestCase):
+    VALUES = ["(root (+ S0 1.0000))",
+              "(root (sin (* S0 2.5000)))",
+              "(root S0)",
+              "(root (exp (- S0 (cos S0))))",
+              "(root (/ 2.0000 S0))"]
+
+    @classmethod
+    def setUpClass(cls):
+        TestHelper.load_default_configuration()
+        set_logger('testing')
+
+        cls._experiment_dir = TestHelper.create_experiment("batch_cost", EVALUATION_MODULE)
+
+    @classmethod
+    def tearDownClass(cls):
+        TestHelper.remove_experiment(cls._experiment_dir)
+
+    def _evaluate(self, chunksize, expression_batch=None):
+        with saved(Config.get_instance()) as config:
+            config.set("BEHAVIOUR", "save", "false")
+            config.set("EVALUATOR", "evaluation_function", "batch_cost")
+            config.set("EVALUATOR", "chunksize", str(chunksize))
+            if expression_batch is not None:
+                config.set("OPTIMIZATION", "expression_batch", str(expression_batch).lower())
+
+            MLCRepository.make("")
+            repository = MLCRepository.get_instance()
+            indivs = [repository.add_individual(Individual(value))[0] for value in StandaloneEvaluatorTest.VALUES]
+
+            events = []
+            callbacks_manager = MLCCallbacksManager()
+            callbacks_manager.subscribe(MLC_CALLBACKS.ON_EVALUATE, lambda index, cost: events.append((index, cost)))
+
+            callback = EvaluatorFactory.get_callback()
+            del callback.chunks[:]
+            del callback.batched[:]
+            costs = EvaluatorFactory.make("mfile_standalone", callbacks_manager).evaluate(indivs)
+            self._batched = list(callback.batched)
+            return indivs, costs, events, callback.chunks
+
+    def test_cost_batch_by_chunks(self):
+        indivs, costs, events, chunks = self._evaluate(chunksize=2)
+
+        expected = [float(len(value)) for value in StandaloneEvaluatorTest.VALUES]
+        self.assertEqual(costs, expected)
+        self.assertEqual(events, zip(indivs, expected))
+        self.assertEqual(chunks, [2, 2, 1])
+
+    def test_expression_batch_is_disabled_by_default(self):
+        self._evaluate(chunksize=3)
+        self.assertEqual(self._batched, [False] * len(StandaloneEvaluatorTest.VALUES))
+
+        self._evaluate(chunksize=3, expression_batch=True)
+        self.assertEqual(self._batched, [True] * len(StandaloneEvaluatorTest.VALUES))
+
+    def test_cost_batch_with_wrong_amount_of_costs(self):
+        self.assertRaises(ValueError, self._evaluate, chunksize=0)
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import unittest
+from tests.test_helpers import TestHelper
+
+from MLC.Application import MLC_CALLBACKS, MLCCallbacksManager
+from MLC.Log.log import set_logger
+from MLC.mlc_parameters.mlc_parameters import saved, Config
+from MLC.Population.Population import Population
+from MLC.Population.SteadyStateEvolution import SteadyStateEvolution
+from MLC.Common.RandomManager import RandomManager
+from MLC.db.mlc_repository import MLCRepository
+from MLC.Population.Creation.CreationFactory import CreationFactory
+from MLC.Simulation import Simulation
+
+
+class AsyncEvaluator(object):
+    """
+    Evaluates the submitted individuals with the distance between the length of their value
+    and 60 as cost. The evaluations finish in the opposite order they were submitted
+    """
+
+    def __init__(self, slots):
+        self._slots = slots
+        self._submitted = []
+        self._next_ticket = 1
+        self.max_in_flight = 0
+        self.evaluated = []
+
+    def slots(self):
+        return self._slots
+
+    def submit(self, index):
+        self._submitted.append((self._next_ticket, index))
+        self._next_ticket += 1
+        self.max_in_flight = max(self.max_in_flight, len(self._submitted))
+        return self._next_ticket - 1
+
+    def next_result(self):
+        ticket, index = self._submitted.pop()
+        self.evaluated.append(index)
+        return ticket, self._cost(index)
+
+    def evaluate(self, indivs):
+        return [self._cost(index) for index in indivs]
+
+    def _cost(self, index):
+        return float(abs(len(MLCRepository.get_instance().get_individual(index).get_value()) - 60))
+
+
+class SteadyStateEvolutionTest(unittest.TestCase):
+    POPULATION_SIZE = 10
+
+    @classmethod
+    def setUpClass(cls):
+        TestHelper.load_default_configuration()
+        set_logger('testing')
+
+    def _evolve(self, slots, to_generation):
+        with saved(Config.get_instance()) as config:
+            config.set("BEHAVIOUR", "save", "false")
+            config.set("POPULATION", "size", str(SteadyStateEvolutionTest.POPULATION_SIZE))
+            config.set("OPTIMIZATION", "cascade", "1,1")
+
+            MLCRepository.make("")
+            repository = MLCRepository.get_instance()
+            RandomManager.clear_random_values()
+
+            population = Simulation.create_empty_population_for(1)
+            population.fill(CreationFactory.make(config.get('GP', 'generation_method')))
+            population.evaluate(AsyncEvaluator(1))
+            population.sort()
+            repository.add_population(population)
+
+            generations = []
+            callbacks = MLCCallbacksManager()
+            callbacks.subscribe(MLC_CALLBACKS.ON_NEW_GENERATION, generations.append)
+
+            evaluator = AsyncEvaluator(slots)
+            SteadyStateEvolution(evaluator, callbacks, True).run(to_generation)
+            return repository, evaluator, generations
+
+    def test_pseudo_generations_are_stored(self):
+        repository, evaluator, generations = self._evolve(3, 4)
+
+        self.assertEqual(generations, [2, 3, 4])
+        self.assertEqual(repository.count_population(), 4)
+        self.assertEqual(len(evaluator.evaluated), 3 * SteadyStateEvolutionTest.POPULATION_SIZE)
+
+        for generation in xrange(2, 5):
+            population = repository.get_population(generation)
+            self.assertEqual(population.get_size(), SteadyStateEvolutionTest.POPULATION_SIZE)
+            self.assertEqual(population.get_costs(), sorted(population.get_costs()))
+
+    def test_best_cost_never_gets_worse(self):
+        repository, _, _ = self._evolve(2, 5)
+
+        best_costs = [repository.get_population(generation).get_costs()[0] for generation in xrange(1, 6)]
+        self.assertEqual(best_costs, sorted(best_costs, reverse=True))
+
+    def test_slots_are_kept_busy(self):
+        _, evaluator, _ = self._evolve(4, 3)
+
+        # A crossover could submit one more offspring than free slots
+        self.assertTrue(4 <= evaluator.max_in_flight <= 5)
+
+    def test_kept_individuals_point_to_previous_position(self):
+        repository, _, _ = self._evolve(2, 3)
+
+        previous = repository.get_population(2).get_individuals()
+        population = repository.get_population(3)
+        for indiv, gen_method, parents in zip(population.get_individuals(),
+                                              population.get_gen_methods(),
+                                              population.get_parents()):
+            if gen_method == Population.GenerationMethod.ELITISM:
+                self.assertEqual(previous[parents[0] - 1], indiv)
+            else:
+                self.assertNotIn(indiv, previous)
+                for parent in parents:
+                    self.assertTrue(1 <= parent <= len(previous))
+
+    def test_every_evaluation_is_in_the_cost_history(self):
+        repository, evaluator, generations = self._evolve(3, 3)
+
+        rejected = 0
+        for index in set(evaluator.evaluated):
+            history = repository.get_individual_data(index).get_cost_history()
+            evaluations = [cost for generation in (2, 3) for cost, _ in history.get(generation, [])]
+            self.assertIn(evaluator._cost(index), evaluations)
+            if not any(index in repository.get_population(generation).get_individuals() for generation in (2, 3)):
+                rejected += 1
+
+        # Offspring worse than the archive were evaluated too
+        self.assertTrue(rejected > 0)
+
+    def _evolution_breeding(self, offspring):
+        with saved(Config.get_instance()) as config:
+            config.set("BEHAVIOUR", "save", "false")
+            config.set("OPTIMIZATION", "probmut", "1")
+            config.set("OPTIMIZATION", "probcro", "0")
+            evolution = SteadyStateEvolution(AsyncEvaluator(1), MLCCallbacksManager(), True)
+
+        archive = Population(2, 1, Config.get_instance(), None)
+        archive.set_individual(0, 1, 1.0, Population.GenerationMethod.ELITISM, [1])
+        archive.set_individual(1, 2, 2.0, Population.GenerationMethod.ELITISM, [2])
+        evolution._archive = archive
+        evolution._mutation = lambda: offspring
+        return evolution
+
+    def test_breeding_only_duplicates_is_limited(self):
+        duplicated = [(2, Population.GenerationMethod.MUTATION, [1])]
+        self.assertEqual(self._evolution_breeding(duplicated)._breed(), duplicated)
+
+    def test_breeding_nothing_fails(self):
+        self.assertRaises(ValueError, self._evolution_breeding([])._breed)
+
+    def test_last_evaluation_is_bred_with_a_mutation(self):
+        mutation = [(3, Population.GenerationMethod.MUTATION, [1])]
+        evolution = self._evolution_breeding(mutation)
+        evolution._probmut, evolution._probcro = 0, 1
+        evolution._crossover = lambda: self.fail("The second child of a crossover wouldn't be evaluated")
+        evolution._evaluations_left = 1
+
+        self.assertEqual(evolution._breed(), mutation)
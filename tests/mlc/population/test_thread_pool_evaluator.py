@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+# MLC (Machine Learning Control): A genetic algorithm library to solve chaotic problems
+# Copyright (C) 2015-2017, Thomas Duriez (thomas.duriez@gmail.com)
+# Copyright (C) 2015, Adrian Durán (adrianmdu@gmail.com)
+# Copyright (C) 2015-2017, Ezequiel Torres Feyuk (ezequiel.torresfeyuk@gmail.com)
+# Copyright (C) 2016-2017, Marco Germano Zbrun (marco.germano@intraway.com)
+# Copyright (C) 2016-2017, Raúl Lopez Skuba (raulopez0@gmail.com)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>
+
+
+import unittest
+from tests.test_helpers import TestHelper
+
+from MLC.Application import MLC_CALLBACKS
+from MLC.Application import MLCCallbacksManager
+from MLC.Log.log import set_logger
+from MLC.mlc_parameters.mlc_parameters import saved, Config
+from MLC.db.mlc_repository import MLCRepository
+from MLC.individual.Individual import Individual
+from MLC.Population.Evaluation.EvaluatorFactory import EvaluatorFactory
+from MLC.Population.Evaluation.ThreadPoolEvaluator import ThreadPoolEvaluator
+
+EVALUATION_MODULE = """
+import threading
+import time
+from MLC.Population.Evaluation.ThreadPoolEvaluator import thread_context
+
+closed_contexts = []
+
+
+def open_thread_context(context):
+    context.evaluations = 0
+    context.thread = threading.current_thread()
+
+
+def close_thread_context(context):
+    context.closed_by_its_thread = context.thread is threading.current_thread()
+    closed_contexts.append(context)
+
+
+def cost(indiv):
+    # Wait like a cost function reading a serial port
+    time.sleep(0.01)
+    thread_context().evaluations += 1
+    return float(len(indiv.get_value()))
+"""
+
+
+class ThreadPoolEvaluatorTest(unittest.TestCase):
+    VALUES = ["(root (+ S0 1.0000))",
+              "(root (sin (* S0 2.5000)))",
+              "(root S0)",
+              "(root (exp (- S0 (cos S0))))",
+              "(root (/ 2.0000 S0))",
+              "(root (tanh S0))"]
+
+    @classmethod
+    def setUpClass(cls):
+        TestHelper.load_default_configuration()
+        set_logger('testing')
+
+        cls._experiment_dir = TestHelper.create_experiment("waiting_cost", EVALUATION_MODULE)
+
+    @classmethod
+    def tearDownClass(cls):
+        TestHelper.remove_experiment(cls._experiment_dir)
+
+    def test_costs_in_population_order(self):
+        with saved(Config.get_instance()) as config:
+            config.set("BEHAVIOUR", "save", "false")
+            config.set("EVALUATOR", "evaluation_function", "waiting_cost")
+            config.set("EVALUATOR", "workers", "3")
+
+            MLCRepository.make("")
+            repository = MLCRepository.get_instance()
+            indivs = [repository.add_individual(Individual(value))[0] for value in ThreadPoolEvaluatorTest.VALUES]
+
+            events = []
+            callbacks_manager = MLCCallbacksManager()
+            callbacks_manager.subscribe(MLC_CALLBACKS.ON_EVALUATE, lambda index, cost: events.append((index, cost)))
+
+            evaluator = EvaluatorFactory.make("threads", callbacks_manager)
+            self.assertIsInstance(evaluator, ThreadPoolEvaluator)
+            callback = EvaluatorFactory.get_callback()
+            try:
+                costs = evaluator.evaluate(indivs)
+            finally:
+                evaluator.close()
+
+            expected = [float(len(value)) for value in ThreadPoolEvaluatorTest.VALUES]
+            self.assertEqual(costs, expected)
+            self.assertEqual(events, zip(indivs, expected))
+
+            # Every thread had its own context, all of them were closed
+            self.assertEqual(len(callback.closed_contexts), 3)
+            self.assertEqual(sum(context.evaluations for context in callback.closed_contexts), len(indivs))
+            self.assertTrue(all(context.closed_by_its_thread for context in callback.closed_contexts))
@@ -19,10 +19,14 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>
 
+from MLC.Common.CallbackRegistry import CallbackRegistry
 from MLC.mlc_parameters.mlc_parameters import Config
 from MLC.config import get_test_path
 
 import os
+import shutil
+import sys
+import tempfile
 
 
 class TestHelper:
@@ -32,3 +36,28 @@ class TestHelper:
     def load_default_configuration():
         Config.get_instance().read(os.path.join(get_test_path(),
                                                 TestHelper.DEFAULT_CONF_FILENAME))
+
+    @staticmethod
+    def create_experiment(function_name, source):
+        """
+        Create a temporary experiment whose Evaluation package has the module function_name
+        with the given source, and make it importable. Return the experiment directory.
+        %(experiment_dir)r in the source is replaced by the experiment directory
+        """
+        experiment_dir = tempfile.mkdtemp()
+        evaluation_dir = os.path.join(experiment_dir, "Evaluation")
+        os.mkdir(evaluation_dir)
+        open(os.path.join(evaluation_dir, "__init__.py"), "w").close()
+        with open(os.path.join(evaluation_dir, function_name + ".py"), "w") as evaluation_file:
+            evaluation_file.write(source % {"experiment_dir": experiment_dir})
+        sys.path.append(experiment_dir)
+        return experiment_dir
+
+    @staticmethod
+    def remove_experiment(experiment_dir):
+        """
+        Remove an experiment created by create_experiment and the callbacks it registered
+        """
+        sys.path.remove(experiment_dir)
+        shutil.rmtree(experiment_dir)
+        CallbackRegistry.get_instance().clear()
@@ -0,0 +1,8 @@
+#!/bin/bash
+
+# Put the absolute path where the 'shared' python was installed
+export PYTHONPATH=$PYTHONPATH:$(dirname "$0")/../
+MLCPYTHON=python
+
+# Run a remote evaluation worker, see MLC/Population/Evaluation/RemoteWorker.py
+$MLCPYTHON -m MLC.Population.Evaluation.RemoteWorker "$@"